@@ -21,16 +21,18 @@ mkdir -p logs
 # Define paths
 HADDOCKER_PATH="/project/ealexov/compbio/shamrat/250324_HADDOCKer/haddock3.sif"
 CFG_FOLDER="05_cfg_files"
+export PYTHONPATH="/project/ealexov/compbio/shamrat/250519_energy:$PYTHONPATH"
 
-# Process each .cfg file sequentially
-for cfg_file in "$CFG_FOLDER"/*.cfg; do
-    echo "Running HADDOCK for $cfg_file"
-    apptainer exec "$HADDOCKER_PATH" haddock3 "$cfg_file"
+# Run the .cfg files concurrently, splitting the allocated CPUs between runs.
+# Interrupted runs resume from their last completed module; per-run logs and
+# logs/haddock_status.json record progress.
+python -m cdkl5_variants.haddock_runs "$CFG_FOLDER" \
+    --cores "${SLURM_CPUS_PER_TASK:-40}" \
+    --haddock3 "apptainer exec $HADDOCKER_PATH haddock3" \
+    --status logs/haddock_status.json
 
-    # Check if HADDOCK failed
-    if [ $? -ne 0 ]; then
-        echo "Error in processing $cfg_file. Check logs." >> logs/errors.log
-    fi
-done
+if [ $? -ne 0 ]; then
+    echo "Some HADDOCK runs failed. Check logs/haddock_status.json." >> logs/errors.log
+fi
 
 echo "All docking jobs completed."
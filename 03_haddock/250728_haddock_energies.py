@@ -1,77 +1,42 @@
 #!/usr/bin/env python3
 import os
-import pandas as pd
+import sys
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.haddock_energies import EnergyHarvester
 
 # Base working directory
 BASE_DIR = "/project/ealexov/compbio/shamrat/250519_energy/03_haddock"
+OUT_DIR = os.path.join(BASE_DIR, "07_energies")
+
+# Complexes of interest (None → every run directory with a caprieval table)
+complexes = None
 
-# Complexes of interest
-complexes = [
-    "P49418_AMPH1_290-294",
-    "Q86YP4_GATAD2A_97-101",
-    "P48436_SOX9_197-202",
-    "Q9P2Y4_ZNF219_111-115"
-]
-
-# Columns to extract from capri_ss.tsv
-energy_cols = [
-    'model', 'score', 'irmsd', 'fnat', 'lrmsd', 'dockq',
-    'air', 'angles', 'bonds', 'bsa', 'cdihcoup',
-    'dani', 'desolv', 'dihe', 'elec', 'improper',
-    'rdcsrg', 'total', 'vdw', 'vean', 'xpcs'
-]
-
-# Terms to summarize
-summary_terms = ['vdw', 'elec', 'desolv', 'air', 'total', 'score']
-
-def extract_components():
-    all_dfs = []
-    for comp in complexes:
-        ss_path = os.path.join(BASE_DIR, comp, "10_caprieval", "capri_ss.tsv")
-        if not os.path.isfile(ss_path):
-            print(f"⚠️ Missing {ss_path}, skipping {comp}")
-            continue
-        df = pd.read_csv(ss_path, sep=r"\s+", engine='python')
-        df['complex'] = comp
-        present = [c for c in energy_cols if c in df.columns]
-        all_dfs.append(df[present + ['complex']])
-    if not all_dfs:
+def main(force=False):
+    harvester = EnergyHarvester(BASE_DIR, OUT_DIR, runs=complexes)
+    report = harvester.harvest(force=force)
+    print(f"Parsed {len(report['parsed'])} run(s), {len(report['unchanged'])} unchanged, "
+          f"{len(report['removed'])} removed")
+    if not harvester.manifest["runs"]:
         raise RuntimeError("No energy data found for any complex.")
-    combined = pd.concat(all_dfs, ignore_index=True)
-    cols = ['complex'] + [c for c in energy_cols if c in combined.columns]
-    return combined[cols]
-
-def save_components(combined):
-    out_dir = os.path.join(BASE_DIR, "07_energies")
-    os.makedirs(out_dir, exist_ok=True)
-    csv_path   = os.path.join(out_dir, "haddock_energy_components.csv")
-    excel_path = os.path.join(out_dir, "haddock_energy_components.xlsx")
-    combined.to_csv(csv_path, index=False)
-    combined.to_excel(excel_path, index=False)
-    print(f"✅ Saved full components table to:\n  {csv_path}\n  {excel_path}")
-    return excel_path
-
-def summarize_components(components_file):
-    df = pd.read_excel(components_file)
-    summary = df.groupby('complex')[summary_terms].agg(['mean', 'std'])
-    # flatten columns
-    summary.columns = [f"{term}_{stat}" for term, stat in summary.columns]
-    # Print summary to console
+
+    summary = harvester.summary()
     print("\n===== Summary Statistics (Mean ± SD) =====")
     print(summary.round(2).to_string())
-    # Save to Excel
-    out_dir = os.path.join(BASE_DIR, "07_energies")
-    summary_path = os.path.join(out_dir, "haddock_energy_summary.xlsx")
-    summary.to_excel(summary_path)
-    print(f"\n✅ Saved summary table to: {summary_path}")
+    if not report["parsed"] and not report["removed"]:
+        print("\nNothing changed since the last harvest; tables left as they are.")
+        return summary
 
-def main():
-    combined = extract_components()
-    comp_file = save_components(combined)
-    summarize_components(comp_file)
+    csv_path = os.path.join(OUT_DIR, "haddock_energy_components.csv")
+    harvester.components().to_csv(csv_path, index=False)
+    summary_path = os.path.join(OUT_DIR, "haddock_energy_summary.xlsx")
+    summary.to_excel(summary_path)
+    print(f"\n✅ Saved full components table to: {csv_path}")
+    print(f"✅ Saved summary table to: {summary_path}")
+    return summary
 
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv)
 
     
     
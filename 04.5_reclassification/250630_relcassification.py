@@ -1,53 +1,32 @@
 # A) folding per method ddg with picked max
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import folding_ddg
+
 # --- User parameters: adjust the Excel path if needed ---
 folding_path = "/project/ealexov/compbio/shamrat/250519_energy/02_folding/01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx"
 
-# Load and filter to positions 1–302
-df_fold = pd.read_excel(folding_path)
-df_fold = df_fold[df_fold['position'].between(1, 302)]
-
-# Identify per-method columns (exclude FoldX)
-str_cols = [c for c in df_fold.columns if c.endswith('_str') and 'foldx' not in c.lower()]
-
-# Compute the max absolute ΔΔG across methods
-df_fold['ddG_Fmax'] = df_fold[str_cols].abs().max(axis=1)
-
-# Split into benign and pathogenic
-benign_df = df_fold[df_fold['Germline classification'] == 'Benign']
-patho_df = df_fold[df_fold['Germline classification'] == 'Pathogenic']
-
-# Build data dicts keyed by mutation, including position and each method's |ddG|
-def build_data_dict(subdf):
-    data = {}
-    for _, row in subdf.iterrows():
-        mut = row['mutation']
-        entry = {'pos': row['position']}
-        for m in str_cols:
-            entry[m.replace('_str','')] = abs(row[m])
-        # include picked max
-        entry['max'] = row['ddG_Fmax']
-        data[mut] = entry
-    return data
-
-benign_data = build_data_dict(benign_df)
-patho_data  = build_data_dict(patho_df)
-
-# Methods list (without '_str' suffix)
-methods = [m.replace('_str','') for m in str_cols]
+# Per-method |ΔΔG| (FoldX excluded) and ddG_Fmax for positions 1–302,
+# computed once per file version and shared with section B
+df_fold, methods = folding_ddg(folding_path, positions=(1, 302))
+
+# Split into benign and pathogenic, ordered by position
+benign_data = df_fold[df_fold['Germline classification'] == 'Benign'].sort_values('position', kind='stable')
+patho_data  = df_fold[df_fold['Germline classification'] == 'Pathogenic'].sort_values('position', kind='stable')
+
 colors = ['#4E79A7', '#F28E2B', '#E15759', '#76B7B2', '#B07AA1']
 width = 0.15
 
 # Plotting function matching the user style
 def plot_side(ax, data, title):
-    items = sorted(data.items(), key=lambda kv: kv[1]['pos'])
-    variants = [k for k, _ in items]
+    variants = data['mutation'].tolist()
     x = np.arange(len(variants))
-    vals = np.array([[d[m] for m in methods] for _, d in items])
-    max_vals = np.array([d['max'] for _, d in items])
+    vals = data[methods].to_numpy()
+    max_vals = data['ddG_Fmax'].to_numpy()
     # grey overlay
     ax.bar(x, max_vals, width * len(methods), color='grey', alpha=0.3, zorder=0, label='Picked Max')
     # per-method bars
@@ -82,19 +61,18 @@ plt.show()
 
 
 ## B) Folding ddg_Fmax for variants with threshold
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 
-# === 1. Load & filter your folding dataset ===
-folding_path = "/project/ealexov/compbio/shamrat/250519_energy/02_folding/01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx"
-df_fold = pd.read_excel(folding_path)
-df_fold = df_fold[df_fold['position'].between(1, 302)]
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import folding_ddg, midpoint_threshold
 
-# === 2. Identify per-method columns and compute overall max ΔΔG (ddG_Fmax) ===
-str_cols = [c for c in df_fold.columns if c.endswith('_str') and 'foldx' not in c.lower()]
-df_fold['ddG_Fmax'] = df_fold[str_cols].abs().max(axis=1)
+# === 1-2. Folding ddG_Fmax for positions 1–302 (memoized, shared with A) ===
+folding_path = "/project/ealexov/compbio/shamrat/250519_energy/02_folding/01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx"
+df_fold, _ = folding_ddg(folding_path, positions=(1, 302))
 
 # === 3. Subset to Benign vs Pathogenic variants ===
 sub = df_fold[df_fold['Germline classification'].isin(['Benign', 'Pathogenic'])]
@@ -109,9 +87,7 @@ vals_sorted   = [ddG_vals[i] for i in sorted_idx]
 groups_sorted = [groups[i]   for i in sorted_idx]
 
 # === 5. Compute threshold = (max Benign + min Pathogenic) / 2 ===
-ben_max = sub[sub['Germline classification']=='Benign']['ddG_Fmax'].max()
-pat_min = sub[sub['Germline classification']=='Pathogenic']['ddG_Fmax'].min()
-threshold = (ben_max + pat_min) / 2
+threshold = midpoint_threshold(sub, 'ddG_Fmax')
 
 # === 6. Plotting ===
 plt.rcParams.update({'font.size': 14})
@@ -169,30 +145,21 @@ plt.show()
 
 
 ## C) Binding methods & Partners Averages (Benign vs Pathogenic)
-import re
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import binding_ddg, binding_tensor
+
 # — 0. Uniform font size —
 plt.rcParams.update({'font.size': 14})
 
-# — 1. Load & filter your binding data —
+# — 1-3. Partner averages, ddG_Bmax and per-method |ddG| for positions 1–302 —
 binding_path = "/project/ealexov/compbio/shamrat/250519_energy/04_binding/clinvar_1kgp_hector_gaf_final_binding_znf219_111_only.xlsx"
-df_bind = pd.read_excel(binding_path)
-df_bind = df_bind[df_bind['position'].between(1,302)].copy()
-
-# — 2. Identify raw ddG columns and partners present —
-ddg_cols = [c for c in df_bind.columns 
-            if c.startswith('ddg_') and '_str_' in c and 'foldx' not in c.lower()]
 all_partners = ['SOX9','AMPH1','GATAD2A','ZNF219']
-partners = [p for p in all_partners if any(f"_{p}_" in c for c in ddg_cols)]
-
-# — 3. Compute partner averages and overall max —
-for p in partners:
-    cols = [c for c in ddg_cols if f"_{p}_" in c]
-    df_bind[f"avg_{p}"] = df_bind[cols].abs().mean(axis=1)
-df_bind['ddG_Bmax'] = df_bind[[f"avg_{p}" for p in partners]].max(axis=1)
+df_bind, per_method, partners, methods = binding_ddg(binding_path, all_partners, positions=(1, 302))
 
 # — 4. Build sorted summary tables & variant lists —
 benign_bind = (df_bind[df_bind['Germline classification']=='Benign']
@@ -202,29 +169,19 @@ patho_bind = (df_bind[df_bind['Germline classification']=='Pathogenic']
                [['position','mutation','ddG_Bmax']]
                .sort_values('ddG_Bmax', ascending=True))
 
-benign_idx = benign_bind.index
-patho_idx  = patho_bind.index
 benign_vars = benign_bind['mutation'].tolist()
 patho_vars  = patho_bind['mutation'].tolist()
 
-# — 5. Extract method suffixes (the part after "_str_") —
-methods = sorted({ re.search(r'_str_(.+)$', c).group(1) 
-                   for c in ddg_cols })
-
 # — 6. Plotting colors & bar width —
 colors    = ['#4E79A7', '#F28E2B', '#E15759', '#76B7B2']
 avg_color = '#CCCCCC'
 width     = 0.15
 
 # — 7. Gather per‐method |ddG| values for benign & pathogenic —
-benign_methods = {p: {} for p in partners}
-patho_methods  = {p: {} for p in partners}
-for p in partners:
-    for m in methods:
-        # find the one raw column matching this partner+method
-        col = [c for c in ddg_cols if f"_{p}_" in c and c.endswith(f"_str_{m}")][0]
-        benign_methods[p][m] = df_bind.loc[benign_idx, col].abs().values
-        patho_methods[p][m]  = df_bind.loc[patho_idx,  col].abs().values
+# (variant, method, partner) array sliced by label; one complex per partner in this workbook
+ddg = binding_tensor(binding_path, positions=(1, 302))
+benign_methods = {p: {m: np.abs(ddg[benign_vars, m, p]) for m in methods} for p in partners}
+patho_methods  = {p: {m: np.abs(ddg[patho_vars, m, p]) for m in methods} for p in partners}
 
 # — 8. Create a 2×N grid of plots (N = number of partners) —
 fig, axes = plt.subplots(2, len(partners), figsize=(20, 10), sharey='row')
@@ -275,24 +232,19 @@ plt.show()
 
 
 ## D) Binding ddG_Bmax for variants with threshold
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 
-# 1. Load & filter the binding dataset
-binding_path = "/project/ealexov/compbio/shamrat/250519_energy/04_binding/clinvar_1kgp_hector_gaf_final_binding_znf219_111_only.xlsx"
-df = pd.read_excel(binding_path)
-df = df[df['position'].between(1, 302)].copy()
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import binding_ddg, midpoint_threshold
 
-# 2. Compute per-partner averages & overall ddG_Bmax if not already present
-ddg_cols = [c for c in df.columns if c.startswith('ddg_') and '_str_' in c and 'foldx' not in c.lower()]
+# 1-2. Per-partner averages & overall ddG_Bmax (memoized, shared with C)
+binding_path = "/project/ealexov/compbio/shamrat/250519_energy/04_binding/clinvar_1kgp_hector_gaf_final_binding_znf219_111_only.xlsx"
 partners = ['SOX9','AMPH1','GATAD2A','ZNF219']
-for p in partners:
-    cols = [c for c in ddg_cols if f"_{p}_" in c]
-    if cols:
-        df[f"avg_{p}"] = df[cols].abs().mean(axis=1)
-df['ddG_Bmax'] = df[[f"avg_{p}" for p in partners if f"avg_{p}" in df]].max(axis=1)
+df, _, _, _ = binding_ddg(binding_path, partners, positions=(1, 302))
 
 # 3. Build summary DataFrame and sort ascending by ddG_Bmax
 ben = (df[df['Germline classification']=='Benign']
@@ -310,7 +262,7 @@ groups    = summary['group'].tolist()
 # 5. Colors & threshold
 color_map = {'Benign':'#0072B2', 'Pathogenic':'#D55E00'}
 colors    = [color_map[g] for g in groups]
-threshold = (ben['ddG_Bmax'].max() + pat['ddG_Bmax'].min()) / 2
+threshold = midpoint_threshold(df, 'ddG_Bmax')
 
 # 6. Create the bar plot
 plt.rcParams.update({'font.size': 14})
@@ -346,4 +298,55 @@ ax.set_xlabel('Mutation')
 ax.set_ylabel('ddG_Bmax')
 plt.xticks(rotation=45, ha='right')
 plt.tight_layout()
-plt.show()
\ No newline at end of file
+plt.show()
+
+## E) Structural context of the Benign / Pathogenic variants
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import folding_ddg
+from cdkl5_variants.structure_index import StructureIndex, main as build_structure_index
+
+# Per-residue SASA, contacts, secondary structure and motif distances,
+# built once from the modeller structure and the cluster-1 complexes
+index_path = "/project/ealexov/compbio/shamrat/250519_energy/00_data/structure_index.npz"
+if not os.path.isfile(index_path):
+    build_structure_index(["--out", index_path])
+struct = StructureIndex.load(index_path)
+
+folding_path = "/project/ealexov/compbio/shamrat/250519_energy/02_folding/01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx"
+df_fold, _ = folding_ddg(folding_path, positions=(1, 302))
+ctx = df_fold[df_fold['Germline classification'].isin(['Benign', 'Pathogenic'])].reset_index(drop=True)
+ctx = pd.concat([ctx[['mutation', 'position', 'Germline classification', 'ddG_Fmax']],
+                 struct.annotate(ctx['position'])], axis=1)
+ctx['surface'] = struct.is_surface(ctx['position'])
+ctx['interface'] = struct.is_interface(ctx['position'])
+
+print(ctx.groupby('Germline classification')[['rsa', 'contacts', 'surface', 'interface']].mean().round(3))
+print(pd.crosstab(ctx['Germline classification'], ctx['ss']))
+
+## F) Threshold uncertainty (bootstrap CI, permutation p-value)
+import sys
+import pandas as pd
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.ddg import folding_ddg, binding_ddg
+from cdkl5_variants.threshold_uncertainty import report, threshold_uncertainty, variant_stability
+
+folding_path = "/project/ealexov/compbio/shamrat/250519_energy/02_folding/01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx"
+binding_path = "/project/ealexov/compbio/shamrat/250519_energy/04_binding/clinvar_1kgp_hector_gaf_final_binding_znf219_111_only.xlsx"
+df_fold, _ = folding_ddg(folding_path, positions=(1, 302))
+df_bind, _, _, _ = binding_ddg(binding_path, ['SOX9', 'AMPH1', 'GATAD2A', 'ZNF219'], positions=(1, 302))
+
+# 100k bootstrap replicates and 100k label permutations per threshold, batched as index matrices
+print(report(df_fold, ['ddG_Fmax'], n_boot=100_000, n_perm=100_000, workers=4).T)
+print(report(df_bind, ['ddG_Bmax'], n_boot=100_000, n_perm=100_000, workers=4).T)
+
+# Share of bootstrap thresholds that call each uncertain variant pathogenic
+_, boot_f, _ = threshold_uncertainty(df_fold['ddG_Fmax'], df_fold['Germline classification'],
+                                     n_boot=100_000, n_perm=1_000)
+uncertain = df_fold[~df_fold['Germline classification'].isin(['Benign', 'Pathogenic'])].copy()
+uncertain['P(pathogenic)'] = variant_stability(uncertain['ddG_Fmax'], boot_f['threshold'])
+print(uncertain[['mutation', 'ddG_Fmax', 'P(pathogenic)']].sort_values('P(pathogenic)').to_string(index=False))
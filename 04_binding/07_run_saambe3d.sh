@@ -23,18 +23,16 @@ SAAMBE_SCRIPT="/project/ealexov/compbio/shamrat/250415_binding/250416_saambe3d/S
 MUTATION_LIST="/project/ealexov/compbio/shamrat/250519_energy/04_binding/02_saambe3d/mutations_list.txt"
 MODEL_TYPE=1
 
-# — LOOP OVER ALL PDBS —
-for pdb_file in 06_cluster1_models/*.pdb; do
-    echo "=== Processing $pdb_file ==="
-    # Strip off the suffix to get e.g. P48436_SOX9_197-202
-    base_name=$(basename "$pdb_file" "_cluster_1_model_1.pdb")
-
-    # Run SAAMBE-3D with the mutation list
-    python "$SAAMBE_SCRIPT" -i "$pdb_file" -f "$MUTATION_LIST" -d "$MODEL_TYPE"
-
-    # Move the output into outputs/saambe_3d/
-    mv output.out "outputs/saambe_3d/${base_name}.out"
-    echo "Saved → outputs/saambe_3d/${base_name}.out"
-done
+# — RUN ALL PDBS IN PARALLEL —
+# One SAAMBE-3D process per (model, mutation chunk), each in its own temp dir;
+# (partner, mutation) pairs already in the results table are skipped.
+export PYTHONPATH="/project/ealexov/compbio/shamrat/250519_energy:$PYTHONPATH"
+python -m cdkl5_variants.saambe3d \
+    --script "$SAAMBE_SCRIPT" \
+    --models "06_cluster1_models/*.pdb" \
+    --mutations "$MUTATION_LIST" \
+    --model-type "$MODEL_TYPE" \
+    --workers "${SLURM_CPUS_PER_TASK:-32}" \
+    --results outputs/saambe_3d/saambe3d_results.csv
 
 echo "✅ All SAAMBE‑3D predictions completed."
@@ -1,9 +1,14 @@
 # 1) Polyphen2
 
 #!/usr/bin/env python3
+import sys
 import pandas as pd
 import subprocess
 
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.predictors import merge_predictors
+from cdkl5_variants.variant_store import VariantStore
+
 # ─── 0. Paths ────────────────────────────────────────────────────────────────
 cdkl5_variants    = "/project/ealexov/compbio/shamrat/250519_energy/00_data/" \
                     "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg.xlsx"
@@ -18,12 +23,17 @@ polyphen2_results = "/project/ealexov/compbio/shamrat/250519_energy/" \
 merged_out        = "/project/ealexov/compbio/shamrat/250519_energy/" \
                     "05_pathogenicity/01_polyphen2/" \
                     "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg_polyphen2.xlsx"
+store_dir         = "/project/ealexov/compbio/shamrat/250519_energy/00_data/variant_store"
 
 uniprot_id = "O76039"
 
+# The variants workbook is parsed once into the columnar store; every predictor
+# below reads the base from there and writes only its own column group.
+store = VariantStore.from_excel(store_dir, cdkl5_variants)
+
 
 # ─── 1.1 Prepare batch submission for webserver ──────────────────────────────
-df = pd.read_excel(cdkl5_variants)
+df = store.read(groups=[], columns=["wild", "position", "mutant"])
 for col in ("wild", "position", "mutant"):
     if col not in df.columns:
         raise KeyError(f"Column '{col}' not found in {cdkl5_variants}")
@@ -54,38 +64,22 @@ print(f"Wrote {len(df_pp2)} rows to {polyphen2_results}")
 # ─── 1.4 Preview the new Excel & original columns ───────────────────────────
 df_check = pd.read_excel(polyphen2_results)
 print("PolyPhen-2 results head:\n", df_check.head().to_string(), "\n")
-df_orig = pd.read_excel(cdkl5_variants)
-print("cdkl5_variants columns:", df_orig.columns.tolist())
+print("cdkl5_variants columns:", store.columns())
 
 
 # ─── 1.5 Merge PolyPhen-2 into your variants (1:1 mapping) ───────────────────
-variants_df = pd.read_excel(cdkl5_variants)
-pp2_df       = pd.read_excel(polyphen2_results)
-
-# Normalize key columns
-variants_df['position'] = variants_df['position'].astype(int)
-pp2_df['pos']          = pp2_df['pos'].astype(int)
-
-# Select + rename
-cols_to_pull = ['pos', 'prediction', 'pph2_prob', 'pph2_FPR', 'pph2_TPR']
-pp2_small    = pp2_df[cols_to_pull].rename(columns={'pos': 'position'})
-
-# Drop any duplicate positions (keep the first)
-pp2_unique = pp2_small.drop_duplicates(subset='position', keep='first')
-
-# Map back onto the original DataFrame
-lookup = pp2_unique.set_index('position')
-for col in ['prediction', 'pph2_prob', 'pph2_FPR', 'pph2_TPR']:
-    variants_df[col] = variants_df['position'].map(lookup[col])
+# Matched on (wild, position, mutant); matching on position alone gave every
+# variant at a shared position the first substitution's score.
+variants_df, coverage = merge_predictors(store.read(groups=[]), {"polyphen2": df_pp2})
 
 # Optional diagnostics
 missing = variants_df['prediction'].isna().sum()
 print(f"{missing} out of {len(variants_df)} variants had NO PolyPhen-2 result.")
-extra_pp2 = set(pp2_unique['position']) - set(variants_df['position'])
-print(f"{len(extra_pp2)} PolyPhen-2 positions didn’t match any original variants.")
+print(f"{coverage.loc['polyphen2', 'unused_results']} PolyPhen-2 substitutions didn’t match any original variants.")
 
-# Write merged file
-variants_df.to_excel(merged_out, index=False)
+# Store only the PolyPhen-2 columns; the Excel file is an export
+store.write_group("polyphen2", variants_df[['mutation', 'prediction', 'pph2_prob', 'pph2_FPR', 'pph2_TPR']])
+store.export_excel(merged_out, groups=["polyphen2"])
 print(f"Wrote {len(variants_df)} rows (1:1 mapping) to {merged_out}")
 
 
@@ -99,10 +93,13 @@ print(f"Wrote {len(variants_df)} rows (1:1 mapping) to {merged_out}")
 ## 2.1 Prepare fasta file with mutation for Mutpred2
 #!/usr/bin/env python3
 import os
-import requests
+import sys
 import pandas as pd
 from textwrap import wrap
 
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.fetch import uniprot_sequence
+
 # ─────── CONFIG ───────
 UNIPROT_ID = "O76039"
 OUT_DIR    = "/project/ealexov/compbio/shamrat/250519_energy/05_pathogenicity/02_mutpred2"
@@ -115,12 +112,8 @@ SPECIES_TAG= "CDKL5_HUMAN"
 MAX_PER    = 100
 # ──────────────────────
 
-# 1) fetch WT sequence from UniProt
-url   = f"https://rest.uniprot.org/uniprotkb/{UNIPROT_ID}.fasta"
-resp  = requests.get(url)
-resp.raise_for_status()
-lines = resp.text.strip().splitlines()
-seq   = "".join(lines[1:])
+# 1) fetch WT sequence from UniProt (served from the local mirror after the first run)
+seq   = uniprot_sequence(UNIPROT_ID)
 
 # 2) read your spreadsheet & build mutation tags
 df   = pd.read_excel(XLSX_PATH, usecols=[WILD_COL,POS_COL,MUT_COL])
@@ -240,11 +233,16 @@ print(f"Wrote combined MutPred2 results to {out_xlsx}")
 
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.variant_store import VariantStore
 
 # paths
 variants_xlsx = "/project/ealexov/compbio/shamrat/250519_energy/00_data/" \
                 "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg.xlsx"
 mutpred2_dir  = "/project/ealexov/compbio/shamrat/250519_energy/05_pathogenicity/02_mutpred2"
+store         = VariantStore("/project/ealexov/compbio/shamrat/250519_energy/00_data/variant_store")
 
 # use the exact combined filename you generated
 combined_xlsx = os.path.join(
@@ -252,25 +250,20 @@ combined_xlsx = os.path.join(
     "cdkl5_mutation_mutpred2_results_combined.xlsx"
 )
 
-# 1) Read your original variants and the combined MutPred2 results
-variants_df = pd.read_excel(variants_xlsx, engine="openpyxl")
-mutpred_df  = pd.read_excel(combined_xlsx, engine="openpyxl")
-
-# 2) Merge on the variant string: 'mutation' in variants matches 'Substitution' in MutPred2
-merged = variants_df.merge(
-    mutpred_df,
-    left_on="mutation",
-    right_on="Substitution",
-    how="left"
-)
+# 1) Load the combined MutPred2 results written by 2.3b
+mutpred_df = pd.read_excel(combined_xlsx, engine="openpyxl")
+
+# 2) Key on the variant string: 'Substitution' in MutPred2 matches 'mutation' in variants
+mutpred_group = mutpred_df.assign(mutation=mutpred_df["Substitution"])
+store.write_group("mutpred2", mutpred_group)
 
-# 3) Write out to Excel, appending '_mutpred2' to the original base name
+# 3) Export to Excel, appending '_mutpred2' to the original base name
 base = os.path.splitext(os.path.basename(variants_xlsx))[0]
 out_path = os.path.join(
     mutpred2_dir,
     f"{base}_mutpred2.xlsx"
 )
-merged.to_excel(out_path, index=False)
+store.export_excel(out_path, groups=["mutpred2"])
 print(f"Wrote merged MutPred2 annotations to {out_path}")
 
 
@@ -283,6 +276,7 @@ print(f"Wrote merged MutPred2 annotations to {out_path}")
 
 # 3 use esm code for esm prediction this need py11 version and 'haddock3_env' has python11 version
 # the code is loaded in '03_esm/score_cdkl5_variants.py'
+# scoring is batched in cdkl5_variants/esm1v.py: score_variants(seq, variants, model, mode=...)
 
 
 
@@ -291,31 +285,31 @@ print(f"Wrote merged MutPred2 annotations to {out_path}")
 
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.variant_store import VariantStore
 
 # 1) Paths to your original variants and the ESM results
 variants_xlsx = "/project/ealexov/compbio/shamrat/250519_energy/00_data/" \
                 "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg.xlsx"
 esm_folder    = "/project/ealexov/compbio/shamrat/250519_energy/05_pathogenicity/03_esm"
 esm_results   = os.path.join(esm_folder, "cdkl5_esm1v_scores.xlsx")
+store         = VariantStore("/project/ealexov/compbio/shamrat/250519_energy/00_data/variant_store")
 
-# 2) Read in both tables
-variants_df = pd.read_excel(variants_xlsx, engine="openpyxl")
-esm_df      = pd.read_excel(esm_results,    engine="openpyxl")
+# 2) Read the ESM results
+esm_df = pd.read_excel(esm_results, engine="openpyxl")
 
-# 3) Merge on the mutation string ('mutation' in variants ↔ 'mutation' in esm_df)
-merged = variants_df.merge(
-    esm_df,
-    on="mutation",
-    how="left"
-)
+# 3) Store the ESM columns keyed on the mutation string
+store.write_group("esm1v", esm_df)
 
-# 4) Write out a new Excel with “_esm1v” appended
+# 4) Export a new Excel with “_esm1v” appended
 base = os.path.splitext(os.path.basename(variants_xlsx))[0]
 out_path = os.path.join(
     esm_folder,
     f"{base}_esm1v.xlsx"
 )
-merged.to_excel(out_path, index=False)
+store.export_excel(out_path, groups=["esm1v"])
 print(f"Wrote merged ESM-1v annotations to {out_path}")
 
 
@@ -334,17 +328,23 @@ print(f"Wrote merged ESM-1v annotations to {out_path}")
 #!/usr/bin/env python3
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.variant_store import VariantStore
 
 # ─── Paths ───────────────────────────────────────────────────────────────────
 variants_xlsx     = "/project/ealexov/compbio/shamrat/250519_energy/00_data/" \
                     "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg.xlsx"
+store_dir         = "/project/ealexov/compbio/shamrat/250519_energy/00_data/variant_store"
 alphamissense_csv = "/project/ealexov/compbio/shamrat/250519_energy/" \
                     "05_pathogenicity/08_alphamissense/AF-O76039-F1-hg38.csv"
 out_dir           = "/project/ealexov/compbio/shamrat/250519_energy/" \
                     "05_pathogenicity/08_alphamissense"
 
 # ─── 1. Load data ─────────────────────────────────────────────────────────────
-variants_df = pd.read_excel(variants_xlsx, engine="openpyxl")
+store       = VariantStore(store_dir)
+variants_df = store.read(groups=[], columns=["mutation"])
 am_df       = pd.read_csv(alphamissense_csv)
 
 # ─── 2. Normalize merge keys ─────────────────────────────────────────────────
@@ -370,8 +370,111 @@ print(f"Pulled AlphaMissense results for {matched}/{total} variants.")
 # Show a few example rows to confirm correct columns
 print(variants_df[['mutation','am_pathogenicity','am_class']].head().to_string(index=False))
 
-# ─── 6. Write out merged Excel ────────────────────────────────────────────────
+# ─── 6. Store the AlphaMissense group and export the merged Excel ─────────────
+store.write_group("alphamissense", variants_df[['mutation', 'am_pathogenicity', 'am_class']])
 base     = os.path.splitext(os.path.basename(variants_xlsx))[0]
 out_path = os.path.join(out_dir, f"{base}_alphamissense.xlsx")
-variants_df.to_excel(out_path, index=False)
+store.export_excel(out_path, groups=["alphamissense"])
 print(f"Wrote {total} rows to {out_path}")
+
+
+
+
+
+
+
+
+
+
+
+
+# === 09 Saturation mutagenesis: every missense change in one position×AA store ===
+#!/usr/bin/env python3
+import sys
+import pandas as pd
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.esm1v import Esm1vModel
+from cdkl5_variants.fetch import uniprot_sequence
+from cdkl5_variants.logits_cache import LogitsCache
+from cdkl5_variants.saturation import SaturationStore, alphamissense_matrices, esm1v_matrix, esm1v_name
+
+# ─── Paths ───────────────────────────────────────────────────────────────────
+variants_xlsx     = "/project/ealexov/compbio/shamrat/250519_energy/00_data/" \
+                    "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg.xlsx"
+alphamissense_csv = "/project/ealexov/compbio/shamrat/250519_energy/" \
+                    "05_pathogenicity/08_alphamissense/AF-O76039-F1-hg38.csv"
+esm_cache_dir     = "/project/ealexov/compbio/shamrat/250519_energy/" \
+                    "05_pathogenicity/03_esm/logits_cache"
+store_dir         = "/project/ealexov/compbio/shamrat/250519_energy/" \
+                    "05_pathogenicity/09_saturation"
+
+# ─── 1. Wild-type sequence ───────────────────────────────────────────────────
+wt_seq = uniprot_sequence("O76039")
+
+# ─── 2. Fill the store (19 × 960 changes per predictor) ──────────────────────
+store = SaturationStore(wt_seq)
+model = Esm1vModel.from_pretrained("esm1v_t33_650M_UR90S_1", device="cpu")
+# wt-marginal Δ (one forward pass), stored as esm1v_wt_marginal_delta: not on the
+# scale of the full-sequence delta_score, so the -6.152 cutoff does not apply to it
+store.add(esm1v_name("wt-marginal"), esm1v_matrix(model, wt_seq, mode="wt-marginal",
+                                                  cache=LogitsCache(esm_cache_dir)))
+for name, (matrix, labels) in alphamissense_matrices(alphamissense_csv, wt_seq).items():
+    store.add(name, matrix, labels)
+store.save(store_dir)
+print("Saturation coverage per predictor:")
+print(store.coverage().to_string())
+
+# ─── 3. Annotating new variants is now a lookup ──────────────────────────────
+variants_df = pd.read_excel(variants_xlsx, engine="openpyxl")
+annotated   = variants_df.merge(SaturationStore.load(store_dir).annotate(variants_df["mutation"].unique()),
+                                on="mutation", how="left")
+print(annotated[["mutation", "esm1v_wt_marginal_delta", "am_pathogenicity", "am_class"]].head().to_string(index=False))
+
+
+
+
+
+
+
+
+
+
+
+
+
+# === 10 Merge every predictor in one pass ===
+# Replaces the separate read/merge/write cycles of 1.5, 2.3c, 3.2 and 08 when all
+# results are already on disk.
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.insert(0, "/project/ealexov/compbio/shamrat/250519_energy")
+from cdkl5_variants.predictors import merge_predictors
+from cdkl5_variants.variant_store import VariantStore
+
+# ─── Paths ───────────────────────────────────────────────────────────────────
+root      = "/project/ealexov/compbio/shamrat/250519_energy"
+store     = VariantStore(os.path.join(root, "00_data", "variant_store"))
+patho_dir = os.path.join(root, "05_pathogenicity")
+sources = {
+    "polyphen2":     os.path.join(patho_dir, "01_polyphen2", "cdkl5_mutation_polyphen2_results.tsv"),
+    "mutpred2":      [os.path.join(patho_dir, "02_mutpred2", f"cdkl5_mutation_mutpred2_part{i}_result.csv")
+                      for i in (1, 2)],
+    "esm1v":         os.path.join(patho_dir, "03_esm", "cdkl5_esm1v_scores.xlsx"),
+    "alphamissense": os.path.join(patho_dir, "08_alphamissense", "AF-O76039-F1-hg38.csv"),
+}
+out_xlsx = os.path.join(patho_dir, "01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af_noddg_all_predictors.xlsx")
+
+# ─── 1. One join for all predictors ──────────────────────────────────────────
+variants_df = store.read(groups=[])
+merged, coverage = merge_predictors(variants_df, sources)
+print("Per-predictor coverage:")
+print(coverage.drop(columns="columns").to_string())
+
+# ─── 2. Each predictor keeps its own column group; one combined export ──────
+for name, cols in coverage["columns"].items():
+    store.write_group(name, merged[["mutation"] + cols])
+store.export_excel(out_xlsx, groups=list(sources))
+print(f"Wrote {len(merged)} rows with {len(sources)} predictors to {out_xlsx}")
@@ -0,0 +1,5 @@
+"""Shared helpers for the CDKL5 variant workflow.
+
+The stage notebooks and scripts (``01_data_cleaning.ipynb`` … ``05_pathogenicity``)
+import from here instead of re-implementing the same loops in every cell.
+"""
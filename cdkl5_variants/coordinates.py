@@ -0,0 +1,277 @@
+"""Genomic → CDKL5 residue projection from a local transcript model.
+
+Most of the 4,600 ``gnomAD.csv`` rows (``X-18507022-C-A``) have no
+``Protein Consequence``, and only annotated rows made it into the pipeline.
+``TranscriptIndex`` holds the coding blocks of one transcript (by default
+ENST00000623535, the O76039 isoform) as sorted NumPy arrays together with the
+CDS sequence, so any SNV can be placed on its codon with ``searchsorted`` and
+translated locally::
+
+    idx = TranscriptIndex.from_ensembl()          # once; mirrored by ``fetch``
+    idx.save("00_data/ENST00000623535.npz")
+    idx = TranscriptIndex.load("00_data/ENST00000623535.npz")
+    idx.translate(pos, ref, alt)                  # residue, codons, K2Q, kind ...
+
+The model comes from the Ensembl REST ``lookup`` (exons, translation start and
+end) and ``sequence?type=cds`` endpoints, or from a GTF (``CDS`` +
+``stop_codon`` features) and a CDS sequence.  After that no VEP service is
+needed.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+TRANSCRIPT = "ENST00000623535"
+
+_BASE = np.full(256, -1, dtype=np.int8)
+for _i, _b in enumerate("ACGT"):
+    _BASE[ord(_b)] = _BASE[ord(_b.lower())] = _i
+_COMPLEMENT = np.array([3, 2, 1, 0], dtype=np.int8)      # A↔T, C↔G on the base codes
+# standard code, codons ordered by 16*b1 + 4*b2 + b3 over A, C, G, T
+CODON_TABLE = np.array(list("KNKNTTTTRSRSIIMIQHQHPPPPRRRRLLLLEDEDAAAAGGGGVVVV*Y*YSSSS*CWCLFLF"))
+_VARIANT_ID_RE = re.compile(r"^(?:chr)?(?P<chrom>[^-:]+)[-:](?P<pos>\d+)[-:](?P<ref>[ACGTN]+)[-:](?P<alt>[ACGTN]+)$")
+
+
+def _codes(bases):
+    """Single bases → 0..3 codes (-1 for anything else)."""
+    s = pd.Series(bases, dtype=object).fillna("").astype(str)
+    one = s.str.len().to_numpy() == 1
+    arr = np.asarray(s.str[:1].to_numpy(dtype="U1")).view(np.uint32)
+    out = np.full(len(s), -1, dtype=np.int8)
+    out[one] = _BASE[np.minimum(arr[one], 255)]
+    return out
+
+
+class TranscriptIndex:
+    def __init__(self, chrom, strand, starts, ends, cds, transcript=TRANSCRIPT):
+        order = np.argsort(starts)
+        self.chrom = str(chrom).removeprefix("chr")
+        self.strand = int(strand)
+        self.starts = np.asarray(starts, dtype=np.int64)[order]        # 1-based, inclusive
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+        self.cds = cds.upper() if isinstance(cds, str) else str(cds)
+        self.transcript = transcript
+        lengths = self.ends - self.starts + 1
+        if lengths.sum() != len(self.cds):
+            raise ValueError(f"coding blocks cover {lengths.sum()} bp but the CDS has {len(self.cds)}")
+        # c. offset (0-based) of the first coding base of each block, in transcription order
+        tx = np.arange(len(lengths)) if self.strand > 0 else np.arange(len(lengths))[::-1]
+        offsets = np.zeros(len(lengths), dtype=np.int64)
+        offsets[tx] = np.concatenate([[0], np.cumsum(lengths[tx])[:-1]])
+        self.offsets = offsets
+        self._cds_codes = _BASE[np.frombuffer(self.cds.encode(), dtype=np.uint8)]
+
+    def __len__(self):
+        return len(self.cds) // 3
+
+    @property
+    def protein(self):
+        c = self._cds_codes[:len(self) * 3].reshape(-1, 3).astype(np.int64)
+        return "".join(CODON_TABLE[c[:, 0] * 16 + c[:, 1] * 4 + c[:, 2]]).rstrip("*")
+
+    # ─── Building ────────────────────────────────────────────────────────────
+    @classmethod
+    def from_ensembl(cls, transcript=TRANSCRIPT, fetcher=None):
+        """From the Ensembl REST lookup (exons, translation) and CDS sequence."""
+        from .fetch import default_fetcher, ensembl_cds_url, ensembl_lookup_url
+
+        fetcher = fetcher or default_fetcher()
+        resp = fetcher.get(ensembl_lookup_url(transcript))
+        resp.raise_for_status()
+        model = resp.json()
+        cds = fetcher.get(ensembl_cds_url(transcript))
+        cds.raise_for_status()
+        tl = model["Translation"]
+        lo, hi = min(tl["start"], tl["end"]), max(tl["start"], tl["end"])
+        blocks = [(max(e["start"], lo), min(e["end"], hi)) for e in model["Exon"]
+                  if e["end"] >= lo and e["start"] <= hi]
+        starts, ends = zip(*blocks)
+        return cls(model["seq_region_name"], model["strand"], starts, ends,
+                   cds.text.strip(), transcript)
+
+    @classmethod
+    def from_gtf(cls, gtf_path, cds, transcript=TRANSCRIPT):
+        """From ``CDS`` and ``stop_codon`` features of one transcript in a (gzipped) GTF."""
+        import gzip
+
+        opener = gzip.open if str(gtf_path).endswith(".gz") else open
+        blocks, chrom, strand = [], None, None
+        with opener(gtf_path, "rt") as fh:
+            for line in fh:
+                if line.startswith("#") or f'"{transcript}' not in line:
+                    continue
+                f = line.rstrip("\n").split("\t")
+                if f[2] in ("CDS", "stop_codon"):
+                    blocks.append((int(f[3]), int(f[4])))
+                    chrom, strand = f[0], 1 if f[6] == "+" else -1
+        if not blocks:
+            raise ValueError(f"no CDS features for {transcript} in {gtf_path}")
+        # stop codons are separate features, usually adjacent to the last CDS block
+        blocks.sort()
+        merged = [list(blocks[0])]
+        for s, e in blocks[1:]:
+            if s <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        starts, ends = zip(*merged)
+        return cls(chrom, strand, starts, ends, cds, transcript)
+
+    # ─── Persistence ─────────────────────────────────────────────────────────
+    def save(self, path):
+        np.savez(path, starts=self.starts, ends=self.ends, cds=np.array(self.cds),
+                 meta=np.array([self.chrom, str(self.strand), self.transcript]))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path)
+        chrom, strand, transcript = z["meta"].tolist()
+        return cls(chrom, int(strand), z["starts"], z["ends"], str(z["cds"]), transcript)
+
+    # ─── Lookup ──────────────────────────────────────────────────────────────
+    def cds_index(self, pos, chrom=None):
+        """0-based c. index of each genomic position (-1 outside the coding blocks)."""
+        pos = np.asarray(pos, dtype=np.int64)
+        block = np.searchsorted(self.starts, pos, side="right") - 1
+        inside = (block >= 0) & (pos <= self.ends[np.maximum(block, 0)])
+        if chrom is not None:
+            chrom = pd.Series(chrom, dtype=object).astype(str).str.removeprefix("chr").to_numpy()
+            inside &= chrom == self.chrom
+        b = np.maximum(block, 0)
+        if self.strand > 0:
+            idx = self.offsets[b] + pos - self.starts[b]
+        else:
+            idx = self.offsets[b] + self.ends[b] - pos
+        return np.where(inside, idx, -1)
+
+    def residue(self, pos, chrom=None):
+        """(1-based residue, codon position 0..2) of each genomic position; 0 / -1 outside."""
+        idx = self.cds_index(pos, chrom)
+        inside = idx >= 0
+        return np.where(inside, idx // 3 + 1, 0), np.where(inside, idx % 3, -1)
+
+    def translate(self, pos, ref, alt, chrom=None):
+        """Protein consequence of SNVs given as genomic position and plus-strand alleles.
+
+        ``kind`` is ``missense``, ``synonymous``, ``nonsense``, ``stop_lost``,
+        ``start_lost``, ``noncoding`` (outside the CDS or not an SNV) or
+        ``ref_mismatch`` (``ref`` differs from the transcript sequence).
+        """
+        idx = self.cds_index(pos, chrom)
+        r, a = _codes(ref), _codes(alt)
+        if self.strand < 0:
+            r = np.where(r >= 0, _COMPLEMENT[r], -1)
+            a = np.where(a >= 0, _COMPLEMENT[a], -1)
+        coding = (idx >= 0) & (r >= 0) & (a >= 0) & (r != a)
+        i = np.where(coding, idx, 0)
+        codon_start = i - i % 3
+        codon_idx = np.minimum(codon_start[:, None] + np.arange(3), len(self.cds) - 1)
+        codon = self._cds_codes[codon_idx].astype(np.int64)
+        coding &= (codon >= 0).all(axis=1)
+        ref_ok = self._cds_codes[i] == r
+        mutated = codon.copy()
+        mutated[np.arange(len(i)), i % 3] = np.where(a >= 0, a, 0)
+        weights = np.array([16, 4, 1])
+        wild = CODON_TABLE[np.clip(codon, 0, 3) @ weights]
+        mutant = CODON_TABLE[np.clip(mutated, 0, 3) @ weights]
+        residue = i // 3 + 1
+
+        kind = np.full(len(i), "noncoding", dtype=object)
+        kind[coding & ~ref_ok] = "ref_mismatch"
+        ok = coding & ref_ok
+        kind[ok & (wild != mutant)] = "missense"
+        kind[ok & (wild == mutant)] = "synonymous"
+        kind[ok & (mutant == "*") & (wild != "*")] = "nonsense"
+        kind[ok & (wild == "*") & (mutant != "*")] = "stop_lost"
+        kind[ok & (residue == 1) & (wild == "M") & (mutant != "M")] = "start_lost"
+
+        # strings only for the coding rows
+        letters = np.array(list("ACGT"), dtype=object)
+        c, m = letters[codon[ok]], letters[mutated[ok]]
+        ref_codon = np.full(len(i), "", dtype=object)
+        alt_codon = np.full(len(i), "", dtype=object)
+        hgvs_c = np.full(len(i), None, dtype=object)
+        change = np.full(len(i), None, dtype=object)
+        ref_codon[ok] = c[:, 0] + c[:, 1] + c[:, 2]
+        alt_codon[ok] = m[:, 0] + m[:, 1] + m[:, 2]
+        number = pd.Series(i[ok] + 1).astype(str).to_numpy(dtype=object)
+        hgvs_c[ok] = "c." + number + letters[r[ok]] + ">" + letters[a[ok]]
+        change[ok] = (wild[ok].astype(object) + pd.Series(residue[ok]).astype(str).to_numpy(dtype=object)
+                      + mutant[ok].astype(object))
+        out = pd.DataFrame({
+            "residue":        np.where(ok, residue, 0),
+            "codon_pos":      np.where(ok, i % 3 + 1, 0),
+            "ref_codon":      ref_codon,
+            "alt_codon":      alt_codon,
+            "wild":           np.where(ok, wild, ""),
+            "mutant":         np.where(ok, mutant, ""),
+            "kind":           kind,
+            "hgvs_c":         hgvs_c,
+            "protein_change": change,
+        })
+        return out
+
+
+def parse_variant_ids(ids):
+    """``X-18507022-C-A`` (gnomAD) or ``chrX:18507022:C:A`` → chrom, pos, ref, alt frame."""
+    parts = pd.Series(ids, dtype="string").str.strip().str.extract(_VARIANT_ID_RE)
+    parts["pos"] = pd.to_numeric(parts["pos"], errors="coerce").fillna(0).astype(np.int64)
+    return parts
+
+
+def project(df, index, id_col="gnomAD ID", chrom_col=None, pos_col=None, ref_col=None, alt_col=None):
+    """``translate`` every row of a gnomAD (``id_col``) or VCF-like (column names) table.
+
+    Returns ``df`` with the ``translate`` columns prefixed ``tx_``.
+    """
+    if pos_col is None:
+        v = parse_variant_ids(df[id_col])
+        chrom, pos, ref, alt = v["chrom"], v["pos"], v["ref"], v["alt"]
+    else:
+        chrom = df[chrom_col] if chrom_col else None
+        pos, ref, alt = df[pos_col], df[ref_col], df[alt_col]
+    res = index.translate(pd.to_numeric(pos, errors="coerce").fillna(0).astype(np.int64),
+                          ref, alt, chrom)
+    res.index = df.index
+    return df.join(res.add_prefix("tx_"))
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Project gnomAD / VCF-style SNVs onto CDKL5 residues")
+    ap.add_argument("table", help="gnomAD.csv (gnomAD ID column) or a table with CHROM/POS/REF/ALT")
+    ap.add_argument("--index", default="00_data/ENST00000623535.npz",
+                    help="saved TranscriptIndex; built from Ensembl (or --gtf/--cds) if missing")
+    ap.add_argument("--transcript", default=TRANSCRIPT)
+    ap.add_argument("--gtf", default=None)
+    ap.add_argument("--cds", default=None, help="CDS sequence (FASTA) to go with --gtf")
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args(argv)
+
+    if os.path.isfile(args.index):
+        index = TranscriptIndex.load(args.index)
+    else:
+        if args.gtf:
+            from .fetch import fasta_sequence
+            with open(args.cds) as fh:
+                index = TranscriptIndex.from_gtf(args.gtf, fasta_sequence(fh.read()), args.transcript)
+        else:
+            index = TranscriptIndex.from_ensembl(args.transcript)
+        index.save(args.index)
+
+    df = pd.read_csv(args.table) if args.table.endswith(".csv") else pd.read_excel(args.table)
+    if "gnomAD ID" in df.columns:
+        out = project(df, index)
+    else:
+        out = project(df, index, chrom_col="CHROM", pos_col="POS", ref_col="REF", alt_col="ALT")
+    print(out["tx_kind"].value_counts().to_string())
+    out.to_excel(args.out, index=False) if args.out.endswith(".xlsx") else out.to_csv(args.out, index=False)
+    print(f"✅ {len(out)} rows → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""ΔΔG_Fmax / ΔΔG_Bmax aggregates shared by all reclassification code.
+
+``250630_relcassification.py`` (sections A–D) and
+``05_variant_reclass_ddG_FoldingBinding.ipynb`` used to re-read the folding and
+binding workbooks for every figure and rebuild per-variant dicts with
+``iterrows``.  Here each workbook is reduced once to a |ΔΔG| array and the
+aggregates are NumPy reductions over it:
+
+* folding:  ``(variant, method)`` from the ``*_str`` columns, FoldX excluded;
+  ``ddG_Fmax`` is the max over methods.
+* binding:  a ``DdgTensor`` (variant, method, partner complex) built from the
+  ``ddg_<acc>_<partner>_<motif>_str_<method>`` columns; ``avg_<partner>`` is the
+  mean |ΔΔG| over that partner's complexes and methods and ``ddG_Bmax`` the max
+  over partners.
+
+Results are memoized per input-file fingerprint (path, mtime, size), so the
+four figures come from one computation and editing the workbook invalidates it.
+"""
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from .ddg_tensor import COMPLEX_RE, DdgTensor
+
+CLASS_COL = "Germline classification"
+KINASE_DOMAIN = (1, 302)
+EXCLUDED_METHODS = ("foldx",)
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+@functools.lru_cache(maxsize=16)
+def _read_excel(fingerprint, sheet_name):
+    return pd.read_excel(fingerprint[0], sheet_name=sheet_name)
+
+
+def read_table(path, sheet_name=0):
+    """Workbook contents, parsed at most once per file version."""
+    return _read_excel(file_fingerprint(path), sheet_name)
+
+
+def _excluded(name, exclude):
+    return any(x in name.lower() for x in exclude)
+
+
+def _restrict(df, positions):
+    if positions is None:
+        return df
+    return df[df["position"].between(*positions)]
+
+
+def _nanmax(values, axis):
+    """``np.nanmax`` that returns NaN for all-NaN slices instead of warning."""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    out = filled.max(axis=axis)
+    return np.where(np.isneginf(out), np.nan, out)
+
+
+# ─── Folding ─────────────────────────────────────────────────────────────────
+def folding_columns(columns, exclude=EXCLUDED_METHODS):
+    return [c for c in columns if c.endswith("_str") and not _excluded(c, exclude)]
+
+
+@functools.lru_cache(maxsize=16)
+def _folding(fingerprint, sheet_name, positions, exclude):
+    df = _restrict(_read_excel(fingerprint, sheet_name), positions)
+    cols = folding_columns(df.columns, exclude)
+    values = np.abs(df[cols].to_numpy(dtype=np.float64))    # (variant, method)
+    out = df[["mutation", "position", CLASS_COL]].reset_index(drop=True)
+    methods = [c[:-len("_str")] for c in cols]
+    out = pd.concat([out, pd.DataFrame(values, columns=methods)], axis=1)
+    out["ddG_Fmax"] = _nanmax(values, axis=1)
+    return out, tuple(methods)
+
+
+def folding_ddg(path, positions=KINASE_DOMAIN, sheet_name=0, exclude=EXCLUDED_METHODS):
+    """Per-method |ΔΔG| and ``ddG_Fmax`` per variant.
+
+    Returns ``(frame, methods)``; ``frame`` has ``mutation``, ``position``,
+    ``Germline classification``, one column per method and ``ddG_Fmax``.
+    """
+    out, methods = _folding(file_fingerprint(path), sheet_name, positions, tuple(exclude))
+    return out.copy(), list(methods)
+
+
+# ─── Binding ─────────────────────────────────────────────────────────────────
+def _select_complexes(tensor, partners):
+    """Complexes of ``partners`` (gene list or ``{gene: motif}``), grouped in partner order."""
+    if partners is None:
+        order = list(dict.fromkeys(tensor.genes))
+    else:
+        order = [p for p in partners if p in set(tensor.genes)]
+    keep = []
+    for gene in order:
+        for i, (g, complex_name) in enumerate(zip(tensor.genes, tensor.partners)):
+            if g != gene:
+                continue
+            if isinstance(partners, dict) and COMPLEX_RE.match(complex_name).group("motif") != partners[gene]:
+                continue
+            keep.append(i)
+    return tensor.select(partners=keep), [g for g in order if g in {tensor.genes[i] for i in keep}]
+
+
+@functools.lru_cache(maxsize=16)
+def _binding_tensor(fingerprint, sheet_name, exclude):
+    df = _read_excel(fingerprint, sheet_name)
+    return DdgTensor.from_wide(df, info_cols=("position", CLASS_COL), exclude=exclude,
+                               source=[*fingerprint, sheet_name])
+
+
+def binding_tensor(path, positions=None, sheet_name=0, exclude=EXCLUDED_METHODS, store=None):
+    """The binding workbook as a (variant, method, partner) ``DdgTensor``.
+
+    With ``store`` (a directory) the full tensor is saved there and later
+    opened memory-mapped, as long as the workbook and sheet have not changed since.
+    """
+    fingerprint = file_fingerprint(path)
+    tensor = None
+    if store is not None and os.path.isfile(os.path.join(store, "meta.json")):
+        cached = DdgTensor.load(store)
+        if cached.source == [*fingerprint, sheet_name]:
+            tensor = cached
+    if tensor is None:
+        tensor = _binding_tensor(fingerprint, sheet_name, ())
+        if store is not None:
+            tensor.save(store)
+    methods = [m for m in tensor.methods if not _excluded(m, exclude)]
+    if positions is not None:
+        pos = tensor.info["position"].to_numpy()
+        tensor = tensor.select(variants=(pos >= positions[0]) & (pos <= positions[1]))
+    return tensor.select(methods=methods)
+
+
+@functools.lru_cache(maxsize=16)
+def _binding(fingerprint, sheet_name, positions, partners, exclude):
+    if partners and isinstance(partners[0], tuple):
+        partners = dict(partners)
+    tensor = _binding_tensor(fingerprint, sheet_name, exclude)
+    if positions is not None:
+        pos = tensor.info["position"].to_numpy()
+        tensor = tensor.select(variants=(pos >= positions[0]) & (pos <= positions[1]))
+    tensor, order = _select_complexes(tensor, partners)
+    methods = tensor.methods
+    per_method, _ = tensor.by_gene()                                      # (variant, partner, method)
+    per_method = per_method.transpose(0, 2, 1)
+    avg, _ = tensor.partner_average()                                     # (variant, partner)
+
+    base = pd.DataFrame({"mutation": tensor.variants, "position": tensor.info["position"],
+                         CLASS_COL: tensor.info[CLASS_COL]})
+    summary = pd.concat([base, pd.DataFrame(avg, columns=[f"avg_{p}" for p in order])], axis=1)
+    summary["ddG_Bmax"] = _nanmax(avg, axis=1)
+
+    n_var = len(base)
+    long = pd.DataFrame({
+        "mutation": np.repeat(base["mutation"].to_numpy(), len(order) * len(methods)),
+        "position": np.repeat(base["position"].to_numpy(), len(order) * len(methods)),
+        CLASS_COL:  np.repeat(base[CLASS_COL].to_numpy(), len(order) * len(methods)),
+        "partner":  np.tile(np.repeat(order, len(methods)), n_var),
+        "method":   np.tile(methods, n_var * len(order)),
+        "abs_ddg":  per_method.reshape(-1),
+    })
+    return summary, long, tuple(order), tuple(methods)
+
+
+def binding_ddg(path, partners=None, positions=KINASE_DOMAIN, sheet_name=0,
+                exclude=EXCLUDED_METHODS):
+    """Partner averages, ``ddG_Bmax`` and per-method |ΔΔG| per variant.
+
+    ``partners`` is a list of partner names (every motif of that partner is
+    used) or a ``{partner: motif}`` dict selecting one complex per partner;
+    ``None`` keeps every partner in the workbook.
+
+    Returns ``(summary, per_method, partners, methods)``: ``summary`` is wide
+    (``avg_<partner>`` columns and ``ddG_Bmax``), ``per_method`` is long with
+    ``partner``, ``method`` and ``abs_ddg`` columns.
+    """
+    if isinstance(partners, dict):
+        key = tuple(partners.items())
+    else:
+        key = None if partners is None else tuple(partners)
+    summary, long, order, methods = _binding(file_fingerprint(path), sheet_name, positions,
+                                             key, tuple(exclude))
+    return summary.copy(), long.copy(), list(order), list(methods)
+
+
+# ─── Thresholds ──────────────────────────────────────────────────────────────
+def midpoint_threshold(df, col, class_col=CLASS_COL):
+    """``(max Benign + min Pathogenic) / 2`` for ``col``."""
+    ben_max = df.loc[df[class_col] == "Benign", col].max()
+    pat_min = df.loc[df[class_col] == "Pathogenic", col].min()
+    return (ben_max + pat_min) / 2
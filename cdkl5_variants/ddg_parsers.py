@@ -0,0 +1,407 @@
+"""Streaming parsers for every folding and binding ΔΔG tool, merged into one long table.
+
+``02_folding.ipynb`` and ``04_binding.ipynb`` had one merge cell per tool, and
+each one re-read and re-wrote the growing Excel file.  Here every tool folder
+(``02_folding/01_saafecseq`` … ``08_ddmut_str``, ``04_binding/01_saambeseq`` …
+``10_isee``) has a registered parser that streams its result files as typed
+records::
+
+    DdgRecord(mutation="F13S", method="inps_seq", partner="", ddg=-0.52)
+
+``partner`` is ``""`` for folding tools and the complex name
+(``P48436_SOX9_197-202``) for binding tools.  ``build_store`` runs all parsers
+in one pass into a single long table (``mutation``, ``method``, ``partner``,
+``ddg``, ``source``), keeping the first value of each (mutation, method,
+partner) key, and writes it as Parquet.  Result files split by position range
+(``inps_seq_1_227.json`` + ``inps_seq_240_895.json``) are detected from their
+``_<start>_<end>`` suffix and read as one source in position order.
+``wide_table`` turns the store back into the workbook's column names
+(``ddG_saafecseq_seq``, ``ddg_inps_seq``, ``ddg_P48436_SOX9_197-202_str_saambe3d``).
+
+Result files are matched by name only, so the patterns stay clear of the
+mutation lists and merged workbooks kept in the same folders: folding results
+start with the method name (``imutant2_seq*.csv``) and binding results with the
+complex name (``P48436_SOX9_197-202*.csv``).
+
+Tools without a dedicated format (I-Mutant2, SAAMBE-SEQ, MutaBind2,
+BeAtMuSiC, DDMut-PPI, BindProfX, iSEE) go through the generic table parsers,
+which accept CSV/TSV/whitespace/xlsx tables with any of the usual mutation and ΔΔG
+column names and raises ``ValueError`` for a file it cannot map.
+"""
+import csv
+import glob
+import itertools
+import json
+import math
+import os
+import re
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+from .esm1v import AMINO_ACIDS
+
+FOLDING_DIR = "02_folding"
+BINDING_DIR = "04_binding"
+STORE_COLUMNS = ["mutation", "method", "partner", "ddg", "source"]
+
+_MUTATION_RE = re.compile(r"^([A-Z])[A-Z]?(\d+)([A-Z])$")   # optional FoldX chain letter
+_CHUNK_RE = re.compile(r"^(?P<stem>.+)_(?P<start>\d+)_(?P<end>\d+)$")
+_PARTNER_SUFFIX_RE = re.compile(r"(_cluster_\d+_model_\d+.*|_\d{9,}(\.\d+)?|_ddg|_results?)$")
+COMPLEX_GLOB = "*_*_[0-9]*-[0-9]*"      # <accession>_<gene>_<start>-<end>, e.g. P48436_SOX9_197-202
+
+MUTATION_ALIASES = ("mutation", "mutations", "variant", "substitution", "mutation_cleaned")
+TRIPLE_ALIASES = (("wild", "position", "mutant"), ("wild_res", "res_pos", "mut_res"),
+                  ("aa_from", "position", "aa_to"), ("wild_type", "position", "variant"),
+                  ("wt", "pos", "mt"))
+DDG_ALIASES = ("ddg", "ddg(kcal/mol)", "pred_ddg", "t_ddg_seq", "t_ddg[3d]", "prediction",
+               "single_predictions", "predicted_ddg", "ddg_pred", "binding_ddg")
+PARTNER_ALIASES = ("partner", "pdb_file", "pdb")
+
+
+class DdgRecord(NamedTuple):
+    mutation: Optional[str]     # None when the row's mutation could not be parsed
+    method: str
+    partner: str
+    ddg: float
+
+
+class Tool(NamedTuple):
+    method: str
+    stage: str                  # FOLDING_DIR or BINDING_DIR
+    folder: str
+    patterns: tuple
+    parser: object
+    basis: str = "str"          # binding tools: sequence- or structure-based
+    column: Optional[str] = None    # folding tools: workbook column when not ``ddg_<method>``
+
+
+TOOLS = {}
+
+
+def register_tool(method, stage, folder, patterns, basis="str", column=None):
+    """Register ``func(path, method, partner)`` as the parser for ``method``; stackable."""
+    def wrap(func):
+        TOOLS[method] = Tool(method, stage, folder, tuple(patterns), func, basis, column)
+        return func
+    return wrap
+
+
+def _complex_files(*extensions):
+    """Patterns for binding result files named after their complex."""
+    return [COMPLEX_GLOB + ext for ext in extensions]
+
+
+# ─── Field normalisation ─────────────────────────────────────────────────────
+def normalize_mutation(text):
+    """``"F13S"``, ``"A F13S"`` (DDMut) and ``"FA13S"`` (FoldX) → ``"F13S"``; None otherwise."""
+    if text is None:
+        return None
+    token = str(text).strip().upper().split()
+    m = _MUTATION_RE.match(token[-1]) if token else None
+    if not m or m.group(1) not in AMINO_ACIDS or m.group(3) not in AMINO_ACIDS:
+        return None
+    return f"{m.group(1)}{int(m.group(2))}{m.group(3)}"
+
+
+def _triple(wild, position, mutant):
+    try:
+        pos = int(float(position))
+    except (TypeError, ValueError):
+        return None
+    return normalize_mutation(f"{str(wild).strip()}{pos}{str(mutant).strip()}")
+
+
+def _float(value):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return x if math.isfinite(x) else math.nan
+
+
+def partner_from_path(path):
+    """``P48436_SOX9_197-202`` from result names such as
+    ``P48436_SOX9_197-202_1748449495.65.txt`` or ``..._cluster_1_model_1_ddg.csv``."""
+    stem = os.path.splitext(os.path.basename(str(path)))[0]
+    while True:
+        shorter = _PARTNER_SUFFIX_RE.sub("", stem)
+        if shorter == stem or not shorter:
+            return stem
+        stem = shorter
+
+
+def _partner_value(value):
+    value = str(value).strip()
+    return partner_from_path(value) if value.lower().endswith(".pdb") else value
+
+
+# ─── Row streams ─────────────────────────────────────────────────────────────
+def _text_rows(path, comment=None):
+    """Dict rows of a delimited text table; the delimiter is taken from the header line.
+
+    With ``comment`` the header may itself be a comment line (DDGun writes
+    ``#SEQFILE\\tVARIANT...``): the last comment line before the data is used.
+    """
+    header, names, sep = None, None, None
+    with open(path, newline="") as fh:
+        for line in fh:
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if comment and line.startswith(comment):
+                if names is None:
+                    header = line[len(comment):]
+                continue
+            if names is None:
+                if header is None:
+                    header, line = line, None
+                sep = "\t" if "\t" in header else "," if "," in header else None
+                names = [h.strip() for h in (header.split(sep) if sep else header.split())]
+                if line is None:
+                    continue
+            if sep == ",":
+                values = next(csv.reader([line]))
+            else:
+                values = line.split(sep) if sep else line.split()
+            yield dict(zip(names, (v.strip() for v in values)))
+
+
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        names = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        for values in rows:
+            yield dict(zip(names, values))
+    finally:
+        wb.close()
+
+
+def table_rows(path, comment=None):
+    if str(path).endswith((".xlsx", ".xlsm")):
+        return _xlsx_rows(path)
+    return _text_rows(path, comment=comment)
+
+
+def _pick(names, aliases):
+    lower = {n.lower(): n for n in names}
+    for alias in aliases:
+        if alias in lower:
+            return lower[alias]
+    return None
+
+
+def _records(rows, path, method, partner, ddg_aliases=DDG_ALIASES):
+    """Map a dict-row stream onto ``DdgRecord`` using the column aliases."""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    names = list(first)
+    ddg_col = _pick(names, ddg_aliases)
+    mut_col = _pick(names, MUTATION_ALIASES)
+    triple = next((t for t in ([_pick(names, (a,)) for a in tri] for tri in TRIPLE_ALIASES)
+                   if all(t)), None)
+    if ddg_col is None or (mut_col is None and triple is None):
+        raise ValueError(f"{path}: no mutation/ΔΔG columns among {names}")
+    partner_col = _pick(names, PARTNER_ALIASES) if partner is not None else None
+
+    for row in itertools.chain([first], rows):
+        if triple is not None:
+            mutation = _triple(*(row.get(c) for c in triple))
+        else:
+            mutation = normalize_mutation(row.get(mut_col))
+        p = partner
+        if partner_col is not None and row.get(partner_col) not in (None, ""):
+            p = _partner_value(row[partner_col])
+        yield DdgRecord(mutation, method, p or "", _float(row.get(ddg_col)))
+
+
+# ─── Parsers: folding ────────────────────────────────────────────────────────
+@register_tool("inps_seq", FOLDING_DIR, "03_inps_seq", ["inps_seq*.json"])
+@register_tool("inps_str", FOLDING_DIR, "04_inps_str", ["inps_str*.json"])
+@register_tool("ddgemb_seq", FOLDING_DIR, "06_ddgemb_seq", ["ddgemb_seq*.json"])
+def parse_biocomp_json(path, method, partner=None):
+    """INPS-MD / DDGEmb JSON (``variants`` or ``single_variants`` list)."""
+    with open(path) as fh:
+        data = json.load(fh)
+    variants = data.get("variants", data.get("single_variants", []))
+    for v in variants:
+        yield DdgRecord(_triple(v.get("wild_type"), v.get("position"), v.get("variant")),
+                        method, "", _float(v.get("ddg")))
+
+
+@register_tool("saafecseq_seq", FOLDING_DIR, "01_saafecseq", ["*.out"], column="ddG_saafecseq_seq")
+@register_tool("mcsm_str", FOLDING_DIR, "07_mcsm_str", ["mcsm_str*.txt"])
+@register_tool("ddmut_str", FOLDING_DIR, "08_ddmut_str", ["result_ddmut*.xlsx", "result_ddmut*.csv"])
+@register_tool("imutant2_seq", FOLDING_DIR, "02_imutant",
+               ["imutant2_seq*.csv", "imutant2_seq*.txt", "imutant2_seq*.xlsx"])
+@register_tool("imutant2_str", FOLDING_DIR, "02_imutant",
+               ["imutant2_str*.csv", "imutant2_str*.txt", "imutant2_str*.xlsx"])
+def parse_table(path, method, partner=None):
+    """Any CSV/TSV/whitespace/xlsx result table with recognisable columns.
+
+    Covers the SAAFEC-SEQ ``.out`` (``Wild Position Mutant ddG``), mCSM
+    (``WILD_RES RES_POS MUT_RES PRED_DDG``), DDMut (``aa_from position aa_to
+    prediction``) and similar layouts.  ``partner`` None marks a folding tool;
+    otherwise a ``partner``/``PDB_FILE`` column overrides it per row.
+    """
+    yield from _records(table_rows(path), path, method, partner)
+
+
+@register_tool("ddgun_seq", FOLDING_DIR, "05_ddgun_seq_str", ["ddgun_seq*.txt"])
+@register_tool("ddgun_str", FOLDING_DIR, "05_ddgun_seq_str", ["ddgun_str*.txt"])
+def parse_ddgun(path, method, partner=None):
+    """DDGun seq/3D output: ``#``-commented header, total ΔΔG in ``T_DDG_SEQ``/``T_DDG[3D]``."""
+    yield from _records(table_rows(path, comment="#"), path, method, partner,
+                        ddg_aliases=("t_ddg_seq", "t_ddg[3d]", "ddg"))
+
+
+# ─── Parsers: binding ────────────────────────────────────────────────────────
+@register_tool("saambe3d", BINDING_DIR, "02_saambe3d",
+               ["../outputs/saambe_3d/saambe3d_results.csv",
+                *("../outputs/saambe_3d/" + p for p in _complex_files(".out"))])
+@register_tool("mcsmppi", BINDING_DIR, "05_mcsmppi", ["results_renamed/*.txt"])
+@register_tool("saambeseq", BINDING_DIR, "01_saambeseq", _complex_files(".csv", ".txt", ".xlsx"),
+               basis="seq")
+@register_tool("mutabind2", BINDING_DIR, "04_mutabind2", _complex_files(".csv", ".txt", ".xlsx"))
+@register_tool("beatmusic", BINDING_DIR, "06_beatmusic", _complex_files(".csv", ".txt", ".xlsx"))
+@register_tool("ddmutppi", BINDING_DIR, "07_ddmutppi", _complex_files(".csv", ".txt", ".xlsx"))
+@register_tool("bindprofx", BINDING_DIR, "08_bindprofx", _complex_files(".csv", ".txt", ".xlsx"))
+@register_tool("isee", BINDING_DIR, "10_isee", _complex_files(".csv", ".txt", ".xlsx"))
+def parse_binding_table(path, method, partner=None):
+    """Binding result table; the partner comes from the file name unless a column names it."""
+    yield from _records(table_rows(path), path, method, partner or partner_from_path(path))
+
+
+@register_tool("foldx", BINDING_DIR, "03_foldx", ["07_binding_ddg_all/*_ddg.csv"])
+def parse_foldx(path, method, partner=None):
+    """``mutation,ddG`` CSV from the AnalyseComplex extraction (``FA13S`` → ``F13S``)."""
+    yield from _records(table_rows(path), path, method, partner or partner_from_path(path))
+
+
+# ─── Discovery ───────────────────────────────────────────────────────────────
+def chunk_groups(paths):
+    """Group result files split by position range; [[paths in start order], ...].
+
+    ``inps_seq_1_227.json`` and ``inps_seq_240_895.json`` form one group; files
+    without a ``_<start>_<end>`` suffix are groups of one.
+    """
+    groups = {}
+    for path in sorted(set(paths)):
+        stem, ext = os.path.splitext(path)
+        m = _CHUNK_RE.match(stem)
+        key, start = ((m.group("stem"), ext), int(m.group("start"))) if m else ((stem, ext), 0)
+        groups.setdefault(key, []).append((start, path))
+    return [[p for _, p in sorted(parts)] for _, parts in sorted(groups.items())]
+
+
+def tool_sources(root, tools=None):
+    """[(tool, [chunk paths])] for every registered tool with result files under ``root``."""
+    out = []
+    for method in (tools or TOOLS):
+        tool = TOOLS[method]
+        folder = os.path.join(root, tool.stage, tool.folder)
+        paths = [p for pattern in tool.patterns
+                 for p in map(os.path.normpath, glob.glob(os.path.join(folder, pattern)))
+                 if os.path.isfile(p)]
+        out.extend((tool, group) for group in chunk_groups(paths))
+    return out
+
+
+def iter_records(tool, paths):
+    """Records of one (possibly chunked) source, chunk after chunk."""
+    partner = None if tool.stage == FOLDING_DIR else ""
+    for path in paths:
+        for rec in tool.parser(path, tool.method, partner):
+            yield rec, path
+
+
+# ─── Store ───────────────────────────────────────────────────────────────────
+def build_store(sources):
+    """Merge ``[(tool, paths)]`` into one long frame in a single pass.
+
+    Returns ``(store, report)``; ``report`` has per-method counts of files,
+    records kept, unparseable rows (bad mutation or ΔΔG) and duplicate keys.
+    """
+    seen = set()
+    cols = {c: [] for c in STORE_COLUMNS}
+    report = {}
+    for tool, paths in sources:
+        r = report.setdefault(tool.method, {"method": tool.method, "stage": tool.stage,
+                                            "files": 0, "records": 0, "invalid": 0,
+                                            "duplicates": 0})
+        r["files"] += len(paths)
+        for rec, path in iter_records(tool, paths):
+            if rec.mutation is None or math.isnan(rec.ddg):
+                r["invalid"] += 1
+                continue
+            key = (rec.mutation, rec.method, rec.partner)
+            if key in seen:
+                r["duplicates"] += 1
+                continue
+            seen.add(key)
+            r["records"] += 1
+            for col, value in zip(STORE_COLUMNS, (*rec, path)):
+                cols[col].append(value)
+    store = pd.DataFrame({
+        "mutation": pd.Categorical(cols["mutation"]),
+        "method":   pd.Categorical(cols["method"]),
+        "partner":  pd.Categorical(cols["partner"]),
+        "ddg":      pd.Series(cols["ddg"], dtype="float64"),
+        "source":   pd.Categorical(cols["source"]),
+    })
+    columns = ["method", "stage", "files", "records", "invalid", "duplicates"]
+    return store, pd.DataFrame(list(report.values()), columns=columns).set_index("method")
+
+
+def write_store(store, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    store.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def read_store(path):
+    return pd.read_parquet(path)
+
+
+def wide_table(store):
+    """One column per (method, partner), named as in the workbooks, indexed by ``mutation``.
+
+    Folding methods become ``ddg_<method>`` unless registered with their own
+    ``column`` (``ddG_saafecseq_seq``); binding methods
+    ``ddg_<partner>_<basis>_<method>`` (``ddg_P48436_SOX9_197-202_str_saambe3d``).
+    """
+    method = store["method"].astype(str)
+    partner = store["partner"].astype(str)
+    basis = method.map(lambda m: TOOLS[m].basis if m in TOOLS else "str")
+    folding = method.map(lambda m: (TOOLS[m].column if m in TOOLS else None) or f"ddg_{m}")
+    name = ("ddg_" + partner + "_" + basis + "_" + method).where(partner != "", folding)
+    wide = store.assign(column=name).pivot_table(index="mutation", columns="column",
+                                                 values="ddg", aggfunc="first", observed=True)
+    wide.columns.name = None
+    return wide
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Parse every ΔΔG tool output into one long table")
+    ap.add_argument("--root", default=".", help="project root holding 02_folding/ and 04_binding/")
+    ap.add_argument("--out", default="00_data/ddg_long.parquet")
+    ap.add_argument("--tools", nargs="*", default=None, help="subset of methods")
+    args = ap.parse_args(argv)
+
+    store, report = build_store(tool_sources(args.root, args.tools))
+    write_store(store, args.out)
+    print(report.to_string())
+    print(f"✅ {len(store)} ΔΔG values from {report['files'].sum()} files → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
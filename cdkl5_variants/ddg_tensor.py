@@ -0,0 +1,219 @@
+"""Dense (variant, method, partner) ΔΔG array with labelled axes.
+
+The binding workbooks store one column per complex and method
+(``ddg_P48436_SOX9_197-202_str_saambe3d``), so every figure had to recover the
+partner and method from column names.  ``DdgTensor`` holds the same numbers as
+one float32 array of shape ``(variant, method, partner)`` (NaN = not computed)
+and indexes it by label::
+
+    t = DdgTensor.from_wide(df)
+    t[:, "saambe3d", "SOX9"]           # (variant,) SAAMBE-3D ΔΔG for the SOX9 complex
+    t["F13S"]                          # (method, partner)
+    t[:, ["foldx", "isee"], :]         # (variant, 2, partner)
+
+A partner label is the complex name (``P48436_SOX9_197-202``) or the partner
+gene (``SOX9``); a gene with several motif complexes selects all of them.
+Per-partner averages and maxima are reductions over the array.
+
+On disk a tensor is a directory with ``values.npy`` (opened memory-mapped) and
+``meta.json`` holding the axis labels, per-variant info columns and the
+fingerprint of the workbook it was built from.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+COMPLEX_RE = re.compile(r"^(?P<accession>[^_]+)_(?P<partner>.+)_(?P<motif>\d+-\d+)$")
+_WIDE_RE = re.compile(r"^ddg_(?P<complex>[^_]+_.+_\d+-\d+)_str_(?P<method>.+)$")
+
+
+def _gene(complex_name):
+    m = COMPLEX_RE.match(complex_name)
+    return m.group("partner") if m else complex_name
+
+
+class DdgTensor:
+    def __init__(self, values, variants, methods, partners, info=None, source=None):
+        self.values = values                    # (variant, method, partner) float32
+        self.variants = list(variants)
+        self.methods = list(methods)
+        self.partners = list(partners)          # complex names
+        self.genes = [_gene(p) for p in self.partners]
+        self.info = pd.DataFrame(info if info is not None else {}).reset_index(drop=True)
+        self.source = source
+        shape = (len(self.variants), len(self.methods), len(self.partners))
+        if tuple(values.shape) != shape:
+            raise ValueError(f"values have shape {values.shape}, labels give {shape}")
+        self._lookup = [{v: i for i, v in enumerate(self.variants)},
+                        {m: i for i, m in enumerate(self.methods)}, None]
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    # ─── Building ────────────────────────────────────────────────────────────
+    @classmethod
+    def from_wide(cls, df, info_cols=(), exclude=(), source=None):
+        """From a workbook with ``ddg_<acc>_<partner>_<motif>_str_<method>`` columns.
+
+        ``exclude`` drops methods whose name contains any of the given strings.
+        """
+        cols = []
+        for c in df.columns:
+            m = _WIDE_RE.match(str(c))
+            if m and not any(x in m.group("method").lower() for x in exclude):
+                cols.append((c, m.group("complex"), m.group("method")))
+        partners = list(dict.fromkeys(p for _, p, _ in cols))
+        methods = sorted({m for _, _, m in cols})
+        values = np.full((len(df), len(methods), len(partners)), np.nan, dtype=np.float32)
+        p_idx = {p: i for i, p in enumerate(partners)}
+        m_idx = {m: i for i, m in enumerate(methods)}
+        if cols:
+            data = df[[c for c, _, _ in cols]].apply(pd.to_numeric, errors="coerce")
+            values[:, [m_idx[m] for _, _, m in cols], [p_idx[p] for _, p, _ in cols]] = \
+                data.to_numpy(dtype=np.float32)
+        info = df[[c for c in info_cols if c in df.columns]]
+        return cls(values, df["mutation"].astype(str), methods, partners, info, source)
+
+    @classmethod
+    def from_long(cls, store, variants=None):
+        """From a ``ddg_parsers`` long store (binding rows, i.e. non-empty ``partner``)."""
+        store = store[store["partner"].astype(str) != ""]
+        mutation = store["mutation"].astype(str)
+        variants = list(dict.fromkeys(mutation)) if variants is None else list(variants)
+        methods = sorted(set(store["method"].astype(str)))
+        partners = list(dict.fromkeys(store["partner"].astype(str)))
+        v = pd.Index(variants).get_indexer(mutation)
+        m = pd.Index(methods).get_indexer(store["method"].astype(str))
+        p = pd.Index(partners).get_indexer(store["partner"].astype(str))
+        keep = v >= 0
+        values = np.full((len(variants), len(methods), len(partners)), np.nan, dtype=np.float32)
+        values[v[keep], m[keep], p[keep]] = store["ddg"].to_numpy(dtype=np.float32)[keep]
+        return cls(values, variants, methods, partners)
+
+    # ─── Persistence ─────────────────────────────────────────────────────────
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, "values.tmp.npy")
+        np.save(tmp, np.asarray(self.values, dtype=np.float32))
+        os.replace(tmp, os.path.join(path, "values.npy"))
+        meta = {"variants": self.variants, "methods": self.methods, "partners": self.partners,
+                "info": {c: self.info[c].tolist() for c in self.info.columns},
+                "source": self.source}
+        with open(os.path.join(path, "meta.json"), "w") as fh:
+            json.dump(meta, fh, indent=1, default=str)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "meta.json")) as fh:
+            meta = json.load(fh)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+        return cls(values, meta["variants"], meta["methods"], meta["partners"],
+                   meta["info"], meta.get("source"))
+
+    # ─── Indexing ────────────────────────────────────────────────────────────
+    def _partner_index(self, label):
+        if label in self.partners:
+            return self.partners.index(label)
+        hits = [i for i, g in enumerate(self.genes) if g == label]
+        if not hits:
+            raise KeyError(f"unknown partner {label!r}")
+        return hits[0] if len(hits) == 1 else hits
+
+    def _index(self, axis, key):
+        """Label(s) on one axis → something NumPy can index with."""
+        if isinstance(key, slice):
+            if all(k is None or isinstance(k, (int, np.integer)) for k in (key.start, key.stop)):
+                return key
+            # label bounds are inclusive, as in ``DataFrame.loc``
+            lo = self._index(axis, key.start) if key.start is not None else None
+            hi = self._index(axis, key.stop) + 1 if key.stop is not None else None
+            return slice(lo, hi, key.step)
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        if isinstance(key, np.ndarray) and key.dtype == bool:
+            return key
+        if isinstance(key, (list, tuple, np.ndarray, pd.Index, pd.Series)):
+            out = []
+            for k in key:
+                i = self._index(axis, k)
+                out.extend(i if isinstance(i, list) else [i])
+            return out
+        if axis == 2:
+            return self._partner_index(key)
+        try:
+            return self._lookup[axis][key]
+        except KeyError:
+            raise KeyError(f"unknown {('variant', 'method')[axis]} {key!r}") from None
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (slice(None),) * (3 - len(key))
+        idx = [self._index(axis, k) for axis, k in enumerate(key)]
+        # apply one axis at a time so lists on several axes select a sub-block
+        out = self.values
+        for axis in (2, 1, 0):
+            out = out[(slice(None),) * axis + (idx[axis],)]
+        return np.asarray(out)
+
+    def select(self, variants=None, methods=None, partners=None):
+        """Labelled sub-tensor (``variants`` may also be a boolean mask)."""
+        def labels(axis, key, names):
+            i = self._index(axis, key) if key is not None else slice(None)
+            i = [i] if isinstance(i, int) else i
+            return i, list(np.asarray(names, dtype=object)[i])
+
+        vi, variants = labels(0, variants, self.variants)
+        mi, methods = labels(1, methods, self.methods)
+        pi, partners = labels(2, partners, self.partners)
+        values = np.asarray(self.values)[vi][:, mi][:, :, pi]
+        info = self.info.iloc[vi] if len(self.info.columns) else None
+        return DdgTensor(values, variants, methods, partners, info, self.source)
+
+    def frame(self, method, partner):
+        """One (method, partner) slice as a Series indexed by variant."""
+        return pd.Series(self[:, method, partner], index=self.variants, name=f"{partner}_{method}")
+
+    # ─── Reductions ──────────────────────────────────────────────────────────
+    def gene_groups(self):
+        """{gene: [partner indices]} in first-seen order."""
+        groups = {}
+        for i, g in enumerate(self.genes):
+            groups.setdefault(g, []).append(i)
+        return groups
+
+    def by_gene(self, absolute=True):
+        """(variant, method, gene) array averaging the motif complexes of each gene."""
+        vals = np.asarray(self.values, dtype=np.float64)
+        vals = np.abs(vals) if absolute else vals
+        groups = self.gene_groups()
+        out = np.full(vals.shape[:2] + (len(groups),), np.nan)
+        for j, idx in enumerate(groups.values()):
+            block = vals[:, :, idx]
+            n = (~np.isnan(block)).sum(axis=2)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[:, :, j] = np.where(n > 0, np.nansum(block, axis=2) / n, np.nan)
+        return out, list(groups)
+
+    def partner_average(self, absolute=True):
+        """(variant, gene) mean over every method and motif complex of the gene."""
+        vals = np.asarray(self.values, dtype=np.float64)
+        vals = np.abs(vals) if absolute else vals
+        groups = self.gene_groups()
+        out = np.full((vals.shape[0], len(groups)), np.nan)
+        for j, idx in enumerate(groups.values()):
+            block = vals[:, :, idx].reshape(len(vals), -1)
+            n = (~np.isnan(block)).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[:, j] = np.where(n > 0, np.nansum(block, axis=1) / n, np.nan)
+        return out, list(groups)
+
+    def method_coverage(self):
+        """(method, partner) fraction of variants with a value."""
+        filled = (~np.isnan(np.asarray(self.values))).mean(axis=0)
+        return pd.DataFrame(filled, index=self.methods, columns=self.partners)
@@ -0,0 +1,266 @@
+"""Batched ESM-1v variant scoring.
+
+The old ``score_sequence`` loop in ``06_variant_reclass_pathogenicity.ipynb`` ran one
+full forward pass per variant.  Here every substitution at every position is read
+off a single wild-type pass (``mode="wt-marginal"``), or off one masked pass per
+*position* run in batches (``mode="masked-marginal"``).  ``mode="full-sequence"``
+reproduces the legacy whole-sequence Δscore exactly, but batches the mutant
+sequences instead of scoring them one by one.
+
+Any object with a ``model_id`` attribute and a ``log_probs(seqs, mask=None)``
+method can be used as the model; ``ToyMaskedLM`` is a small numpy stand-in for
+running this offline without the 650M weights.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+AA_INDEX = {aa: i for i, aa in enumerate(AMINO_ACIDS)}
+
+MODES = ("wt-marginal", "masked-marginal", "full-sequence")
+
+SCORE_COLUMNS = ["mutation", "position", "wt_aa", "mut_aa",
+                 "wt_score", "mut_score", "delta_score"]
+
+_MUTATION_RE = re.compile(r"^([A-Z])(\d+)([A-Z])$")
+
+
+# ─── Models ──────────────────────────────────────────────────────────────────
+class Esm1vModel:
+    """Thin wrapper around a fair-esm model returning per-residue log-probs.
+
+    ``from_pretrained`` defers loading the weights until the first forward pass,
+    so a run served entirely from a ``LogitsCache`` never touches them.
+    """
+
+    def __init__(self, model=None, alphabet=None, model_id="esm1v_t33_650M_UR90S_1", device="cpu"):
+        self.model_id = model_id
+        self.device = device
+        self.model = None
+        if model is not None:
+            self._setup(model, alphabet)
+
+    @classmethod
+    def from_pretrained(cls, name="esm1v_t33_650M_UR90S_1", device="cpu"):
+        return cls(model_id=name, device=device)
+
+    def _setup(self, model, alphabet):
+        import torch
+
+        self._torch = torch
+        self.model = model.eval().to(self.device)
+        self.alphabet = alphabet
+        self.batch_converter = alphabet.get_batch_converter()
+        self._aa_idx = torch.tensor([alphabet.get_idx(a) for a in AMINO_ACIDS],
+                                    device=self.device)
+
+    def log_probs(self, seqs, mask=None):
+        """Return a (batch, L, 20) array of log-probabilities over ``AMINO_ACIDS``.
+
+        ``mask`` optionally gives one 0-based position per sequence to replace by
+        the mask token (``None`` entries leave that sequence unmasked).
+        """
+        if self.model is None:
+            import esm
+
+            self._setup(*getattr(esm.pretrained, self.model_id)())
+        torch = self._torch
+        _, _, tokens = self.batch_converter([(f"s{i}", s) for i, s in enumerate(seqs)])
+        tokens = tokens.to(self.device)
+        if mask is not None:
+            for b, pos in enumerate(mask):
+                if pos is not None:
+                    tokens[b, pos + 1] = self.alphabet.mask_idx
+        length = max(len(s) for s in seqs)
+        with torch.no_grad():
+            logits = self.model(tokens)["logits"][:, 1:length + 1]
+            logprobs = torch.log_softmax(logits, dim=-1)
+        return logprobs.index_select(-1, self._aa_idx).cpu().numpy().astype(np.float32)
+
+
+class ToyMaskedLM:
+    """Deterministic stand-in for ESM-1v with the same ``log_probs`` interface.
+
+    Each residue's logits depend on its own identity and its two neighbours, so
+    wt-marginal, masked-marginal and full-sequence scores all differ, as they do
+    with the real model.
+    """
+
+    def __init__(self, seed=0, model_id="toy-masked-lm"):
+        rng = np.random.default_rng(seed)
+        vocab = len(AMINO_ACIDS) + 1  # last row is the mask token
+        self.model_id = model_id
+        self.self_w = rng.normal(0, 1.0, (vocab, len(AMINO_ACIDS))).astype(np.float32)
+        self.left_w = rng.normal(0, 0.5, (vocab, len(AMINO_ACIDS))).astype(np.float32)
+        self.right_w = rng.normal(0, 0.5, (vocab, len(AMINO_ACIDS))).astype(np.float32)
+        self.self_w[-1] = 0.0
+        self.calls = 0
+
+    def log_probs(self, seqs, mask=None):
+        self.calls += 1
+        length = max(len(s) for s in seqs)
+        mask_tok = len(AMINO_ACIDS)
+        tok = np.full((len(seqs), length + 2), mask_tok, dtype=np.int64)
+        for b, s in enumerate(seqs):
+            tok[b, 1:len(s) + 1] = [AA_INDEX[a] for a in s]
+            if mask is not None and mask[b] is not None:
+                tok[b, mask[b] + 1] = mask_tok
+        logits = (self.self_w[tok[:, 1:-1]]
+                  + self.left_w[tok[:, :-2]]
+                  + self.right_w[tok[:, 2:]])
+        logits -= logits.max(axis=-1, keepdims=True)
+        return logits - np.log(np.exp(logits).sum(axis=-1, keepdims=True))
+
+
+# ─── Variant parsing ─────────────────────────────────────────────────────────
+def parse_variants(variants):
+    """Normalise ``"I3F"`` strings or ``(wild, position, mutant)`` tuples."""
+    parsed = []
+    for v in variants:
+        if isinstance(v, str):
+            m = _MUTATION_RE.match(v.strip().upper())
+            if m is None:
+                raise ValueError(f"Cannot parse variant {v!r}")
+            wt, pos, mt = m.group(1), int(m.group(2)), m.group(3)
+        else:
+            wt, pos, mt = v
+            wt, pos, mt = str(wt).upper(), int(pos), str(mt).upper()
+        parsed.append((wt, pos, mt))
+    return parsed
+
+
+def _check_variants(seq, parsed):
+    for wt, pos, mt in parsed:
+        if not 1 <= pos <= len(seq):
+            raise ValueError(f"Position {pos} outside sequence of length {len(seq)}")
+        if seq[pos - 1] != wt:
+            raise ValueError(f"WT mismatch at {pos}: found {seq[pos - 1]} vs expected {wt}")
+        if mt not in AA_INDEX:
+            raise ValueError(f"Unknown mutant residue {mt!r} at {pos}")
+
+
+# ─── Log-probability matrices ────────────────────────────────────────────────
+def wt_marginals(model, seq):
+    """(L, 20) log-probabilities from a single unmasked wild-type pass."""
+    return model.log_probs([seq])[0, :len(seq)]
+
+
+def masked_marginals(model, seq, positions=None, batch_size=8):
+    """(L, 20) log-probabilities with each row taken from a pass masking that row.
+
+    Only ``positions`` (1-based) are computed; other rows are NaN.  Masked copies
+    of the sequence are run ``batch_size`` at a time.
+    """
+    if positions is None:
+        positions = range(1, len(seq) + 1)
+    idx = sorted({int(p) - 1 for p in positions})
+    out = np.full((len(seq), len(AMINO_ACIDS)), np.nan, dtype=np.float32)
+    for start in range(0, len(idx), batch_size):
+        chunk = idx[start:start + batch_size]
+        lp = model.log_probs([seq] * len(chunk), mask=chunk)
+        out[chunk] = lp[np.arange(len(chunk)), chunk]
+    return out
+
+
+def substitution_matrix(logprobs, seq):
+    """(L, 20) Δ log-prob of every substitution relative to the wild-type residue."""
+    wt_idx = np.fromiter((AA_INDEX[a] for a in seq), dtype=np.int64, count=len(seq))
+    return logprobs - logprobs[np.arange(len(seq)), wt_idx][:, None]
+
+
+def cached_marginals(model, seq, mode="wt-marginal", cache=None, positions=None, batch_size=8):
+    """Marginal (L, 20) log-probabilities, read from / written to a ``LogitsCache``.
+
+    For ``"masked-marginal"`` only the requested ``positions`` that are not yet
+    cached are run through the model; the cached matrix is then filled in.
+    """
+    if mode not in ("wt-marginal", "masked-marginal"):
+        raise ValueError(f"Only marginal modes can be cached, got {mode!r}")
+    hit = cache.get(model.model_id, seq, mode) if cache is not None else None
+    if mode == "wt-marginal":
+        if hit is not None:
+            return hit
+        lp = wt_marginals(model, seq)
+    else:
+        wanted = range(1, len(seq) + 1) if positions is None else positions
+        wanted = sorted({int(p) for p in wanted})
+        if hit is None:
+            lp = masked_marginals(model, seq, wanted, batch_size)
+        else:
+            missing = [p for p in wanted if np.isnan(hit[p - 1, 0])]
+            if not missing:
+                return hit
+            lp = np.array(hit, dtype=np.float32)
+            rows = np.array(missing) - 1
+            lp[rows] = masked_marginals(model, seq, missing, batch_size)[rows]
+    if cache is not None:
+        return cache.put(model.model_id, seq, mode, lp)
+    return lp
+
+
+def _sequence_scores(model, seqs, batch_size):
+    """Sum of per-residue log-probabilities for each sequence, batched."""
+    scores = np.empty(len(seqs), dtype=np.float64)
+    for start in range(0, len(seqs), batch_size):
+        chunk = seqs[start:start + batch_size]
+        lp = model.log_probs(chunk)
+        for b, s in enumerate(chunk):
+            idx = [AA_INDEX[a] for a in s]
+            scores[start + b] = lp[b, np.arange(len(s)), idx].sum()
+    return scores
+
+
+# ─── Public API ──────────────────────────────────────────────────────────────
+def score_variants(seq, variants, model=None, mode="wt-marginal", batch_size=8,
+                   logprobs=None, cache=None):
+    """Score missense ``variants`` of ``seq`` and return the ``cdkl5_esm1v_scores`` table.
+
+    Columns match the notebook output: ``mutation, position, wt_aa, mut_aa,
+    wt_score, mut_score, delta_score``.  In the marginal modes ``wt_score`` and
+    ``mut_score`` are the log-probabilities of the two residues at the mutated
+    position; in ``"full-sequence"`` mode they are whole-sequence sums, as before.
+    A precomputed (L, 20) ``logprobs`` matrix can be passed to skip the model,
+    and a ``LogitsCache`` makes repeated marginal runs a cache lookup.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    seq = seq.strip().upper()
+    parsed = parse_variants(variants)
+    _check_variants(seq, parsed)
+    if not parsed:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+
+    pos = np.array([p for _, p, _ in parsed], dtype=np.int64)
+    wt_idx = np.array([AA_INDEX[w] for w, _, _ in parsed], dtype=np.int64)
+    mt_idx = np.array([AA_INDEX[m] for _, _, m in parsed], dtype=np.int64)
+
+    if mode == "full-sequence":
+        if model is None:
+            raise ValueError("full-sequence mode needs a model")
+        uniq = sorted(set(parsed), key=lambda v: (v[1], v[2]))
+        mut_seqs = [seq[:p - 1] + m + seq[p:] for _, p, m in uniq]
+        scores = _sequence_scores(model, [seq] + mut_seqs, batch_size)
+        lookup = dict(zip(uniq, scores[1:]))
+        wt_score = np.full(len(parsed), scores[0])
+        mut_score = np.array([lookup[v] for v in parsed])
+    else:
+        if logprobs is None:
+            if model is None:
+                raise ValueError("score_variants needs a model or a logprobs matrix")
+            logprobs = cached_marginals(model, seq, mode, cache=cache,
+                                        positions=pos, batch_size=batch_size)
+        wt_score = logprobs[pos - 1, wt_idx].astype(np.float64)
+        mut_score = logprobs[pos - 1, mt_idx].astype(np.float64)
+
+    out = pd.DataFrame({
+        "mutation":    [f"{w}{p}{m}" for w, p, m in parsed],
+        "position":    pos,
+        "wt_aa":       [w for w, _, _ in parsed],
+        "mut_aa":      [m for _, _, m in parsed],
+        "wt_score":    wt_score,
+        "mut_score":   mut_score,
+        "delta_score": mut_score - wt_score,
+    })
+    return out.sort_values("position", kind="stable").reset_index(drop=True)
@@ -0,0 +1,55 @@
+"""Stand-in for ``haddock3`` used to exercise ``haddock_runs`` off the cluster.
+
+Creates ``<run_dir>/<NN>_<module>/io.json`` for each module of the cfg, honouring
+``--restart <step>`` (later step directories are removed first, as haddock3
+does).  ``FAKE_HADDOCK_DELAY`` sets the seconds spent per module and
+``FAKE_HADDOCK_FAIL_AT=<step>`` makes the run exit with status 1 before that
+step, leaving the earlier ones complete.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from .haddock_runs import read_cfg
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="fake haddock3")
+    ap.add_argument("cfg")
+    ap.add_argument("--restart", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    cfg = read_cfg(args.cfg)
+    run_dir, modules = cfg["run_dir"], cfg["modules"]
+    if os.path.isdir(run_dir) and args.restart is None:
+        print(f"run_dir {run_dir} exists, use --restart", file=sys.stderr)
+        return 1
+    start = args.restart or 0
+    os.makedirs(run_dir, exist_ok=True)
+    for name in os.listdir(run_dir):
+        step = name.split("_", 1)[0]
+        if step.isdigit() and int(step) >= start:
+            shutil.rmtree(os.path.join(run_dir, name))
+
+    delay = float(os.environ.get("FAKE_HADDOCK_DELAY", "0"))
+    fail_at = os.environ.get("FAKE_HADDOCK_FAIL_AT")
+    for i in range(start, len(modules)):
+        if fail_at is not None and i == int(fail_at):
+            print(f"[fake haddock3] failing before step {i}", file=sys.stderr)
+            return 1
+        step_dir = os.path.join(run_dir, f"{i:02d}_{modules[i]}")
+        os.makedirs(step_dir)
+        time.sleep(delay)
+        if modules[i] == "seletopclusts":
+            open(os.path.join(step_dir, "cluster_1_model_1.pdb"), "w").close()
+        with open(os.path.join(step_dir, "io.json"), "w") as fh:
+            json.dump({"module": modules[i], "step": i}, fh)
+        print(f"[fake haddock3] {step_dir} done")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
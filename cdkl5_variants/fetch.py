@@ -0,0 +1,256 @@
+"""Shared UniProt / AlphaFold fetch layer with a content-addressed mirror.
+
+Every response (FASTA, PDB, JSON, and 404s) is stored once under the SHA-256
+of its body, and ``index.json`` maps each URL to its blob and HTTP status::
+
+    <mirror>/index.json
+    <mirror>/objects/<sha[:2]>/<sha>
+
+A URL already in the mirror is served from disk, so re-runs do no network I/O.
+With ``offline=True`` (or ``CDKL5_OFFLINE=1``) *only* the mirror is used and a
+missing URL raises ``MirrorMiss``, which makes the pipeline runnable on
+air-gapped nodes once the mirror has been copied over.  Network requests share
+one pooled ``requests.Session`` and ``get_many`` runs them with bounded
+concurrency.
+
+``CDKL5_MIRROR`` overrides the default mirror directory.  Several processes
+may share one mirror: index updates are merged under an exclusive lock on
+``index.json.lock``.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_MIRROR = "/project/ealexov/compbio/shamrat/250519_energy/00_data/fetch_mirror"
+
+UNIPROT_REST = "https://rest.uniprot.org/uniprotkb"
+ALPHAFOLD_FILES = "https://alphafold.ebi.ac.uk/files"
+ENSEMBL_REST = "https://rest.ensembl.org"
+
+
+class MirrorMiss(LookupError):
+    """Raised in offline mode for a URL that is not in the mirror."""
+
+
+class Fetched:
+    """Minimal ``requests.Response`` stand-in for mirrored content."""
+
+    def __init__(self, url, status_code, content, from_mirror):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.from_mirror = from_mirror
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+# ─── URLs ────────────────────────────────────────────────────────────────────
+def uniprot_fasta_url(accession):
+    return f"{UNIPROT_REST}/{accession}.fasta"
+
+
+def uniprot_json_url(accession):
+    return f"{UNIPROT_REST}/{accession}.json"
+
+
+def alphafold_pdb_url(accession, version=4):
+    return f"{ALPHAFOLD_FILES}/AF-{accession}-F1-model_v{version}.pdb"
+
+
+def ensembl_lookup_url(stable_id):
+    return f"{ENSEMBL_REST}/lookup/id/{stable_id}?expand=1;content-type=application/json"
+
+
+def ensembl_cds_url(stable_id):
+    return f"{ENSEMBL_REST}/sequence/id/{stable_id}?type=cds;content-type=text/plain"
+
+
+def fasta_sequence(text):
+    """Sequence of a single-record FASTA text."""
+    return "".join(text.strip().splitlines()[1:]).strip()
+
+
+# ─── Fetcher ─────────────────────────────────────────────────────────────────
+class Fetcher:
+    def __init__(self, mirror=None, offline=None, max_workers=8, timeout=60, retries=3,
+                 rewrite=None):
+        self.mirror = mirror or os.environ.get("CDKL5_MIRROR", DEFAULT_MIRROR)
+        if offline is None:
+            offline = os.environ.get("CDKL5_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # {url prefix: replacement} applied to network requests only (mirror keys stay canonical)
+        self.rewrite = dict(rewrite or {})
+        self.network_requests = 0
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._session = None
+        self._retries = retries
+
+    # ─── Mirror ──────────────────────────────────────────────────────────────
+    @property
+    def index_path(self):
+        return os.path.join(self.mirror, "index.json")
+
+    def _load_index(self):
+        if os.path.isfile(self.index_path):
+            with open(self.index_path) as fh:
+                return json.load(fh)
+        return {}
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """Exclusive inter-process lock around read-modify-write of ``index.json``."""
+        os.makedirs(self.mirror, exist_ok=True)
+        with open(self.index_path + ".lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _blob_path(self, sha):
+        return os.path.join(self.mirror, "objects", sha[:2], sha)
+
+    def _store(self, url, status_code, content):
+        sha = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp, path)
+        entry = {"sha256": sha, "status": status_code, "size": len(content),
+                 "fetched": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with self._lock, self._index_lock():
+            # pick up URLs mirrored by other processes since the index was loaded
+            self._index.update(self._load_index())
+            self._index[url] = entry
+            tmp = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(self._index, fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+
+    def cached(self, url):
+        """Mirrored response for ``url`` or None."""
+        entry = self._index.get(url)
+        if entry is None or not os.path.isfile(self._blob_path(entry["sha256"])):
+            return None
+        with open(self._blob_path(entry["sha256"]), "rb") as fh:
+            return Fetched(url, entry["status"], fh.read(), from_mirror=True)
+
+    # ─── Network ─────────────────────────────────────────────────────────────
+    @property
+    def session(self):
+        if self._session is None:
+            s = requests.Session()
+            retry = Retry(total=self._retries, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=self.max_workers,
+                                  pool_maxsize=self.max_workers, max_retries=retry)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            self._session = s
+        return self._session
+
+    def _network_url(self, url):
+        for prefix, repl in self.rewrite.items():
+            if url.startswith(prefix):
+                return repl + url[len(prefix):]
+        return url
+
+    def get(self, url, refresh=False):
+        """Response for ``url``: from the mirror if present, else fetched and mirrored.
+
+        Non-2xx answers other than 404 are not mirrored, so a transient server
+        error is retried on the next run.
+        """
+        if not refresh:
+            hit = self.cached(url)
+            if hit is not None:
+                return hit
+        if self.offline:
+            raise MirrorMiss(f"{url} is not in the mirror {self.mirror} (offline mode)")
+        try:
+            resp = self.session.get(self._network_url(url), timeout=self.timeout)
+        finally:
+            # counted even when the request fails: it still went out
+            with self._lock:
+                self.network_requests += 1
+        if resp.ok or resp.status_code == 404:
+            self._store(url, resp.status_code, resp.content)
+        return Fetched(url, resp.status_code, resp.content, from_mirror=False)
+
+    def get_many(self, urls, refresh=False, return_exceptions=False):
+        """``get`` for every URL (in order), at most ``max_workers`` requests at a time.
+
+        With ``return_exceptions`` a failed request yields its exception in
+        place of a response instead of aborting the batch.
+        """
+        def one(url):
+            try:
+                return self.get(url, refresh)
+            except (requests.RequestException, MirrorMiss) as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        urls = list(urls)
+        unique = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = dict(zip(unique, pool.map(one, unique)))
+        return [results[u] for u in urls]
+
+    # ─── Convenience ─────────────────────────────────────────────────────────
+    def uniprot_sequence(self, accession):
+        resp = self.get(uniprot_fasta_url(accession))
+        resp.raise_for_status()
+        return fasta_sequence(resp.text)
+
+    def uniprot_sequences(self, accessions):
+        """{accession: sequence or None when the entry could not be retrieved}."""
+        accessions = list(dict.fromkeys(accessions))
+        out = {}
+        responses = self.get_many((uniprot_fasta_url(a) for a in accessions), return_exceptions=True)
+        for acc, resp in zip(accessions, responses):
+            out[acc] = fasta_sequence(resp.text) if isinstance(resp, Fetched) and resp.ok else None
+        return out
+
+
+_default = None
+
+
+def default_fetcher():
+    """Process-wide ``Fetcher`` configured from ``CDKL5_MIRROR`` / ``CDKL5_OFFLINE``."""
+    global _default
+    if _default is None:
+        _default = Fetcher()
+    return _default
+
+
+def uniprot_sequence(accession):
+    return default_fetcher().uniprot_sequence(accession)
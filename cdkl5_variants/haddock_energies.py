@@ -0,0 +1,181 @@
+"""Incremental harvest of HADDOCK3 energy components from ``capri_ss.tsv``.
+
+Every run directory under the docking folder is discovered (the last
+``NN_caprieval/capri_ss.tsv`` in each), parsed with the C CSV engine in chunks
+and reduced to per-run running statistics (count, mean, M2 per term).  A
+manifest records each file's (mtime, size, sha1) fingerprint and its
+statistics, so a re-harvest only parses runs whose table changed and the
+summary is recombined from the stored statistics instead of re-reading the
+components workbook.
+
+Layout of the output folder::
+
+    <out_dir>/harvest_manifest.json
+    <out_dir>/components/<run>.parquet
+"""
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+ENERGY_COLS = [
+    'model', 'score', 'irmsd', 'fnat', 'lrmsd', 'dockq',
+    'air', 'angles', 'bonds', 'bsa', 'cdihcoup',
+    'dani', 'desolv', 'dihe', 'elec', 'improper',
+    'rdcsrg', 'total', 'vdw', 'vean', 'xpcs'
+]
+SUMMARY_TERMS = ['vdw', 'elec', 'desolv', 'air', 'total', 'score']
+
+
+# ─── Discovery and fingerprints ──────────────────────────────────────────────
+def discover_runs(base_dir):
+    """{run name: path of its last ``NN_caprieval/capri_ss.tsv``}."""
+    runs = {}
+    for path in sorted(glob.glob(os.path.join(base_dir, "*", "[0-9]*_caprieval", "capri_ss.tsv"))):
+        # sorted → later caprieval steps overwrite earlier ones
+        runs[os.path.basename(os.path.dirname(os.path.dirname(path)))] = path
+    return runs
+
+
+def _sha1(path, block=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path, previous=None):
+    """(mtime, size, sha1) of ``path``; the hash is reused while mtime and size match."""
+    st = os.stat(path)
+    fp = {"path": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if previous and all(previous.get(k) == fp[k] for k in ("path", "mtime_ns", "size")):
+        fp["sha1"] = previous["sha1"]
+    else:
+        fp["sha1"] = _sha1(path)
+    return fp
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────────
+def read_capri_ss(path, columns=ENERGY_COLS, chunksize=50_000):
+    """Iterate over ``capri_ss.tsv`` in chunks, keeping only ``columns``."""
+    wanted = set(columns)
+    return pd.read_csv(path, sep=r"\s+", engine="c", usecols=lambda c: c in wanted,
+                       chunksize=chunksize)
+
+
+def _chunk_stats(df, terms):
+    values = df.reindex(columns=terms).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    n = (~np.isnan(values)).sum(axis=0).astype(np.float64)
+    with np.errstate(invalid="ignore"):
+        mean = np.nansum(values, axis=0) / n
+        m2 = np.nansum((values - mean) ** 2, axis=0)
+    return n, np.nan_to_num(mean), m2
+
+
+def _combine(a, b):
+    """Merge two (n, mean, M2) running statistics (Chan et al.)."""
+    (na, ma, qa), (nb, mb, qb) = a, b
+    n = na + nb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = mb - ma
+        mean = np.where(n > 0, ma + delta * nb / n, 0.0)
+        m2 = qa + qb + np.where(n > 0, delta ** 2 * na * nb / n, 0.0)
+    return n, mean, m2
+
+
+def harvest_run(path, run, terms=SUMMARY_TERMS, columns=ENERGY_COLS):
+    """Components frame and (n, mean, M2) statistics of one run, in one streaming pass."""
+    parts = []
+    stats = (np.zeros(len(terms)), np.zeros(len(terms)), np.zeros(len(terms)))
+    for chunk in read_capri_ss(path, columns):
+        parts.append(chunk)
+        stats = _combine(stats, _chunk_stats(chunk, terms))
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    df.insert(0, "complex", run)
+    cols = ["complex"] + [c for c in columns if c in df.columns]
+    return df[cols], stats
+
+
+# ─── Harvester ───────────────────────────────────────────────────────────────
+class EnergyHarvester:
+    def __init__(self, base_dir, out_dir, runs=None, terms=SUMMARY_TERMS):
+        self.base_dir = base_dir
+        self.out_dir = out_dir
+        self.runs = runs                      # None → every discovered run
+        self.terms = list(terms)
+        self.manifest_path = os.path.join(out_dir, "harvest_manifest.json")
+        self.component_dir = os.path.join(out_dir, "components")
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path) as fh:
+                manifest = json.load(fh)
+            if manifest.get("terms") == self.terms:
+                return manifest
+        return {"terms": self.terms, "runs": {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.manifest, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def _component_path(self, run):
+        return os.path.join(self.component_dir, f"{run}.parquet")
+
+    def harvest(self, force=False):
+        """Parse new or changed runs; returns {'parsed': [...], 'unchanged': [...], 'removed': [...]}."""
+        found = discover_runs(self.base_dir)
+        if self.runs is not None:
+            found = {r: p for r, p in found.items() if r in set(self.runs)}
+        known = self.manifest["runs"]
+        report = {"parsed": [], "unchanged": [], "removed": sorted(set(known) - set(found))}
+        for run in report["removed"]:
+            known.pop(run)
+            if os.path.isfile(self._component_path(run)):
+                os.remove(self._component_path(run))
+
+        os.makedirs(self.component_dir, exist_ok=True)
+        for run, path in found.items():
+            prev = known.get(run)
+            fp = fingerprint(path, prev["fingerprint"] if prev else None)
+            if (not force and prev and prev["fingerprint"]["sha1"] == fp["sha1"]
+                    and os.path.isfile(self._component_path(run))):
+                prev["fingerprint"] = fp        # touched but identical: keep the stats
+                report["unchanged"].append(run)
+                continue
+            df, (n, mean, m2) = harvest_run(path, run, self.terms)
+            df.to_parquet(self._component_path(run), index=False)
+            known[run] = {"fingerprint": fp, "rows": len(df),
+                          "n": n.tolist(), "mean": mean.tolist(), "m2": m2.tolist()}
+            report["parsed"].append(run)
+        self._save_manifest()
+        return report
+
+    def summary(self):
+        """Mean and SD (ddof=1) of each term per complex, from the stored statistics."""
+        rows = {}
+        for run, entry in sorted(self.manifest["runs"].items()):
+            n, mean, m2 = (np.asarray(entry[k], dtype=np.float64) for k in ("n", "mean", "m2"))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+            mean = np.where(n > 0, mean, np.nan)
+            rows[run] = {f"{t}_{stat}": v for t, m, s in zip(self.terms, mean, std)
+                         for stat, v in (("mean", m), ("std", s))}
+        summary = pd.DataFrame.from_dict(rows, orient="index")
+        summary.index.name = "complex"
+        return summary
+
+    def components(self):
+        """Every harvested model row, one frame across runs."""
+        runs = sorted(self.manifest["runs"])
+        if not runs:
+            return pd.DataFrame(columns=["complex"] + ENERGY_COLS)
+        return pd.concat([pd.read_parquet(self._component_path(r)) for r in runs],
+                         ignore_index=True)
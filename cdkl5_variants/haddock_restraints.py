@@ -0,0 +1,194 @@
+"""Batch generation of HADDOCK3 ambiguous restraints (.tbl) and cfg files.
+
+The notebook's ``generate_ambig_tbl`` wrote two ``assign`` lines for every
+CDKL5 × partner residue pair, i.e. 2·n·m restraints per partner.  Here each
+active residue gets one ambiguous restraint to the other side's whole motif,
+written as a ``resid a:b`` range selection (n + m lines)::
+
+    assign ( resid 169 and segid A ) ( resid 197:202 and segid B ) 2.0 2.0 0.0
+
+All docking jobs are derived from ``03_updated_alphafold_entries.xlsx`` in one
+table, residue ranges are checked against the PDB files, and only valid jobs
+get their .tbl and .cfg written.
+"""
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+CDKL5_PDB = "target.B99990001_with_cryst.pdb"
+
+CFG_TEMPLATE = """
+# ====================================================================
+# Protein-protein docking configuration for {gene} ({uniprot})
+
+# Directory for docking
+run_dir = "{run_dir}"
+
+# Compute mode
+mode = "local"
+ncores = {ncores}
+
+# Molecules to be docked
+molecules = [
+  "{cdkl5_pdb}",
+  "{partner_pdb}"
+]
+
+# ====================================================================
+[topoaa]
+autohis=true
+
+[rigidbody]
+tolerance = 20
+sampling = 20
+ambig_fname="{tbl_path}"
+
+[caprieval]
+
+[seletop]
+select = 20
+
+[flexref]
+tolerance = 20
+previous_ambig = true
+
+[caprieval]
+
+[emref]
+previous_ambig = true
+
+[caprieval]
+
+[clustfcc]
+
+[seletopclusts]
+top_models = 4
+
+[caprieval]
+
+# ====================================================================
+"""
+
+
+# ─── Restraints ──────────────────────────────────────────────────────────────
+def _selection(res_range, segid):
+    start, end = res_range
+    resid = f"{start}" if start == end else f"{start}:{end}"
+    return f"( resid {resid} and segid {segid} )"
+
+
+def ambig_restraints(range_a, range_b, segid_a="A", segid_b="B", distance=(2.0, 2.0, 0.0)):
+    """AIR text: every residue of each range restrained to the other range as a whole."""
+    d = " ".join(f"{x:.1f}" for x in distance)
+    res_a = np.arange(range_a[0], range_a[1] + 1).astype(str)
+    res_b = np.arange(range_b[0], range_b[1] + 1).astype(str)
+    to_b = f" and segid {segid_a} ) {_selection(range_b, segid_b)} {d}\n"
+    to_a = f" and segid {segid_b} ) {_selection(range_a, segid_a)} {d}\n"
+    lines = np.concatenate([np.char.add(np.char.add("assign ( resid ", res_a), to_b),
+                            np.char.add(np.char.add("assign ( resid ", res_b), to_a)])
+    return "! cl1-cl2-act-act\n! HADDOCK AIR restraints\n!\n" + "".join(lines)
+
+
+def parse_range(text):
+    """``"197-202"`` → (197, 202); None for missing or malformed ranges."""
+    if not isinstance(text, str):
+        return None
+    start, sep, end = text.strip().partition("-")
+    if not (sep and start.isdigit() and end.isdigit()):
+        return None
+    return int(start), int(end)
+
+
+@functools.lru_cache(maxsize=None)
+def residue_numbers(pdb_path, chain=None):
+    """Sorted residue numbers of the ATOM records (optionally one chain only)."""
+    resids = set()
+    with open(pdb_path) as fh:
+        for line in fh:
+            if line.startswith("ATOM") and (chain is None or line[21] == chain):
+                resids.add(int(line[22:26]))
+    return np.array(sorted(resids), dtype=np.int64)
+
+
+def missing_residues(pdb_path, res_range):
+    """Residues of ``res_range`` absent from ``pdb_path``."""
+    wanted = np.arange(res_range[0], res_range[1] + 1)
+    return wanted[~np.isin(wanted, residue_numbers(pdb_path))]
+
+
+# ─── Batch ───────────────────────────────────────────────────────────────────
+def docking_jobs(entries, structure_dir="03_alphafold_structures", tbl_dir="04_tbl_files",
+                 cfg_dir="05_cfg_files", cdkl5_pdb=CDKL5_PDB):
+    """One row per (partner, motif) docking job from the AlphaFold entries table.
+
+    The CDKL5 motif is the ``SL == 1`` row; partners without a motif range and
+    duplicate (partner, motif) rows are dropped.
+    """
+    cdkl5_range = parse_range(entries.loc[entries["SL"] == 1, "Consensus Motif Range"].iloc[0])
+    jobs = entries.loc[entries["SL"] != 1, ["SL", "UniProt", "Gene", "Consensus Motif Range"]].copy()
+    jobs["partner_range"] = jobs["Consensus Motif Range"].map(parse_range)
+    jobs = jobs[jobs["partner_range"].notna()]
+    jobs = jobs.drop_duplicates(["UniProt", "Gene", "Consensus Motif Range"]).reset_index(drop=True)
+
+    motif = jobs["partner_range"].map(lambda r: f"{r[0]}-{r[1]}")
+    name = jobs["UniProt"] + "_" + jobs["Gene"] + "_" + motif
+    jobs["cdkl5_range"] = [cdkl5_range] * len(jobs)
+    jobs["run_dir"] = name
+    jobs["tbl_path"] = tbl_dir + "/CDKL5_" + name + ".tbl"
+    jobs["cfg_path"] = cfg_dir + "/CDKL5_" + name + ".cfg"
+    jobs["cdkl5_pdb"] = os.path.join(structure_dir, cdkl5_pdb)
+    jobs["partner_pdb"] = structure_dir + "/AF-" + jobs["UniProt"] + "-F1_chainB.pdb"
+    return jobs
+
+
+def validate_jobs(jobs):
+    """Add a ``Status`` column: ``Success`` or why the job cannot be docked."""
+    status = []
+    for cdkl5_pdb, partner_pdb, ra, rb in jobs[["cdkl5_pdb", "partner_pdb", "cdkl5_range",
+                                                  "partner_range"]].itertuples(index=False):
+        problems = []
+        for pdb, res_range, label in ((cdkl5_pdb, ra, "CDKL5"), (partner_pdb, rb, "partner")):
+            if not os.path.isfile(pdb):
+                problems.append(f"missing {label} PDB {pdb}")
+                continue
+            missing = missing_residues(pdb, res_range)
+            if len(missing):
+                problems.append(f"{label} residues {missing.tolist()} not in {os.path.basename(pdb)}")
+        status.append("; ".join(problems) if problems else "Success")
+    return jobs.assign(Status=status)
+
+
+def write_tbl_files(jobs):
+    """Write the .tbl of every ``Success`` job; returns the paths written."""
+    ok = jobs[jobs["Status"] == "Success"]
+    for path, ra, rb in ok[["tbl_path", "cdkl5_range", "partner_range"]].itertuples(index=False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(ambig_restraints(ra, rb))
+    return ok["tbl_path"].tolist()
+
+
+def write_cfg_files(jobs, ncores=60):
+    """Write the .cfg of every ``Success`` job; returns the paths written."""
+    ok = jobs[jobs["Status"] == "Success"]
+    for job in ok.to_dict("records"):
+        os.makedirs(os.path.dirname(job["cfg_path"]) or ".", exist_ok=True)
+        with open(job["cfg_path"], "w") as fh:
+            fh.write(CFG_TEMPLATE.format(gene=job["Gene"], uniprot=job["UniProt"], ncores=ncores,
+                                         **{k: job[k] for k in ("run_dir", "cdkl5_pdb",
+                                                                "partner_pdb", "tbl_path")}))
+    return ok["cfg_path"].tolist()
+
+
+def main(input_excel, output_log, ncores=60):
+    jobs = validate_jobs(docking_jobs(pd.read_excel(input_excel)))
+    write_tbl_files(jobs)
+    write_cfg_files(jobs, ncores=ncores)
+    log = jobs[["SL", "UniProt", "Gene", "partner_range", "Status"]].rename(
+        columns={"partner_range": "Motif Range"})
+    os.makedirs(os.path.dirname(output_log) or ".", exist_ok=True)
+    log.to_excel(output_log, index=False)
+    print(f"{(jobs['Status'] == 'Success').sum()} of {len(jobs)} jobs written. Log saved to {output_log}")
+    return jobs
@@ -0,0 +1,159 @@
+"""Run HADDOCK3 cfg files concurrently under a global core budget.
+
+Replaces the serial loop in ``03_haddock/06_run_haddock_serial_jobs.sh``: the
+node's cores are split between as many runs as fit (at least ``min_cores``
+each), every run gets a hidden copy of its cfg with ``ncores`` set to its
+share, and runs that were interrupted are restarted from their last completed
+module (``haddock3 <cfg> --restart <step>``).  Progress is written to a JSON status
+file after every state change.
+
+Usage (from ``03_haddock``)::
+
+    python -m cdkl5_variants.haddock_runs 05_cfg_files --cores 40 \\
+        --haddock3 "apptainer exec /path/to/haddock3.sif haddock3"
+
+``python -m cdkl5_variants.fake_haddock3`` can be passed as ``--haddock3`` to
+exercise the scheduler without the container.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_RUN_DIR_RE = re.compile(r'^\s*run_dir\s*=\s*["\']([^"\']+)["\']', re.M)
+_NCORES_RE = re.compile(r"^(\s*ncores\s*=\s*)\d+", re.M)
+_MODULE_RE = re.compile(r"^\s*\[([A-Za-z_][\w]*)\]\s*$", re.M)
+
+
+# ─── cfg handling ────────────────────────────────────────────────────────────
+def read_cfg(path):
+    """``run_dir`` and the ordered module list of a HADDOCK3 cfg."""
+    with open(path) as fh:
+        text = fh.read()
+    m = _RUN_DIR_RE.search(text)
+    if m is None:
+        raise ValueError(f"No run_dir in {path}")
+    return {"cfg": path, "text": text, "run_dir": m.group(1), "modules": _MODULE_RE.findall(text)}
+
+
+def with_ncores(text, ncores):
+    """cfg text with its top-level ``ncores`` set (added after ``run_dir`` if missing)."""
+    if _NCORES_RE.search(text):
+        return _NCORES_RE.sub(lambda m: f"{m.group(1)}{ncores}", text, count=1)
+    return _RUN_DIR_RE.sub(lambda m: f"{m.group(0)}\nncores = {ncores}", text, count=1)
+
+
+def completed_steps(run_dir, modules):
+    """Number of leading modules whose step directory finished (has ``io.json``)."""
+    done = 0
+    for i, module in enumerate(modules):
+        if not os.path.isfile(os.path.join(run_dir, f"{i:02d}_{module}", "io.json")):
+            break
+        done += 1
+    return done
+
+
+def plan_cores(n_runs, total_cores, min_cores=4):
+    """(concurrent runs, cores per run) for ``n_runs`` under ``total_cores``."""
+    if n_runs == 0:
+        return 0, 0
+    slots = max(1, min(n_runs, total_cores // max(1, min_cores)))
+    return slots, max(1, total_cores // slots)
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────────
+class HaddockScheduler:
+    def __init__(self, cfg_files, total_cores, haddock3="haddock3", workdir=".",
+                 status_path="haddock_status.json", log_dir="logs", min_cores=4):
+        self.cfgs = [read_cfg(c) for c in cfg_files]
+        self.total_cores = total_cores
+        self.command = shlex.split(haddock3) if isinstance(haddock3, str) else list(haddock3)
+        self.workdir = workdir
+        self.status_path = os.path.join(workdir, status_path)
+        self.log_dir = os.path.join(workdir, log_dir)
+        self.slots, self.ncores = plan_cores(len(self.cfgs), total_cores, min_cores)
+        self.status = {}
+        self._lock = threading.Lock()
+
+    def _name(self, cfg):
+        return os.path.splitext(os.path.basename(cfg["cfg"]))[0]
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self.status.setdefault(name, {}).update(fields)
+            tmp = self.status_path + ".tmp"
+            with open(tmp, "w") as fh:
+                json.dump({"total_cores": self.total_cores, "slots": self.slots,
+                           "ncores_per_run": self.ncores, "runs": self.status},
+                          fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.status_path)
+
+    def _run_one(self, cfg):
+        name = self._name(cfg)
+        run_dir = os.path.join(self.workdir, cfg["run_dir"])
+        done = completed_steps(run_dir, cfg["modules"])
+        if done == len(cfg["modules"]):
+            self._update(name, state="skipped", reason="all modules complete", returncode=0)
+            return name, 0
+
+        # hidden copy next to the original so relative paths resolve the same way
+        scheduled_cfg = os.path.join(os.path.dirname(cfg["cfg"]), f".{name}.scheduled.cfg")
+        with open(scheduled_cfg, "w") as fh:
+            fh.write(with_ncores(cfg["text"], self.ncores))
+        cmd = self.command + [os.path.relpath(scheduled_cfg, self.workdir)]
+        if os.path.isdir(run_dir):
+            cmd += ["--restart", str(done)]
+
+        log_path = os.path.join(self.log_dir, f"haddock_{name}.log")
+        start = time.time()
+        self._update(name, state="running", cmd=cmd, run_dir=cfg["run_dir"], ncores=self.ncores,
+                     restart_from=done if os.path.isdir(run_dir) else None, log=log_path,
+                     started=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        with open(log_path, "a") as log:
+            rc = subprocess.call(cmd, cwd=self.workdir, stdout=log, stderr=subprocess.STDOUT)
+        self._update(name, state="done" if rc == 0 else "failed", returncode=rc,
+                     elapsed_s=round(time.time() - start, 1),
+                     completed_steps=completed_steps(run_dir, cfg["modules"]),
+                     total_steps=len(cfg["modules"]))
+        return name, rc
+
+    def run(self):
+        """Run every cfg; returns {cfg name: return code}."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        for cfg in self.cfgs:
+            self._update(self._name(cfg), state="pending", cfg=cfg["cfg"])
+        if not self.cfgs:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.slots) as pool:
+            return dict(pool.map(self._run_one, self.cfgs))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("cfg_folder", help="folder with *.cfg files (e.g. 05_cfg_files)")
+    ap.add_argument("--cores", type=int, default=os.cpu_count(), help="global core budget")
+    ap.add_argument("--min-cores", type=int, default=4, help="minimum cores per run")
+    ap.add_argument("--haddock3", default="haddock3", help="command used to launch haddock3")
+    ap.add_argument("--status", default="logs/haddock_status.json")
+    args = ap.parse_args(argv)
+
+    cfgs = sorted(glob.glob(os.path.join(args.cfg_folder, "*.cfg")))
+    sched = HaddockScheduler(cfgs, args.cores, haddock3=args.haddock3,
+                             status_path=args.status, min_cores=args.min_cores)
+    print(f"{len(cfgs)} cfg files, {sched.slots} concurrent runs × {sched.ncores} cores")
+    results = sched.run()
+    failed = [name for name, rc in results.items() if rc != 0]
+    for name in failed:
+        print(f"Error in processing {name}. Check {sched.status[name].get('log')}")
+    print(f"Status written to {sched.status_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
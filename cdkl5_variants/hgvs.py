@@ -0,0 +1,126 @@
+"""Vectorised HGVS ``p.`` parsing and reference-residue validation.
+
+The cleaning notebook parsed protein changes one row at a time
+(``df.apply(lambda x: pd.Series(parse_protein_change(x)))``, a ``re.match``
+per row in ``convert_3to1``) and checked them against UniProt with
+``df.apply(check_match, axis=1)``.  Here:
+
+* ``parse_protein_change`` runs one compiled pattern through ``str.extract``
+  on the *distinct* strings only (an export repeats the same change many
+  times) and translates three-letter codes with a lookup table.  It accepts
+  ``V107D``, ``p.Val107Asp``, ``p.(Arg80His)``, ClinVar names
+  (``NM_...:c.239G>A (p.Arg80His)``), ``Q865*``/``p.Gln234Ter``,
+  ``p.Gly83=`` and frameshifts (``Y516fs``, ``p.Gln679ArgfsTer105``); of a
+  multi-isoform ClinVar entry (``G905S, D905N``) the first change is kept;
+* ``check_reference`` gathers the reference residue at every position from a
+  ``uint8`` copy of the sequence and compares it with the wild-type residue,
+  returning match / mismatch masks (10⁶ rows in about 0.1 s).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from .esm1v import AMINO_ACIDS
+
+AA_3TO1 = {
+    "Ala": "A", "Arg": "R", "Asn": "N", "Asp": "D", "Cys": "C",
+    "Glu": "E", "Gln": "Q", "Gly": "G", "His": "H", "Ile": "I",
+    "Leu": "L", "Lys": "K", "Met": "M", "Phe": "F", "Pro": "P",
+    "Ser": "S", "Thr": "T", "Trp": "W", "Tyr": "Y", "Val": "V",
+    "Sec": "U", "Pyl": "O", "Asx": "B", "Glx": "Z", "Xaa": "X",
+    "Ter": "*",
+}
+# every residue token the pattern can capture → one-letter code
+_TO_ONE = {**AA_3TO1, **{v: v for v in AA_3TO1.values()}}
+
+_AA = "|".join(AA_3TO1) + r"|[A-Z*]"
+PROTEIN_CHANGE_RE = re.compile(
+    rf"^(?:[^,]*?p\.)?\(?(?P<wild>{_AA})(?P<position>\d+)(?P<mutant>{_AA}|=)?(?P<rest>[^,)\s]*)")
+
+
+def _classify(wild, mutant, rest):
+    kind = np.full(len(wild), "other", dtype=object)
+    standard = np.isin(wild, list(AMINO_ACIDS)) & np.isin(mutant, list(AMINO_ACIDS))
+    kind[(rest == "") & standard] = "missense"
+    kind[(rest == "") & (mutant == wild) & (wild != "")] = "synonymous"
+    kind[(rest == "") & (mutant == "*")] = "nonsense"
+    kind[pd.Series(rest).str.startswith("fs").to_numpy()] = "frameshift"
+    kind[wild == ""] = "invalid"
+    return kind
+
+
+def parse_protein_change(values):
+    """(wild, position, mutant, kind, protein_change) frame aligned with ``values``.
+
+    ``protein_change`` is the one-letter form (``V107D``, ``Q865*``,
+    ``Y516fs``); unparseable entries get ``kind == "invalid"``, empty residues
+    and position 0, as in ``saturation.parse_mutations``.  Other changes the
+    pattern only partly covers (stop-loss extensions such as
+    ``p.Ter882GlnextTer14``, delins) keep their residues but get
+    ``kind == "other"`` and no ``protein_change``.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype="string").str.strip())
+    parts = pd.Series(uniques, dtype="string").str.extract(PROTEIN_CHANGE_RE)
+
+    wild = parts["wild"].map(_TO_ONE).fillna("").astype(object).to_numpy()
+    mutant = parts["mutant"].map(_TO_ONE)
+    mutant = mutant.mask(parts["mutant"].eq("=").fillna(False), parts["wild"].map(_TO_ONE))
+    mutant = mutant.fillna("").astype(object).to_numpy()
+    rest = parts["rest"].fillna("").astype(object).to_numpy()
+    pos = pd.to_numeric(parts["position"], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    pos = np.where(wild == "", 0, pos)
+    kind = _classify(wild, mutant, rest)
+    change = np.where(kind == "frameshift", wild + pd.Series(pos).astype(str).to_numpy() + "fs",
+                      wild + pd.Series(pos).astype(str).to_numpy() + mutant)
+    change[(kind == "invalid") | (kind == "other")] = None
+
+    table = pd.DataFrame({"wild": wild, "position": pos, "mutant": mutant,
+                          "kind": kind, "protein_change": pd.Series(change, dtype=object)})
+    # rows with a missing value (code -1) take the invalid row appended at the end
+    table.loc[len(table)] = ["", 0, "", "invalid", None]
+    codes = np.where(codes < 0, len(table) - 1, codes)
+    out = table.iloc[codes].reset_index(drop=True)
+    if isinstance(values, pd.Series):
+        out.index = values.index
+    return out
+
+
+def sequence_array(sequence):
+    return np.frombuffer(sequence.upper().encode(), dtype=np.uint8)
+
+
+def check_reference(wild, position, sequence):
+    """Compare wild-type residues with ``sequence`` at 1-based ``position``.
+
+    Returns ``(match, mismatch, reference)``: boolean masks and the reference
+    residue at each position (``""`` where the position is outside the
+    sequence).  Rows that are neither match nor mismatch are invalid.
+    """
+    seq = sequence_array(sequence).astype(np.uint32)
+    pos = pd.to_numeric(pd.Series(position), errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    # one code point per row ("" → 0) so the comparison is integer-only
+    wt = pd.Series(wild, dtype=object).fillna("").to_numpy(dtype="U1").view(np.uint32)
+    valid = (pos >= 1) & (pos <= len(seq)) & (wt != 0)
+    ref = np.zeros(len(pos), dtype=np.uint32)
+    ref[valid] = seq[pos[valid] - 1]
+    match = valid & (ref == wt)
+    return match, valid & ~match, ref.view("U1")
+
+
+def match_status(wild, position, sequence):
+    """``Match`` / ``Mismatch (Seq: X)`` / ``Invalid`` labels, as in the cleaning notebook."""
+    match, mismatch, ref = check_reference(wild, position, sequence)
+    status = np.full(len(match), "Invalid", dtype=object)
+    status[match] = "Match"
+    status[mismatch] = "Mismatch (Seq: " + ref[mismatch].astype(object) + ")"
+    return status
+
+
+def validate(df, sequence, column="Protein change"):
+    """Copy of ``df`` with the parsed ``column`` (wt_aa, pos, mut_aa) and a ``match_status``."""
+    parsed = parse_protein_change(df[column])
+    out = df.assign(wt_aa=parsed["wild"].to_numpy(), pos=parsed["position"].to_numpy(),
+                    mut_aa=parsed["mutant"].to_numpy())
+    out["match_status"] = match_status(out["wt_aa"], out["pos"], sequence)
+    return out
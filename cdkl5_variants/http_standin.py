@@ -0,0 +1,55 @@
+"""Local HTTP stand-in for UniProt / AlphaFold, used to exercise ``fetch``.
+
+``StandInServer`` serves canned ``{path: (status, body)}`` routes from a
+background thread and counts the requests it receives::
+
+    with StandInServer({"/uniprotkb/O76039.fasta": (200, b">sp|O76039\\nMKIPN")}) as srv:
+        f = Fetcher(mirror, rewrite={"https://rest.uniprot.org": srv.url})
+        f.uniprot_sequence("O76039")
+        srv.hits["/uniprotkb/O76039.fasta"]   # → 1
+"""
+import collections
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    def __init__(self, routes, host="127.0.0.1", port=0):
+        self.routes = dict(routes)
+        self.hits = collections.Counter()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits[self.path] += 1
+                status, body = server.routes.get(self.path, (404, b"Not Found"))
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,193 @@
+"""Streaming ClinVar / gnomAD ingestion: filter while reading, keep only the curated rows.
+
+The cleaning notebook converted ``clinvar_result.txt`` to Excel and then
+re-read the whole workbook for every filter, appending one sheet per step
+(``Single_Nucleotide_Variant`` → ``Missense_Variant`` → ``CDKL5_Condition`` →
+``CDKL5_missense_only``).  Here a source is read in chunks and each chunk goes
+through the same filters as one composed predicate; only the surviving rows
+are kept, so memory depends on the size of the curated set, not of the input.
+That also makes the full ClinVar release (``variant_summary.txt.gz``, several
+GB uncompressed) usable directly::
+
+    df, counts = ingest("00_data/clinvar_result.txt", "clinvar")
+    df, counts = ingest("variant_summary.txt.gz", "variant_summary")
+
+``counts`` has one row per filter with the rows it saw and kept, i.e. the
+sizes of the notebook's intermediate sheets without writing them.
+``variant_summary`` rows are renamed to the ``clinvar_result.txt`` columns;
+its ``Protein change`` and ``Molecular consequence`` are derived from the
+HGVS ``p.`` part of ``Name`` (the summary has no consequence column), once the
+assembly and gene filters have cut a chunk down to the CDKL5 rows.
+"""
+from typing import Callable, NamedTuple
+
+import pandas as pd
+
+from .hgvs import parse_protein_change
+
+CHUNKSIZE = 100_000
+
+
+class Filter(NamedTuple):
+    name: str
+    keep: Callable          # chunk DataFrame → boolean mask
+
+
+class Derive(NamedTuple):
+    name: str
+    assign: Callable        # surviving rows → same rows with extra columns
+
+
+# ─── Predicates ──────────────────────────────────────────────────────────────
+def equals(name, column, value):
+    return Filter(name, lambda df: (df[column] == value).to_numpy())
+
+
+def contains(name, column, text):
+    return Filter(name, lambda df: df[column].astype("string").str.contains(
+        text, regex=False).fillna(False).to_numpy(dtype=bool))
+
+
+def excludes(name, column, text):
+    inner = contains(name, column, text).keep
+    return Filter(name, lambda df: ~inner(df))
+
+
+def notna(name, column):
+    return Filter(name, lambda df: df[column].notna().to_numpy())
+
+
+def compose(filters):
+    """One predicate applying ``filters`` in order; returns ``(kept rows, [(name, seen, kept)])``.
+
+    ``Derive`` steps add columns to the rows still left at that point and are
+    not counted.
+    """
+    def keep(df):
+        steps = []
+        for f in filters:
+            if isinstance(f, Derive):
+                if len(df):
+                    df = f.assign(df)
+                continue
+            seen = len(df)
+            if seen:
+                df = df[f.keep(df)]
+            steps.append((f.name, seen, len(df)))
+        return df, steps
+    return keep
+
+
+# ─── Sources ─────────────────────────────────────────────────────────────────
+class Source(NamedTuple):
+    sep: str
+    filters: list
+    prepare: Callable = None        # chunk → chunk, before filtering
+
+
+_CONSEQUENCE = {"missense": "missense variant", "nonsense": "nonsense",
+                "synonymous": "synonymous variant", "frameshift": "frameshift variant"}
+
+VARIANT_SUMMARY_COLUMNS = {
+    "#AlleleID": "AlleleID(s)", "Type": "Variant type", "GeneSymbol": "Gene(s)",
+    "ClinicalSignificance": "Germline classification", "LastEvaluated": "Germline date last evaluated",
+    "RS# (dbSNP)": "dbSNP ID", "PhenotypeList": "Condition(s)", "ReviewStatus": "Germline review status",
+}
+
+
+def _variant_summary(df):
+    return df.rename(columns=VARIANT_SUMMARY_COLUMNS)
+
+
+def _protein_change(df):
+    parsed = parse_protein_change(df["Name"])
+    return df.assign(**{"Protein change": parsed["protein_change"].to_numpy(),
+                        "Molecular consequence": parsed["kind"].map(_CONSEQUENCE).to_numpy()})
+
+
+CLINVAR_FILTERS = [
+    equals("Single_Nucleotide_Variant", "Variant type", "single nucleotide variant"),
+    contains("Missense_Variant", "Molecular consequence", "missense variant"),
+    contains("CDKL5_Condition", "Condition(s)", "CDKL5"),
+    excludes("CDKL5_missense_only", "Molecular consequence", "intron variant"),
+]
+
+SOURCES = {
+    # ClinVar web export of the CDKL5 search (00_data/clinvar_result.txt)
+    "clinvar": Source("\t", CLINVAR_FILTERS),
+    # full ClinVar release; one row per assembly, so GRCh38 is selected first and
+    # the HGVS names are parsed only for the CDKL5 rows that are left
+    "variant_summary": Source("\t", [equals("GRCh38", "Assembly", "GRCh38"),
+                                     equals("CDKL5_gene", "Gene(s)", "CDKL5"),
+                                     Derive("Protein change", _protein_change)] + CLINVAR_FILTERS,
+                              _variant_summary),
+    # gnomAD browser export (00_data/gnomAD.csv)
+    "gnomad": Source(",", [contains("Missense_Variant", "VEP Annotation", "missense_variant")]),
+}
+
+
+def read_chunks(path, sep, chunksize=CHUNKSIZE, **kwargs):
+    """``pd.read_csv`` chunks (``.gz`` etc. decompressed on the fly)."""
+    return pd.read_csv(path, sep=sep, chunksize=chunksize, low_memory=False, **kwargs)
+
+
+def stream(path, source, filters=None, chunksize=CHUNKSIZE, counts=None, **kwargs):
+    """Yield the rows of each chunk that pass every filter.
+
+    ``source`` is a ``SOURCES`` key or a ``Source``; ``filters`` overrides its
+    filters.  If ``counts`` is a dict it is updated with ``{filter: [seen, kept]}``.
+    """
+    src = SOURCES[source] if isinstance(source, str) else source
+    keep = compose(src.filters if filters is None else filters)
+    for chunk in read_chunks(path, src.sep, chunksize, **kwargs):
+        if src.prepare is not None:
+            chunk = src.prepare(chunk)
+        rows, steps = keep(chunk)
+        if counts is not None:
+            for name, seen, kept in steps:
+                c = counts.setdefault(name, [0, 0])
+                c[0] += seen
+                c[1] += kept
+        if len(rows):
+            yield rows
+
+
+def ingest(path, source, filters=None, chunksize=CHUNKSIZE, **kwargs):
+    """``(curated rows, per-filter counts)`` for one file."""
+    counts = {}
+    parts = list(stream(path, source, filters, chunksize, counts, **kwargs))
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    report = pd.DataFrame([(name, seen, kept, seen - kept) for name, (seen, kept) in counts.items()],
+                          columns=["filter", "rows_in", "rows_out", "dropped"]).set_index("filter")
+    return df, report
+
+
+def write(df, path, sheet_name="Sheet1"):
+    """Write the curated set (.xlsx / .parquet / .csv / tab-separated otherwise)."""
+    if path.endswith(".xlsx"):
+        df.to_excel(path, sheet_name=sheet_name, index=False)
+    elif path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, sep="," if path.endswith(".csv") else "\t", index=False)
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Stream and filter a ClinVar / gnomAD export")
+    ap.add_argument("path", help="clinvar_result.txt, variant_summary.txt.gz or gnomAD.csv")
+    ap.add_argument("--source", choices=sorted(SOURCES), default="clinvar")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--sheet", default="CDKL5_missense_only")
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    args = ap.parse_args(argv)
+
+    df, report = ingest(args.path, args.source, chunksize=args.chunksize)
+    print(report.to_string())
+    write(df, args.out, args.sheet)
+    print(f"✅ {len(df)} rows → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
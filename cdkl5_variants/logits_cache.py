@@ -0,0 +1,87 @@
+"""On-disk cache of per-residue language-model log-probabilities.
+
+Entries are keyed by (model id, sequence hash, masking mode) and stored as
+float16 ``.npy`` files that are opened memory-mapped, so re-running the
+pathogenicity stage on the same O76039 sequence is a file open rather than an
+ESM-1v forward pass.  The directory is capped at ``max_bytes``; the least
+recently used entries (by file mtime, refreshed on every hit) are evicted first.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+def sequence_hash(seq):
+    return hashlib.sha256(seq.strip().upper().encode()).hexdigest()
+
+
+class LogitsCache:
+    def __init__(self, root, max_bytes=2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, model_id, seq, mode):
+        raw = f"{model_id}\0{sequence_hash(seq)}\0{mode}".encode()
+        return hashlib.sha256(raw).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.npy")
+
+    def get(self, model_id, seq, mode):
+        """Return the cached (L, 20) array memory-mapped read-only, or ``None``."""
+        path = self._path(self.key(model_id, seq, mode))
+        try:
+            arr = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return arr
+
+    def put(self, model_id, seq, mode, array):
+        """Store ``array`` as float16 and return the memory-mapped copy."""
+        key = self.key(model_id, seq, mode)
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as fh:
+            np.save(fh, np.asarray(array, dtype=np.float16))
+        os.replace(tmp, path)
+        meta = {"model_id": model_id, "sequence_sha256": sequence_hash(seq),
+                "mode": mode, "shape": list(np.shape(array))}
+        with open(os.path.join(self.root, f"{key}.json"), "w") as fh:
+            json.dump(meta, fh)
+        self.evict(keep=key)
+        return np.load(path, mmap_mode="r")
+
+    def entries(self):
+        """(mtime, size, key) for every cached array, oldest first."""
+        out = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".npy"):
+                continue
+            st = os.stat(os.path.join(self.root, name))
+            out.append((st.st_mtime, st.st_size, name[:-4]))
+        return sorted(out)
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until the cache fits in ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for ext in (".npy", ".json"):
+                try:
+                    os.remove(os.path.join(self.root, key + ext))
+                except FileNotFoundError:
+                    pass
+            total -= size
+        return total
@@ -0,0 +1,189 @@
+"""Proteome-wide scan for the CDKL5 consensus motif R-P-X-[S/T]-[A/G/P/S].
+
+A multi-FASTA (e.g. the UniProt human proteome) is loaded into one uint8
+array with a ``*`` separator between proteins.  Each motif position is a
+256-entry boolean lookup table: the most selective position is matched over
+the whole array in one vectorised pass and the remaining positions filter the
+surviving candidates.  Hits are mapped back to proteins with ``searchsorted``
+on the protein offsets.
+
+``candidate_table`` returns the sites in the column layout of
+``03_updated_alphafold_entries.xlsx`` (``SL``, ``UniProt``, ``Gene``,
+``Consensus Motifs Found``, ``Consensus Motif Range``, ...), and
+``docking_entries`` prepends the CDKL5 row so the result can be passed to
+``haddock_restraints.docking_jobs`` directly.
+"""
+import gzip
+import re
+
+import numpy as np
+import pandas as pd
+
+CONSENSUS_MOTIF = ["R", "P", None, "ST", "AGPS"]      # None → any residue
+SEPARATOR = ord("*")
+CDKL5_ENTRY = {"SL": 1, "UniProt": "O76039", "Gene": "CDKL5", "pSite": "Y171",
+               "Consensus Motifs Found": "['TEYVA']", "Consensus Motif Range": "169-174",
+               "Extraction Method": "pSite"}
+
+_UPPER = np.arange(256, dtype=np.uint8)
+_UPPER[ord("a"):ord("z") + 1] -= 32
+_RESIDUE = np.zeros(256, dtype=bool)
+_RESIDUE[ord("A"):ord("Z") + 1] = True
+_GENE_RE = re.compile(r"\bGN=(\S+)")
+
+
+class Proteome:
+    def __init__(self, seq, offsets, lengths, ids, genes, headers):
+        self.seq = seq              # uint8, proteins separated by SEPARATOR
+        self.offsets = offsets      # start of each protein in ``seq``
+        self.lengths = lengths
+        self.ids = ids
+        self.genes = genes
+        self.headers = headers
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sequence(self, i):
+        return self.seq[self.offsets[i]:self.offsets[i] + self.lengths[i]].tobytes().decode()
+
+
+def _parse_header(header):
+    """UniProt accession and gene name from ``>sp|O76039|CDKL5_HUMAN ... GN=CDKL5``."""
+    token = header[1:].split(None, 1)[0] if len(header) > 1 else ""
+    parts = token.split("|")
+    acc = parts[1] if len(parts) >= 3 and parts[0] in ("sp", "tr") else token
+    gene = _GENE_RE.search(header)
+    return acc, gene.group(1) if gene else None
+
+
+def read_fasta(path):
+    """Load a (optionally gzipped) multi-FASTA into a ``Proteome``."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    headers, chunks, lengths = [], [], []
+    current = []
+    with opener(path, "rb") as fh:
+        for line in fh:
+            line = line.strip()
+            if line.startswith(b">"):
+                if headers:
+                    chunks.append(b"".join(current))
+                    lengths.append(len(chunks[-1]))
+                headers.append(line.decode(errors="replace"))
+                current = []
+            elif line:
+                current.append(line)
+    if headers:
+        chunks.append(b"".join(current))
+        lengths.append(len(chunks[-1]))
+    seq = _UPPER[np.frombuffer(b"*".join(chunks), dtype=np.uint8)]
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]]).astype(np.int64)
+    ids, genes = zip(*map(_parse_header, headers)) if headers else ((), ())
+    return Proteome(seq, offsets, lengths, np.array(ids, dtype=object),
+                    np.array(genes, dtype=object), headers)
+
+
+def from_sequences(sequences):
+    """``Proteome`` from an ``{id: sequence}`` mapping."""
+    ids = list(sequences)
+    chunks = [sequences[i].strip().encode() for i in ids]
+    lengths = np.array([len(c) for c in chunks], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]]).astype(np.int64)
+    seq = _UPPER[np.frombuffer(b"*".join(chunks), dtype=np.uint8)]
+    return Proteome(seq, offsets, lengths, np.array(ids, dtype=object),
+                    np.array([None] * len(ids), dtype=object), [f">{i}" for i in ids])
+
+
+# ─── Scanning ────────────────────────────────────────────────────────────────
+def _lookup(allowed):
+    table = _RESIDUE.copy() if allowed is None else np.zeros(256, dtype=bool)
+    if allowed is not None:
+        table[np.frombuffer(allowed.upper().encode(), dtype=np.uint8)] = True
+    return table
+
+
+def scan(proteome, motif=CONSENSUS_MOTIF):
+    """(protein index, 1-based start) of every motif site, in sequence order."""
+    k = len(motif)
+    seq = proteome.seq
+    n = len(seq) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    tables = [_lookup(a) for a in motif]
+    # start from the most selective position, then filter the surviving candidates
+    order = sorted(range(k), key=lambda j: tables[j].sum())
+    starts = np.flatnonzero(tables[order[0]][seq[order[0]:order[0] + n]])
+    for j in order[1:]:
+        starts = starts[tables[j][seq[starts + j]]]
+    protein = np.searchsorted(proteome.offsets, starts, side="right") - 1
+    return protein, starts - proteome.offsets[protein] + 1
+
+
+def find_consensus_motifs(sequence, motif=CONSENSUS_MOTIF):
+    """``[(start, motif)]`` for one sequence (same output as the notebook's regex)."""
+    p = from_sequences({"seq": sequence})
+    _, starts = scan(p, motif)
+    return [(int(s), sequence[s - 1:s - 1 + len(motif)]) for s in starts]
+
+
+def closest_residue(sequence, aa, position):
+    """1-based position of the ``aa`` residue closest to ``position`` (None if absent)."""
+    arr = np.frombuffer(sequence.upper().encode(), dtype=np.uint8)
+    found = np.flatnonzero(arr == ord(aa.upper())) + 1
+    if not len(found):
+        return None
+    return int(found[np.argmin(np.abs(found - int(position)))])
+
+
+# ─── Tables ──────────────────────────────────────────────────────────────────
+def candidate_table(proteome, motif=CONSENSUS_MOTIF, first_sl=2):
+    """One row per motif site, in the layout of the AlphaFold entries workbook."""
+    protein, start = scan(proteome, motif)
+    k = len(motif)
+    abs_start = proteome.offsets[protein] + start - 1
+    windows = proteome.seq[abs_start[:, None] + np.arange(k)] if len(start) else np.empty((0, k), np.uint8)
+    motifs = windows.view(f"S{k}").ravel().astype(str) if len(start) else np.empty(0, dtype=str)
+    end = start + k - 1
+    sl = first_sl + np.unique(protein, return_inverse=True)[1] if len(protein) else protein
+    uniprot = proteome.ids[protein]
+    return pd.DataFrame({
+        "SL":                     sl,
+        "UniProt":                uniprot,
+        "Gene":                   proteome.genes[protein],
+        "Consensus Motifs Found": [f"[({s}, '{m}')]" for s, m in zip(start, motifs)],
+        "Consensus Motif Range":  pd.Series(start).astype(str).to_numpy() + "-" +
+                                  pd.Series(end).astype(str).to_numpy(),
+        "Extraction Method":      "Consensus Motif",
+        "motif":                  motifs,
+        "start":                  start,
+        "end":                    end,
+        "AlphaFold_PDB_ID":       "AF-" + pd.Series(uniprot, dtype=object).astype(str).to_numpy() + "-F1",
+    })
+
+
+def docking_entries(candidates, cdkl5=CDKL5_ENTRY):
+    """Candidates with the CDKL5 (``SL == 1``) row first, ready for ``docking_jobs``."""
+    genes = candidates["Gene"].fillna(candidates["UniProt"])
+    return pd.concat([pd.DataFrame([cdkl5]), candidates.assign(Gene=genes)], ignore_index=True)
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Scan a multi-FASTA for RPX[ST][AGPS] sites")
+    ap.add_argument("fasta")
+    ap.add_argument("--out", default="candidate_substrates.xlsx")
+    args = ap.parse_args(argv)
+
+    proteome = read_fasta(args.fasta)
+    table = candidate_table(proteome)
+    if args.out.endswith(".xlsx"):
+        table.to_excel(args.out, index=False)
+    else:
+        table.to_csv(args.out, index=False)
+    print(f"{len(table)} sites in {table['UniProt'].nunique()} of {len(proteome)} proteins → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
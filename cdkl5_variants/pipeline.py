@@ -0,0 +1,478 @@
+"""Declarative DAG runner for the workflow stages, with content-hashed skipping.
+
+The workflow was six notebooks and four scripts run by hand, in the README
+order, each with ``/project/ealexov/compbio/shamrat/250519_energy/...``
+hard-coded.  Here every step is a registered stage that declares its inputs and
+outputs as paths (or glob patterns) relative to one root::
+
+    @register_stage("docking", inputs={"capri": "03_haddock/*/[0-9]*_caprieval/capri_ss.tsv"},
+                    outputs={"summary": "03_haddock/07_energies/haddock_energy_summary.xlsx"})
+    def docking_stage(root, inputs, outputs): ...
+
+A stage depends on every stage that writes one of its inputs, which gives the
+graph::
+
+    cleaning ─┬─────────────────► pathogenicity
+              └─► reclassification ◄── folding, binding
+    docking
+
+``Pipeline.run`` hashes a stage's input files (SHA-1, reused while mtime and
+size are unchanged, as in ``haddock_energies.fingerprint``) together with the
+stage function's source; a stage whose key matches the last successful run and
+whose outputs exist is skipped.  Stages whose upstream stages are done are
+submitted to a process pool as soon as they become ready, so ``cleaning``,
+``folding``, ``binding`` and ``docking`` run side by side.  A failed stage
+blocks only its downstream stages.  Each stage is measured with
+``profiling.measure`` (wall/CPU time, peak RSS, bytes read and written, Excel /
+CSV / plotting call times) and every run leaves a report.  State is kept in::
+
+    <root>/.pipeline/state.json
+    <root>/.pipeline/runs/<time>.json, .parquet
+
+The root defaults to ``CDKL5_ROOT`` or the project directory; ``--root`` on
+the command line overrides both.  Changes to library code called by a stage
+are not part of its key — use ``force`` for those.
+"""
+import fnmatch
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, NamedTuple
+
+import pandas as pd
+
+from .ddg import CLASS_COL
+from .ddg_parsers import BINDING_DIR, FOLDING_DIR, TOOLS, build_store, read_store, tool_sources, \
+    wide_table, write_store
+from .haddock_energies import EnergyHarvester, fingerprint
+from .predictors import merge_predictors
+from .profiling import RunReport, measure, profile_suffix
+from .reclassify import Reclassifier
+from .variant_store import _arrow_safe
+from .variant_union import curated, union
+
+DEFAULT_ROOT = os.environ.get("CDKL5_ROOT", "/project/ealexov/compbio/shamrat/250519_energy")
+STATE_FILE = os.path.join(".pipeline", "state.json")
+RUN_DIR = os.path.join(".pipeline", "runs")
+PROFILE_DIR = os.path.join(".pipeline", "profiles")
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable              # func(root, inputs, outputs) → summary dict
+    inputs: dict                # label → path or glob (or tuple of them), relative to root
+    outputs: dict               # label → path relative to root
+
+
+STAGES = {}
+
+
+def register_stage(name, inputs=None, outputs=None):
+    """Register ``func(root, inputs, outputs)`` as stage ``name``.
+
+    ``func`` gets the resolved absolute paths: a string for a plain input,
+    a sorted list of matches for a glob or a tuple of patterns.
+    """
+    def wrap(func):
+        STAGES[name] = Stage(name, func, dict(inputs or {}), dict(outputs or {}))
+        return func
+    return wrap
+
+
+# ─── Graph ───────────────────────────────────────────────────────────────────
+def _patterns(spec):
+    return spec if isinstance(spec, (tuple, list)) else (spec,)
+
+
+def _is_pattern(spec):
+    return isinstance(spec, (tuple, list)) or glob.has_magic(spec)
+
+
+def dependencies(stages):
+    """{stage: set of stages writing one of its inputs}; raises on clashes and cycles."""
+    writers = {}
+    for st in stages.values():
+        for path in st.outputs.values():
+            path = os.path.normpath(path)
+            if path in writers:
+                raise ValueError(f"{path} is an output of both '{writers[path]}' and '{st.name}'")
+            writers[path] = st.name
+    deps = {}
+    for st in stages.values():
+        wanted = [os.path.normpath(p) for spec in st.inputs.values() for p in _patterns(spec)]
+        deps[st.name] = {w for path, w in writers.items() if w != st.name
+                         and any(path == p or fnmatch.fnmatch(path, p) for p in wanted)}
+    topological_order(deps)
+    return deps
+
+
+def topological_order(deps):
+    order, done, visiting = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"dependency cycle through stage '{name}'")
+        visiting.add(name)
+        for d in sorted(deps[name]):
+            visit(d)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in deps:
+        visit(name)
+    return order
+
+
+def _source_hash(func):
+    try:
+        text = inspect.getsource(func)
+    except (OSError, TypeError):
+        text = f"{func.__module__}.{func.__qualname__}"
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _execute(func, root, inputs, outputs, name, profile=None, dump=None):
+    """Run one stage (in a worker); returns (summary, ``profiling.measure`` record)."""
+    for path in outputs.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with measure(name, profile, dump) as record:
+        summary = func(root, inputs, outputs)
+    return summary or {}, record
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+class Pipeline:
+    def __init__(self, root=None, stages=None):
+        self.root = os.path.abspath(root or DEFAULT_ROOT)
+        self.stages = STAGES if stages is None else stages
+        self.deps = dependencies(self.stages)
+        self.order = topological_order(self.deps)
+        self.state_path = os.path.join(self.root, STATE_FILE)
+        self.state = self._load_state()
+        self.last_report = None
+
+    def _load_state(self):
+        if os.path.isfile(self.state_path):
+            with open(self.state_path) as fh:
+                return json.load(fh)
+        return {"files": {}, "stages": {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.state, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def path(self, rel):
+        return os.path.normpath(os.path.join(self.root, rel))
+
+    def resolve(self, spec):
+        """Absolute path of a plain input; sorted matching files of a pattern."""
+        if not _is_pattern(spec):
+            return self.path(spec)
+        return sorted({os.path.normpath(p) for pattern in _patterns(spec)
+                       for p in glob.glob(self.path(pattern)) if os.path.isfile(p)})
+
+    def upstream(self, names):
+        """``names`` and every stage they depend on, in run order."""
+        wanted, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise KeyError(f"unknown stage '{name}'")
+            if name not in wanted:
+                wanted.add(name)
+                todo.extend(self.deps[name])
+        return [n for n in self.order if n in wanted]
+
+    def stage_key(self, name):
+        """(key, resolved inputs) of a stage.
+
+        Raises FileNotFoundError for a missing plain input or a pattern input
+        that matches no file.
+        """
+        st = self.stages[name]
+        inputs = {label: self.resolve(spec) for label, spec in st.inputs.items()}
+        files = self.state.setdefault("files", {})
+        digest = []
+        for label, resolved in sorted(inputs.items()):
+            if not resolved:
+                raise FileNotFoundError(f"stage '{name}': no files match input '{label}'")
+            for p in ([resolved] if isinstance(resolved, str) else resolved):
+                if not os.path.isfile(p):
+                    raise FileNotFoundError(f"stage '{name}': input '{label}' not found: {p}")
+                files[p] = fingerprint(p, files.get(p))
+                digest.append((label, os.path.relpath(p, self.root), files[p]["sha1"]))
+        payload = json.dumps([name, _source_hash(st.func), digest])
+        return hashlib.sha1(payload.encode()).hexdigest(), inputs
+
+    def is_fresh(self, name, key):
+        prev = self.state.get("stages", {}).get(name, {})
+        return prev.get("key") == key and all(
+            os.path.exists(self.path(p)) for p in self.stages[name].outputs.values())
+
+    def status(self, targets=None):
+        """Which stages would run now: ``fresh`` / ``stale`` / ``missing input``.
+
+        Stages downstream of a stale stage are reported ``stale`` as well,
+        since their inputs will change, and stages downstream of one with a
+        missing input ``missing input``, since ``run`` would block them.
+        """
+        rows, stale, missing = [], set(), set()
+        for name in self.upstream(targets or self.order):
+            try:
+                key, _ = self.stage_key(name)
+                state = "fresh" if self.is_fresh(name, key) and not (self.deps[name] & stale) else "stale"
+            except FileNotFoundError:
+                state = "stale" if self.deps[name] & stale else "missing input"
+            if self.deps[name] & missing:
+                state = "missing input"
+            if state == "missing input":
+                missing.add(name)
+            if state != "fresh":
+                stale.add(name)
+            prev = self.state.get("stages", {}).get(name, {})
+            rows.append({"stage": name, "after": ",".join(sorted(self.deps[name])), "status": state,
+                         "last_run": prev.get("finished"), "seconds": prev.get("seconds")})
+        return pd.DataFrame(rows).set_index("stage")
+
+    def run(self, targets=None, force=False, workers=None, profile=None):
+        """Run ``targets`` (default: all) and the stages they need.
+
+        ``force`` reruns every selected stage; ``workers`` bounds the process
+        pool (``1`` runs stages in this process, one after the other).
+        Returns one report row per stage: ``ran``, ``skipped``, ``failed``,
+        ``missing input`` or ``blocked``, with its wall/CPU time, peak RSS and the summary the stage
+        returned.  The ``profiling`` records of the stages that ran are written
+        to ``<root>/.pipeline/runs/<time>.json`` and ``.parquet``
+        (``self.last_report``); with ``profile`` (``"cprofile"`` or
+        ``"pyinstrument"``) the slowest stage's profile is kept next to them.
+        """
+        selected = self.upstream(targets or self.order)
+        pending, outcome, report = list(selected), {}, {}
+        run = RunReport("pipeline")
+        pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+        running = {}
+        try:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.deps[name] & set(selected)
+                    if any(outcome.get(d) in ("failed", "missing input", "blocked") for d in deps):
+                        pending.remove(name)
+                        outcome[name] = "blocked"
+                        report[name] = {"status": "blocked", "seconds": 0.0}
+                        continue
+                    if not all(outcome.get(d) in ("ran", "skipped") for d in deps):
+                        continue
+                    pending.remove(name)
+                    try:
+                        key, inputs = self.stage_key(name)
+                    except FileNotFoundError as exc:
+                        outcome[name] = "missing input"
+                        report[name] = {"status": "missing input", "seconds": 0.0, "error": str(exc)}
+                        continue
+                    if not force and self.is_fresh(name, key):
+                        outcome[name] = "skipped"
+                        report[name] = {"status": "skipped", "seconds": 0.0}
+                        continue
+                    st = self.stages[name]
+                    outputs = {label: self.path(p) for label, p in st.outputs.items()}
+                    dump = self.path(os.path.join(PROFILE_DIR, name + profile_suffix(profile))) \
+                        if profile else None
+                    if dump:
+                        os.makedirs(os.path.dirname(dump), exist_ok=True)
+                    args = (st.func, self.root, inputs, outputs, name, profile, dump)
+                    if pool is None:
+                        running[name] = (key, _inline(*args))
+                    else:
+                        running[name] = (key, pool.submit(_execute, *args))
+                if not running:
+                    continue
+                done, _ = wait([f for _, f in running.values()], return_when=FIRST_COMPLETED)
+                for name in [n for n, (_, f) in running.items() if f in done]:
+                    key, fut = running.pop(name)
+                    try:
+                        summary, record = fut.result()
+                    except Exception as exc:
+                        outcome[name] = "failed"
+                        report[name] = {"status": "failed", "seconds": 0.0,
+                                        "error": f"{type(exc).__name__}: {exc}"}
+                        continue
+                    outcome[name] = "ran"
+                    run.add(record)
+                    seconds = record["wall_s"]
+                    report[name] = {"status": "ran", "seconds": seconds, "cpu_s": record["cpu_s"],
+                                    "peak_rss_mb": record["peak_rss_mb"], **summary}
+                    self.state.setdefault("stages", {})[name] = {
+                        "key": key, "seconds": seconds, "summary": summary,
+                        "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    self._save_state()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self._save_state()
+        self.last_report = None
+        if run.records:
+            if profile:
+                kept = run.keep_slowest_profile()
+                prof_dir = self.path(PROFILE_DIR)
+                for f in os.listdir(prof_dir):         # failed stages and earlier runs
+                    if os.path.join(prof_dir, f) != kept:
+                        os.remove(os.path.join(prof_dir, f))
+            stem = self.path(os.path.join(RUN_DIR, time.strftime("%Y%m%d-%H%M%S")))
+            run.write(stem + ".parquet")
+            self.last_report = run.write(stem + ".json")
+        return pd.DataFrame([{"stage": n, **report[n]} for n in selected]).set_index("stage")
+
+
+def _inline(*args):
+    """A finished future holding ``_execute``'s result, for ``workers=1``."""
+    fut = Future()
+    try:
+        fut.set_result(_execute(*args))
+    except Exception as exc:
+        fut.set_exception(exc)
+    return fut
+
+
+# ─── Stages ──────────────────────────────────────────────────────────────────
+VARIANTS = "00_data/variant_union.parquet"
+FOLDING_STORE = "00_data/ddg_folding.parquet"
+BINDING_STORE = "00_data/ddg_binding.parquet"
+RECLASS_STATE = "04.5_reclassification/reclass_state"
+
+
+def _tool_patterns(stage):
+    return tuple(os.path.join(t.stage, t.folder, p) for t in TOOLS.values() if t.stage == stage
+                 for p in t.patterns)
+
+
+def _write_parquet(df, path):
+    tmp = path + ".tmp"
+    _arrow_safe(df).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+@register_stage("cleaning",
+                inputs={"clinvar": "00_data/clinvar_result.txt", "gnomad": "00_data/gnomAD.csv",
+                        "1kgp": "00_data/1kgp_cdkl5_grch38.xlsx", "hector2017": "00_data/hector2017.xlsx"},
+                outputs={"variants": VARIANTS})
+def cleaning_stage(root, inputs, outputs):
+    """Curated ClinVar + 1KGP + Hector2017 variants with gnomAD AF (``variant_union``)."""
+    from .fetch import uniprot_sequence
+
+    table, report = union(inputs)
+    table = curated(table, sequence=uniprot_sequence("O76039"))
+    _write_parquet(table, outputs["variants"])
+    return {"variants": len(table)}
+
+
+def _ddg_stage(root, stage, outputs):
+    methods = [m for m, t in TOOLS.items() if t.stage == stage]
+    store, report = build_store(tool_sources(root, methods))
+    if store.empty:
+        raise RuntimeError(f"No ΔΔG values parsed from the {stage} tool outputs.")
+    write_store(store, outputs["store"])
+    return {"files": int(report["files"].sum()), "values": len(store)}
+
+
+@register_stage("folding", inputs={"results": _tool_patterns(FOLDING_DIR)},
+                outputs={"store": FOLDING_STORE})
+def folding_stage(root, inputs, outputs):
+    """Every folding ΔΔG tool output → long store (``ddg_parsers``)."""
+    return _ddg_stage(root, FOLDING_DIR, outputs)
+
+
+@register_stage("binding", inputs={"results": _tool_patterns(BINDING_DIR)},
+                outputs={"store": BINDING_STORE})
+def binding_stage(root, inputs, outputs):
+    """Every binding ΔΔG tool output → long store (``ddg_parsers``)."""
+    return _ddg_stage(root, BINDING_DIR, outputs)
+
+
+@register_stage("docking", inputs={"capri": "03_haddock/*/[0-9]*_caprieval/capri_ss.tsv"},
+                outputs={"components": "03_haddock/07_energies/haddock_energy_components.csv",
+                         "summary": "03_haddock/07_energies/haddock_energy_summary.xlsx"})
+def docking_stage(root, inputs, outputs):
+    """HADDOCK energy harvest, as in ``250728_haddock_energies.py``."""
+    harvester = EnergyHarvester(os.path.join(root, "03_haddock"), os.path.dirname(outputs["summary"]))
+    report = harvester.harvest()
+    if not harvester.manifest["runs"]:
+        raise RuntimeError("No energy data found for any complex.")
+    harvester.components().to_csv(outputs["components"], index=False)
+    harvester.summary().to_excel(outputs["summary"])
+    return {"runs": len(harvester.manifest["runs"]), "parsed": len(report["parsed"])}
+
+
+@register_stage("pathogenicity",
+                inputs={"variants": VARIANTS,
+                        "polyphen2": "05_pathogenicity/01_polyphen2/cdkl5_mutation_polyphen2_results.tsv",
+                        "mutpred2": "05_pathogenicity/02_mutpred2/cdkl5_mutation_mutpred2_part*_result.csv",
+                        "esm1v": "05_pathogenicity/03_esm/cdkl5_esm1v_scores.xlsx",
+                        "alphamissense": "05_pathogenicity/08_alphamissense/AF-O76039-F1-hg38.csv"},
+                outputs={"table": "05_pathogenicity/cdkl5_all_predictors.parquet",
+                         "xlsx": "05_pathogenicity/cdkl5_all_predictors.xlsx"})
+def pathogenicity_stage(root, inputs, outputs):
+    """All predictors joined onto the variants in one pass (section 10 of ``05_pathogenicity.py``)."""
+    sources = {k: v for k, v in inputs.items() if k != "variants"}
+    merged, coverage = merge_predictors(pd.read_parquet(inputs["variants"]), sources)
+    _write_parquet(merged, outputs["table"])
+    merged.to_excel(outputs["xlsx"], index=False)
+    return {f"{name}_matched": int(n) for name, n in coverage["matched"].items()}
+
+
+@register_stage("reclassification",
+                inputs={"variants": VARIANTS, "folding": FOLDING_STORE, "binding": BINDING_STORE},
+                outputs={"results": "04.5_reclassification/reclassification.xlsx"})
+def reclassification_stage(root, inputs, outputs):
+    """ΔΔG_Fmax / ΔΔG_Bmax reclassification (``reclassify``), incremental across runs."""
+    variants = pd.read_parquet(inputs["variants"], columns=["mutation", "position", CLASS_COL])
+    tables = {}
+    for name in ("folding", "binding"):
+        wide = wide_table(read_store(inputs[name]))
+        if not variants["mutation"].isin(wide.index).any():
+            raise RuntimeError(f"No {name} ΔΔG values for any variant.")
+        tables[name] = variants.merge(wide, left_on="mutation", right_index=True, how="left")
+    engine = Reclassifier(os.path.join(root, RECLASS_STATE))
+    report = engine.run(tables)
+    if report["threshold"].isna().any():
+        raise RuntimeError("No ΔΔG cutoff for: " + ", ".join(report.index[report["threshold"].isna()]))
+    engine.results().to_excel(outputs["results"], index=False)
+    return {f"{name}_threshold": float(report.loc[name, "threshold"]) for name in report.index}
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run the CDKL5 workflow stages as a DAG")
+    ap.add_argument("stages", nargs="*", help=f"targets (default: all of {', '.join(STAGES)})")
+    ap.add_argument("--root", default=None, help=f"project root (default: $CDKL5_ROOT or {DEFAULT_ROOT})")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (1: run serially)")
+    ap.add_argument("--force", action="store_true", help="rerun the selected stages even if unchanged")
+    ap.add_argument("--status", action="store_true", help="only show which stages are stale")
+    ap.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=None,
+                    help="keep a profile of the slowest stage")
+    args = ap.parse_args(argv)
+
+    pipe = Pipeline(args.root)
+    if args.status:
+        print(pipe.status(args.stages or None).to_string())
+        return
+    report = pipe.run(args.stages or None, force=args.force, workers=args.workers, profile=args.profile)
+    print(report.to_string())
+    if pipe.last_report:
+        print(f"Run report: {pipe.last_report}")
+    if report["status"].isin(["failed", "missing input"]).any():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Single-pass merge of pathogenicity predictor results onto the variant table.
+
+Each predictor registers a parser that turns its result file (or an already
+loaded frame) into rows with ``wild``, ``position``, ``mutant`` and the columns
+to pull.  ``merge_predictors`` encodes every table to one integer
+(wild, position, mutant) key, indexes each result once and gathers all
+predictor columns onto the variants together, reporting per-predictor coverage.
+
+Results are always matched on the full substitution.  PolyPhen-2 used to be
+mapped by ``position`` alone after ``drop_duplicates(subset='position')``, which
+gave every variant at a position the first substitution's score.
+"""
+import numpy as np
+import pandas as pd
+
+from .esm1v import AA_INDEX
+from .saturation import parse_mutations
+
+PARSERS = {}
+
+MUTPRED2_COLUMNS = ["ID", "Substitution", "MutPred2_score", "Molecular_mechanisms",
+                    "Affected_PROSITE_and_ELM_Motifs", "Remarks"]
+
+
+def register_parser(name):
+    def wrap(func):
+        PARSERS[name] = func
+        return func
+    return wrap
+
+
+def _as_frames(source, reader):
+    if isinstance(source, pd.DataFrame):
+        return [source]
+    if isinstance(source, (list, tuple)):
+        return [s if isinstance(s, pd.DataFrame) else reader(s) for s in source]
+    return [reader(source)]
+
+
+def _read_table(path):
+    if str(path).endswith((".xlsx", ".xls")):
+        return pd.read_excel(path, engine="openpyxl")
+    return pd.read_csv(path)
+
+
+def _with_mutation_key(df, column):
+    wt, pos, mt = parse_mutations(df[column])
+    return df.assign(wild=wt, position=pos, mutant=mt)
+
+
+# ─── Parsers ─────────────────────────────────────────────────────────────────
+@register_parser("polyphen2")
+def parse_polyphen2(source):
+    """PolyPhen-2 batch TSV (``pph2_full``/``short``) or the converted workbook."""
+    def read(path):
+        if str(path).endswith((".xlsx", ".xls")):
+            return pd.read_excel(path, engine="openpyxl")
+        return pd.read_csv(path, sep="\t", dtype=str)
+
+    df = pd.concat(_as_frames(source, read), ignore_index=True)
+    df.columns = [str(c).strip().lstrip("#") for c in df.columns]
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].str.strip()
+    out = pd.DataFrame({
+        "wild":       df["aa1"].str.upper(),
+        "position":   pd.to_numeric(df["pos"], errors="coerce"),
+        "mutant":     df["aa2"].str.upper(),
+        "prediction": df["prediction"],
+    })
+    for col in ("pph2_prob", "pph2_FPR", "pph2_TPR"):
+        out[col] = pd.to_numeric(df[col], errors="coerce")
+    return out
+
+
+@register_parser("mutpred2")
+def parse_mutpred2(source):
+    """MutPred2 result CSVs (headerless parts, concatenated in order)."""
+    def read(path):
+        return pd.read_csv(path, header=None, names=MUTPRED2_COLUMNS)
+
+    df = pd.concat(_as_frames(source, read), ignore_index=True)
+    df = df[df["Substitution"] != "Substitution"]  # tolerate parts saved with a header
+    df = _with_mutation_key(df, "Substitution")
+    df["MutPred2_score"] = pd.to_numeric(df["MutPred2_score"], errors="coerce")
+    return df[["wild", "position", "mutant", "MutPred2_score", "Molecular_mechanisms",
+               "Affected_PROSITE_and_ELM_Motifs", "Remarks"]]
+
+
+@register_parser("esm1v")
+def parse_esm1v(source):
+    """ESM-1v score table (``cdkl5_esm1v_scores.xlsx`` or ``score_variants`` output)."""
+    df = pd.concat(_as_frames(source, _read_table), ignore_index=True)
+    df = _with_mutation_key(df, "mutation")
+    cols = [c for c in ("wt_score", "wild_score", "mut_score", "delta_score") if c in df.columns]
+    return df[["wild", "position", "mutant"] + cols]
+
+
+@register_parser("alphamissense")
+def parse_alphamissense(source):
+    """AlphaMissense per-protein CSV (``AF-O76039-F1-hg38.csv``)."""
+    def read(path):
+        return pd.read_csv(path, usecols=["protein_variant", "am_pathogenicity", "am_class"])
+
+    df = pd.concat(_as_frames(source, read), ignore_index=True)
+    df = _with_mutation_key(df, "protein_variant")
+    return df[["wild", "position", "mutant", "am_pathogenicity", "am_class"]]
+
+
+# ─── Merge engine ────────────────────────────────────────────────────────────
+def variant_keys(wild, position, mutant):
+    """Encode (wild, position, mutant) as one int64; -1 where any part is invalid."""
+    wi = pd.Series(wild, dtype="string").str.upper().map(AA_INDEX).to_numpy(dtype=float, na_value=np.nan)
+    mi = pd.Series(mutant, dtype="string").str.upper().map(AA_INDEX).to_numpy(dtype=float, na_value=np.nan)
+    pos = pd.to_numeric(pd.Series(position), errors="coerce").to_numpy(dtype=float)
+    ok = ~(np.isnan(wi) | np.isnan(mi) | np.isnan(pos)) & (pos > 0)
+    keys = np.full(len(pos), -1, dtype=np.int64)
+    keys[ok] = (pos[ok].astype(np.int64) * 20 + wi[ok].astype(np.int64)) * 20 + mi[ok].astype(np.int64)
+    return keys
+
+
+def merge_predictors(variants_df, sources, parsers=None):
+    """Join every predictor in ``sources`` ({name: path, paths or frame}) onto ``variants_df``.
+
+    Returns ``(merged, coverage)``.  ``merged`` keeps the variant rows and order;
+    predictor columns that clash with existing ones get a ``_<name>`` suffix.
+    ``coverage`` has one row per predictor, including the ``columns`` it added.
+    """
+    parsers = PARSERS if parsers is None else parsers
+    keys = variant_keys(variants_df["wild"], variants_df["position"], variants_df["mutant"])
+    valid = keys >= 0
+    merged = variants_df.reset_index(drop=True).copy()
+    report = []
+    for name, source in sources.items():
+        res = parsers[name](source)
+        rkeys = variant_keys(res["wild"], res["position"], res["mutant"])
+        keep = rkeys >= 0
+        res, rkeys = res[keep].reset_index(drop=True), rkeys[keep]
+        first = ~pd.Index(rkeys).duplicated(keep="first")
+        res, rkeys = res[first].reset_index(drop=True), rkeys[first]
+        idx = pd.Index(rkeys).get_indexer(keys)
+        idx[~valid] = -1
+        hit = idx >= 0
+        added = []
+        for col in res.columns.drop(["wild", "position", "mutant"]):
+            out = col if col not in merged.columns else f"{col}_{name}"
+            added.append(out)
+            vals = res[col].to_numpy()
+            if vals.dtype.kind in "iuf":
+                col_vals = np.full(len(keys), np.nan, dtype=np.float64)
+            else:
+                col_vals = np.full(len(keys), None, dtype=object)
+            col_vals[hit] = vals[idx[hit]]
+            merged[out] = col_vals
+        report.append({
+            "predictor":       name,
+            "results":         int(keep.sum()),
+            "duplicate_keys":  int((~first).sum()),
+            "invalid_rows":    int((~keep).sum()),
+            "matched":         int(hit.sum()),
+            "coverage":        hit.sum() / len(keys) if len(keys) else np.nan,
+            "unused_results":  int(len(rkeys) - np.isin(rkeys, keys[hit]).sum()),
+            "columns":         added,
+        })
+    return merged, pd.DataFrame(report).set_index("predictor")
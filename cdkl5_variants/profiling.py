@@ -0,0 +1,415 @@
+"""Stage-level timing, memory and I/O instrumentation with a machine-readable run report.
+
+Nothing in ``05_pathogenicity.py``, ``250630_relcassification.py`` or
+``250728_haddock_energies.py`` recorded timings, so there was no way to tell
+whether Excel I/O, result parsing, ``apply`` or plotting dominated a run.
+``measure`` wraps one stage and records
+
+* wall time, CPU time (this process and reaped children) and peak RSS — the
+  kernel's high-water mark is reset at the start of the stage
+  (``/proc/self/clear_refs``), elsewhere it is the process peak so far;
+* bytes read/written by the process (``/proc/self/io``: ``rchar``/``wchar``);
+* per call kind (``read_excel``, ``to_excel``, ``read_csv``, ``savefig``,
+  ``apply``, ``inference``, ...): number of calls, seconds and file bytes.
+  The calls in ``CALLS`` are patched only while a stage is measured; a call
+  made inside another tracked call is counted once, by the outer one.
+
+A ``RunReport`` collects the stage records and writes them as JSON (nested)
+or Parquet (one row per stage, ``<kind>_n`` / ``<kind>_s`` / ``<kind>_bytes``
+columns).  With ``profile="cprofile"`` (or ``"pyinstrument"`` if installed)
+every stage is profiled and only the dump of the slowest one is kept.
+
+Scripts and notebooks are profiled section by section from the command line::
+
+    python -m cdkl5_variants.profiling 05_pathogenicity/05_pathogenicity.py \\
+        --out run_report.json --profile cprofile
+
+A script section starts at a header comment (``## A) ...``, ``# ─── 1.3 ...``,
+``# === 2.3b ...``, or any comment after two blank lines); a notebook section is a
+code cell, named after the markdown heading above it.  ``pipeline.Pipeline``
+measures each of its stages the same way.
+"""
+import contextlib
+import functools
+import importlib
+import json
+import os
+import re
+import resource
+import socket
+import sys
+import threading
+import time
+
+import pandas as pd
+
+CALLS = {}          # (module, "Owner.attr" or "function") → (kind, path argument index)
+
+
+def register_call(kind, module, name, path_arg=None):
+    """Track ``module.name`` as ``kind``; ``path_arg`` is the positional index of its file path."""
+    CALLS[(module, name)] = (kind, path_arg)
+
+
+register_call("read_excel", "pandas", "read_excel", 0)
+register_call("read_csv", "pandas", "read_csv", 0)
+register_call("read_parquet", "pandas", "read_parquet", 0)
+register_call("to_excel", "pandas", "DataFrame.to_excel", 1)
+register_call("to_csv", "pandas", "DataFrame.to_csv", 1)
+register_call("to_parquet", "pandas", "DataFrame.to_parquet", 1)
+register_call("apply", "pandas", "DataFrame.apply")
+register_call("apply", "pandas", "Series.apply")
+register_call("savefig", "matplotlib.figure", "Figure.savefig", 1)
+register_call("inference", "cdkl5_variants.esm1v", "Esm1vModel.log_probs")
+register_call("inference", "cdkl5_variants.esm1v", "ToyMaskedLM.log_probs")
+
+_PATH_KWARGS = ("io", "filepath_or_buffer", "path", "excel_writer", "path_or_buf", "fname")
+
+_active = []                # records of the stages being measured
+_lock = threading.Lock()
+_local = threading.local()
+_patched = {}               # (owner, attr) → original, or None if inherited
+_depth = 0
+
+
+# ─── Call tracking ───────────────────────────────────────────────────────────
+def _file_size(args, kwargs, path_arg):
+    path = args[path_arg] if path_arg is not None and len(args) > path_arg else None
+    if path is None:
+        path = next((kwargs[k] for k in _PATH_KWARGS if k in kwargs), None)
+    try:
+        return os.path.getsize(path) if isinstance(path, (str, os.PathLike)) else 0
+    except OSError:
+        return 0
+
+
+def _tally(kind, seconds, nbytes):
+    with _lock:
+        if not _active:
+            return
+        c = _active[-1]["calls"].setdefault(kind, {"n": 0, "s": 0.0, "bytes": 0})
+        c["n"] += 1
+        c["s"] += seconds
+        c["bytes"] += nbytes
+
+
+def _wrap(func, kind, path_arg):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _active or getattr(_local, "busy", False):
+            return func(*args, **kwargs)
+        _local.busy = True
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.busy = False
+            # files are measured after the call: before it for reads is the same size
+            _tally(kind, time.perf_counter() - start, _file_size(args, kwargs, path_arg))
+    return wrapper
+
+
+def _resolve(module, name):
+    owner = importlib.import_module(module)
+    *path, attr = name.split(".")
+    for part in path:
+        owner = getattr(owner, part)
+    return owner, attr
+
+
+@contextlib.contextmanager
+def instrument(calls=None):
+    """Patch the tracked calls for the duration of the block (re-entrant)."""
+    global _depth
+    with _lock:
+        if _depth == 0:
+            for (module, name), (kind, path_arg) in (calls or CALLS).items():
+                try:
+                    owner, attr = _resolve(module, name)
+                except (ImportError, AttributeError):
+                    continue        # optional dependency (matplotlib, esm) not installed
+                _patched[(owner, attr)] = owner.__dict__.get(attr)
+                setattr(owner, attr, _wrap(getattr(owner, attr), kind, path_arg))
+        _depth += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _depth -= 1
+            if _depth == 0:
+                for (owner, attr), original in _patched.items():
+                    if original is None:
+                        delattr(owner, attr)
+                    else:
+                        setattr(owner, attr, original)
+                _patched.clear()
+
+
+# ─── Process counters ────────────────────────────────────────────────────────
+def _read_proc(name):
+    try:
+        with open(f"/proc/self/{name}") as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark; False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    status = _read_proc("status")
+    m = re.search(r"^VmHWM:\s+(\d+) kB", status or "", re.M)
+    if m:
+        return int(m.group(1)) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / 2 ** 20
+
+
+def _io_bytes():
+    text = _read_proc("io")
+    if text is None:
+        return None, None
+    fields = dict(line.split(": ") for line in text.splitlines() if ": " in line)
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+def _cpu_seconds():
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+# ─── Profilers ───────────────────────────────────────────────────────────────
+def _start_profiler(kind):
+    if kind is None:
+        return None
+    if kind == "cprofile":
+        import cProfile
+
+        prof = cProfile.Profile()
+    elif kind == "pyinstrument":
+        from pyinstrument import Profiler      # optional dependency
+
+        prof = Profiler()
+    else:
+        raise ValueError(f"unknown profiler '{kind}' (cprofile or pyinstrument)")
+    prof.enable() if kind == "cprofile" else prof.start()
+    return prof
+
+
+def _stop_profiler(prof, kind, dump):
+    if kind == "cprofile":
+        prof.disable()
+        prof.dump_stats(dump)
+    else:
+        prof.stop()
+        with open(dump, "w") as fh:
+            fh.write(prof.output_html())
+
+
+def profile_suffix(kind):
+    return ".prof" if kind == "cprofile" else ".html"
+
+
+# ─── Stages ──────────────────────────────────────────────────────────────────
+@contextlib.contextmanager
+def measure(name, profile=None, dump=None):
+    """Measure the block as stage ``name``; yields the record, filled in on exit.
+
+    With ``profile`` the block also runs under that profiler and the result
+    is written to ``dump``.
+    """
+    record = {"stage": name, "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "calls": {}}
+    with instrument():
+        record["peak_rss_reset"] = _reset_peak_rss()
+        read0, write0 = _io_bytes()
+        cpu0, wall0 = _cpu_seconds(), time.perf_counter()
+        prof = _start_profiler(profile)
+        with _lock:
+            _active.append(record)
+        record["ok"] = False
+        try:
+            yield record
+            record["ok"] = True
+        finally:
+            with _lock:
+                _active.remove(record)
+            record["wall_s"] = time.perf_counter() - wall0
+            record["cpu_s"] = _cpu_seconds() - cpu0
+            if prof is not None:
+                _stop_profiler(prof, profile, dump)
+                record["profile"] = dump
+            record["peak_rss_mb"] = _peak_rss_mb()
+            read1, write1 = _io_bytes()
+            record["read_bytes"] = None if read0 is None else read1 - read0
+            record["write_bytes"] = None if write0 is None else write1 - write0
+
+
+class RunReport:
+    def __init__(self, name=None):
+        self.meta = {"name": name, "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     "host": socket.gethostname(), "python": sys.version.split()[0],
+                     "argv": sys.argv}
+        self.records = []
+
+    def stage(self, name, profile=None, dump_dir="."):
+        """``measure`` context whose record is added to this report."""
+        dump = None
+        if profile is not None:
+            os.makedirs(dump_dir, exist_ok=True)
+            safe = re.sub(r"[^\w.-]+", "_", name).strip("_")[:60] or "stage"
+            dump = os.path.join(dump_dir, f"{len(self.records):03d}_{safe}{profile_suffix(profile)}")
+        cm = measure(name, profile, dump)
+
+        @contextlib.contextmanager
+        def wrapped():
+            with cm as record:
+                self.records.append(record)
+                yield record
+        return wrapped()
+
+    def add(self, record):
+        self.records.append(record)
+
+    def slowest(self):
+        return max(self.records, key=lambda r: r.get("wall_s", 0.0), default=None)
+
+    def keep_slowest_profile(self):
+        """Delete every profile dump except the slowest stage's; returns its path."""
+        slow = self.slowest()
+        for r in self.records:
+            if r is not slow and r.get("profile"):
+                with contextlib.suppress(OSError):
+                    os.remove(r.pop("profile"))
+        return slow.get("profile") if slow else None
+
+    def stages(self):
+        """One row per stage with the counters and ``<kind>_n/_s/_bytes`` per call kind."""
+        rows = []
+        for r in self.records:
+            row = {k: v for k, v in r.items() if k != "calls"}
+            tracked = 0.0
+            for kind, c in sorted(r["calls"].items()):
+                row[f"{kind}_n"], row[f"{kind}_s"], row[f"{kind}_bytes"] = c["n"], c["s"], c["bytes"]
+                tracked += c["s"]
+            row["untracked_s"] = r.get("wall_s", 0.0) - tracked
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def calls(self):
+        """Long table: stage, kind, n, s, bytes."""
+        rows = [{"stage": r["stage"], "kind": kind, **c}
+                for r in self.records for kind, c in r["calls"].items()]
+        return pd.DataFrame(rows, columns=["stage", "kind", "n", "s", "bytes"])
+
+    def write(self, path):
+        """``.parquet`` → the ``stages`` table; anything else → JSON with metadata and calls."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        if path.endswith(".parquet"):
+            self.stages().to_parquet(tmp, index=False)
+        else:
+            with open(tmp, "w") as fh:
+                json.dump({**self.meta, "stages": self.records}, fh, indent=1, default=str)
+        os.replace(tmp, path)
+        return path
+
+
+# ─── Scripts and notebooks ───────────────────────────────────────────────────
+SECTION_RE = re.compile(r"^(?:## |# [─=]{3})")
+
+
+def _is_header(lines, i):
+    """``## ...``, ``# ─── ...``, ``# === ...``, or any comment after two blank lines."""
+    if not re.search(r"\w", lines[i]):
+        return False                # a ruler line closing a boxed header
+    if SECTION_RE.match(lines[i]):
+        return True
+    return lines[i].startswith("# ") and i >= 2 and not lines[i - 1].strip() and not lines[i - 2].strip()
+
+
+def script_sections(text):
+    """[(name, first line, source)] split at header comments, merged until each compiles."""
+    lines = text.splitlines(keepends=True)
+    starts = [0] + [i for i in range(1, len(lines)) if _is_header(lines, i)] + [len(lines)]
+    sections, begin = [], 0
+    for end in starts[1:]:
+        if end <= begin:
+            continue
+        source = "".join(lines[begin:end])
+        try:
+            compile(source, "<section>", "exec")
+        except SyntaxError:
+            if end < len(lines):
+                continue            # header inside a block; extend to the next one
+            raise
+        header = next((l for l in lines[begin:end] if l.startswith("#") and not l.startswith("#!")), "")
+        name = re.sub(r"^[#\s─=—-]+|[\s─=—-]+$", "", header) or f"line {begin + 1}"
+        sections.append((name, begin, source))
+        begin = end
+    return sections
+
+
+def notebook_sections(path):
+    """[(name, 0, source)] per code cell; IPython magics and shell lines are commented out."""
+    with open(path) as fh:
+        nb = json.load(fh)
+    sections, heading = [], ""
+    for i, cell in enumerate(nb["cells"]):
+        source = "".join(cell["source"])
+        if cell["cell_type"] == "markdown":
+            heading = next((l.lstrip("# ").strip() for l in source.splitlines() if l.startswith("#")), heading)
+        elif cell["cell_type"] == "code" and source.strip():
+            source = re.sub(r"^(\s*)([%!])", r"\1# \2", source, flags=re.M)
+            sections.append((f"[{i}] {heading}".strip(), 0, source))
+    return sections
+
+
+def profile_script(path, report=None, profile=None, dump_dir="."):
+    """Run a ``.py`` script or ``.ipynb`` notebook, one ``report`` stage per section."""
+    report = report or RunReport(os.path.basename(path))
+    if path.endswith(".ipynb"):
+        sections = notebook_sections(path)
+    else:
+        with open(path) as fh:
+            sections = script_sections(fh.read())
+    namespace = {"__name__": "__main__", "__file__": os.path.abspath(path)}
+    for name, first_line, source in sections:
+        code = compile("\n" * first_line + source, path, "exec")
+        with report.stage(name, profile, dump_dir):
+            exec(code, namespace)
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Profile a workflow script or notebook section by section")
+    ap.add_argument("script", help=".py script or .ipynb notebook")
+    ap.add_argument("--out", default="run_report.json", help=".json or .parquet")
+    ap.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=None,
+                    help="keep a profile of the slowest section")
+    ap.add_argument("--profile-dir", default="profiles")
+    args = ap.parse_args(argv)
+
+    report = RunReport(os.path.basename(args.script))
+    try:
+        profile_script(args.script, report, args.profile, args.profile_dir)
+    finally:
+        if args.profile:
+            print(f"Slowest section profile: {report.keep_slowest_profile()}")
+        report.write(args.out)
+        cols = ["stage", "wall_s", "cpu_s", "peak_rss_mb", "untracked_s"]
+        print(report.stages()[cols].round(3).to_string(index=False))
+        print(f"✅ {len(report.records)} sections → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Incremental ΔΔG reclassification: only variants whose inputs changed are recomputed.
+
+Each stage declares which workbook columns a variant's score depends on.  For
+every variant the stage stores a hash of those inputs (and of the germline
+class, which the threshold depends on) next to its score and class::
+
+    <state_dir>/<stage>.parquet     mutation, position, class, input_hash, score, ..., reclass
+    <state_dir>/state.json          per-stage threshold and benign max / pathogenic min
+
+On ``update`` a stage
+
+1. hashes the inputs of every variant in the new table and compares them with
+   the stored hashes; new or changed rows are *dirty*, missing rows are dropped;
+2. computes the score (``ddG_Fmax``/``ddG_Bmax``) for the dirty rows only;
+3. re-derives ``(max Benign + min Pathogenic) / 2`` from the stored scores;
+4. re-evaluates the class of the dirty rows and, if the threshold moved, of
+   the uncertain variants whose score lies between the old and new threshold,
+   which are the only ones that can flip.
+
+Adding a predictor column changes the declared inputs of every row, so that
+case falls back to a full recompute automatically.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .ddg import (CLASS_COL, EXCLUDED_METHODS, KINASE_DOMAIN, _nanmax, _restrict,
+                  _select_complexes, folding_columns)
+from .ddg_tensor import _WIDE_RE, DdgTensor
+
+BENIGN, PATHOGENIC = "Benign", "Pathogenic"
+BINDING_TARGETS = {"SOX9": "197-202", "AMPH1": "290-294", "GATAD2A": "97-101", "ZNF219": "111-115"}
+
+
+# ─── Stages ──────────────────────────────────────────────────────────────────
+class Stage:
+    """A per-variant score with a midpoint threshold; subclasses define inputs and score."""
+    name = None
+    score_col = None
+
+    def inputs(self, columns):
+        raise NotImplementedError
+
+    def compute(self, frame):
+        """DataFrame (same row order as ``frame``) with ``score_col`` and any extra columns."""
+        raise NotImplementedError
+
+
+class FoldingStage(Stage):
+    name, score_col = "folding", "ddG_Fmax"
+
+    def __init__(self, exclude=EXCLUDED_METHODS):
+        self.exclude = tuple(exclude)
+
+    def inputs(self, columns):
+        return folding_columns(columns, self.exclude)
+
+    def compute(self, frame):
+        cols = self.inputs(frame.columns)
+        values = np.abs(frame[cols].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64))
+        return pd.DataFrame({self.score_col: _nanmax(values, axis=1)}, index=frame.index)
+
+
+class BindingStage(Stage):
+    name, score_col = "binding", "ddG_Bmax"
+
+    def __init__(self, targets=BINDING_TARGETS, exclude=EXCLUDED_METHODS):
+        self.targets = dict(targets)
+        self.exclude = tuple(exclude)
+
+    def inputs(self, columns):
+        cols = []
+        for c in columns:
+            m = _WIDE_RE.match(str(c))
+            if not m or any(x in m.group("method").lower() for x in self.exclude):
+                continue
+            parts = m.group("complex").split("_")
+            if self.targets.get("_".join(parts[1:-1])) == parts[-1]:
+                cols.append(c)
+        return cols
+
+    def compute(self, frame):
+        cols = self.inputs(frame.columns)
+        tensor = DdgTensor.from_wide(frame[["mutation"] + cols], exclude=self.exclude)
+        tensor, genes = _select_complexes(tensor, self.targets)
+        avg, _ = tensor.partner_average()
+        out = pd.DataFrame(avg, columns=[f"ddG_B_{g}" for g in genes], index=frame.index)
+        out[self.score_col] = _nanmax(avg, axis=1) if len(genes) else np.nan
+        return out
+
+
+def row_hashes(frame, columns):
+    """uint64 per row over ``columns`` (salted with the column names themselves)."""
+    salt = int(hashlib.sha1("\0".join(columns).encode()).hexdigest()[:15], 16)
+    h = pd.util.hash_pandas_object(frame[columns], index=False).to_numpy(dtype=np.uint64)
+    return h ^ np.uint64(salt)
+
+
+def midpoint(scores, classes):
+    """(threshold, benign max, pathogenic min) over the labelled variants."""
+    ben = scores[classes == BENIGN]
+    pat = scores[classes == PATHOGENIC]
+    ben_max = float(np.nanmax(ben)) if np.isfinite(ben).any() else np.nan
+    pat_min = float(np.nanmin(pat)) if np.isfinite(pat).any() else np.nan
+    return (ben_max + pat_min) / 2, ben_max, pat_min
+
+
+def reclass(scores, classes, threshold):
+    """Uncertain variants become Pathogenic at ``score >= threshold`` and Benign below it."""
+    out = np.asarray(classes, dtype=object).copy()
+    uncertain = ~np.isin(out, [BENIGN, PATHOGENIC])
+    with np.errstate(invalid="ignore"):
+        out[uncertain & (scores >= threshold)] = PATHOGENIC
+        out[uncertain & (scores < threshold)] = BENIGN
+    return out
+
+
+# ─── Engine ──────────────────────────────────────────────────────────────────
+class Reclassifier:
+    def __init__(self, state_dir, stages=None, positions=KINASE_DOMAIN):
+        self.state_dir = state_dir
+        self.stages = {s.name: s for s in (stages or [FoldingStage(), BindingStage()])}
+        self.positions = positions
+        self.state = self._load_state()
+
+    @property
+    def state_path(self):
+        return os.path.join(self.state_dir, "state.json")
+
+    def _table_path(self, stage):
+        return os.path.join(self.state_dir, f"{stage}.parquet")
+
+    def _load_state(self):
+        if os.path.isfile(self.state_path):
+            with open(self.state_path) as fh:
+                return json.load(fh)
+        return {}
+
+    def _save(self, stage, table):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp = self._table_path(stage) + ".tmp"
+        table.to_parquet(tmp, index=False)
+        os.replace(tmp, self._table_path(stage))
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.state, fh, indent=1)
+        os.replace(tmp, self.state_path)
+
+    def table(self, stage):
+        """Stored results of one stage (None before the first update)."""
+        path = self._table_path(stage)
+        return pd.read_parquet(path) if os.path.isfile(path) else None
+
+    def update(self, stage, df, force=False):
+        """Bring ``stage`` up to date with the variant table ``df``; returns a report dict."""
+        st = self.stages[stage]
+        df = _restrict(df, self.positions).drop_duplicates("mutation").reset_index(drop=True)
+        cols = st.inputs(df.columns)
+        hashes = row_hashes(df, sorted(cols) + [CLASS_COL])
+
+        old = None if force else self.table(stage)
+        if old is not None:
+            idx = pd.Index(old["mutation"]).get_indexer(df["mutation"])
+            known = idx >= 0
+            dirty = ~known
+            dirty[known] = old["input_hash"].to_numpy(np.uint64)[idx[known]] != hashes[known]
+            removed = len(old) - int(known.sum())
+        else:
+            idx = np.full(len(df), -1)
+            dirty = np.ones(len(df), dtype=bool)
+            removed = 0
+
+        table = pd.DataFrame({"mutation": df["mutation"], "position": df["position"],
+                              "class": df[CLASS_COL].astype(object), "input_hash": hashes})
+        computed = st.compute(df.loc[dirty]) if dirty.any() else None
+        if computed is not None:
+            outputs = list(computed.columns)
+        elif old is not None:
+            outputs = [c for c in old.columns if c not in table.columns and c != "reclass"]
+        else:
+            outputs = [st.score_col]
+        for col in outputs:
+            values = np.full(len(df), np.nan)
+            if old is not None and col in old.columns:
+                values[~dirty] = old[col].to_numpy(dtype=np.float64)[idx[~dirty]]
+            if computed is not None:
+                values[dirty] = computed[col].to_numpy(dtype=np.float64)
+            table[col] = values
+
+        scores = table[st.score_col].to_numpy(dtype=np.float64)
+        classes = table["class"].to_numpy(dtype=object)
+        threshold, ben_max, pat_min = midpoint(scores, classes)
+        prev_state = self.state.get(stage, {}) if old is not None else {}
+        old_thr = prev_state.get("threshold")
+        moved = old_thr is None or not np.isclose(old_thr, threshold, equal_nan=True)
+
+        if old is not None:
+            labels = np.full(len(df), None, dtype=object)
+            labels[~dirty] = old["reclass"].to_numpy(dtype=object)[idx[~dirty]]
+            evaluate = dirty.copy()
+            if moved:
+                lo, hi = sorted((old_thr if old_thr is not None else -np.inf, threshold))
+                uncertain = ~np.isin(classes, [BENIGN, PATHOGENIC])
+                with np.errstate(invalid="ignore"):
+                    evaluate |= uncertain & (scores >= lo) & (scores <= hi)
+            new_labels = labels.copy()
+            new_labels[evaluate] = reclass(scores[evaluate], classes[evaluate], threshold)
+            flipped = int((new_labels[~dirty] != labels[~dirty]).sum())
+        else:
+            evaluate = dirty
+            new_labels = reclass(scores, classes, threshold)
+            flipped = 0
+        table["reclass"] = new_labels
+
+        self.state[stage] = {"threshold": threshold, "benign_max": ben_max,
+                             "pathogenic_min": pat_min, "inputs": sorted(cols),
+                             "variants": len(table)}
+        self._save(stage, table)
+        return {"stage": stage, "variants": len(table), "dirty": int(dirty.sum()),
+                "removed": removed, "threshold": threshold, "threshold_moved": bool(moved),
+                "reevaluated": int(evaluate.sum()), "flipped": flipped}
+
+    def run(self, tables, force=False):
+        """``update`` every stage from ``{stage: variant table}``; returns the report frame."""
+        report = [self.update(name, df, force=force) for name, df in tables.items()]
+        return pd.DataFrame(report).set_index("stage")
+
+    def results(self):
+        """Folding and binding results side by side (``Reclass_<stage>`` columns), keyed by mutation."""
+        out = None
+        for name, st in self.stages.items():
+            t = self.table(name)
+            if t is None:
+                continue
+            keep = [c for c in t.columns if c not in ("input_hash", "class", "reclass")]
+            t = t[keep + ["reclass"]].rename(columns={"reclass": f"Reclass_{name}"})
+            if out is None:
+                classes = self.table(name)[["mutation", "class"]].rename(columns={"class": CLASS_COL})
+                out = classes.merge(t, on="mutation")
+            else:
+                out = out.merge(t.drop(columns="position"), on="mutation", how="outer")
+        return out
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Incrementally reclassify variants by ΔΔG_Fmax / ΔΔG_Bmax")
+    ap.add_argument("--folding", help="folding workbook (per-method *_str ΔΔG columns)")
+    ap.add_argument("--binding", help="binding workbook (ddg_<complex>_str_<method> columns)")
+    ap.add_argument("--state", default="04.5_reclassification/reclass_state")
+    ap.add_argument("--out", default=None, help="write the combined results (.csv or .xlsx)")
+    ap.add_argument("--force", action="store_true", help="recompute every variant")
+    args = ap.parse_args(argv)
+
+    tables = {}
+    if args.folding:
+        tables["folding"] = pd.read_excel(args.folding)
+    if args.binding:
+        tables["binding"] = pd.read_excel(args.binding)
+    engine = Reclassifier(args.state)
+    print(engine.run(tables, force=args.force).to_string())
+    if args.out:
+        res = engine.results()
+        res.to_excel(args.out, index=False) if args.out.endswith(".xlsx") else res.to_csv(args.out, index=False)
+        print(f"✅ {len(res)} variants → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Parallel SAAMBE-3D driver for the cluster-1 HADDOCK models.
+
+``saambe-3d.py`` always writes ``output.out`` into its working directory, so the
+old ``07_run_saambe3d.sh`` loop had to run one model at a time.  Here every
+(model, mutation chunk) pair runs as its own SAAMBE-3D process inside a private
+temporary directory, and the outputs are collected into one results table
+keyed by partner and mutation::
+
+    partner, chain, position, wild, mutant, mutation, ddG
+
+The table is rewritten after every finished chunk, and (partner, mutation)
+pairs already in it are not run again, so an interrupted job picks up where it
+stopped.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+MODEL_SUFFIX = "_cluster_1_model_1.pdb"
+RESULT_COLUMNS = ["partner", "chain", "position", "wild", "mutant", "mutation", "ddG"]
+KEY_COLUMNS = ["partner", "chain", "position", "wild", "mutant"]
+
+_OUTPUT_RENAME = {"Chain": "chain", "Position": "position", "Wild": "wild",
+                  "Mutant": "mutant", "ddG(kcal/mol)": "ddG"}
+
+
+def partner_name(pdb_path):
+    """``P48436_SOX9_197-202`` from ``.../P48436_SOX9_197-202_cluster_1_model_1.pdb``."""
+    base = os.path.basename(pdb_path)
+    return base[:-len(MODEL_SUFFIX)] if base.endswith(MODEL_SUFFIX) else os.path.splitext(base)[0]
+
+
+def read_mutation_list(path):
+    """SAAMBE-3D mutation list (``A 13 F S`` per line) as a frame."""
+    rows = [line.split() for line in open(path) if line.strip()]
+    df = pd.DataFrame(rows, columns=["chain", "position", "wild", "mutant"])
+    df["position"] = df["position"].astype(int)
+    return df
+
+
+def read_output(path, partner, chain="A"):
+    """Parse one ``output.out`` into result rows."""
+    out = pd.read_csv(path, sep=r"\s+", header=0).rename(columns=_OUTPUT_RENAME)
+    if "chain" not in out.columns:
+        out["chain"] = chain
+    out["partner"] = partner
+    out["position"] = out["position"].astype(int)
+    out["mutation"] = out["wild"] + out["position"].astype(str) + out["mutant"]
+    return out[RESULT_COLUMNS]
+
+
+def _chunks(df, size):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+class SaambeDriver:
+    def __init__(self, script, models, mutation_list, results_path, model_type=1,
+                 chunk_size=25, workers=None, python=sys.executable, work_root=None):
+        self.script = os.path.abspath(script)
+        self.models = [os.path.abspath(m) for m in models]
+        self.mutations = read_mutation_list(mutation_list)
+        self.results_path = results_path
+        self.model_type = model_type
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count()
+        self.python = python
+        self.work_root = work_root
+        self.failed = []
+        self._lock = threading.Lock()
+        self.results = self._load_results()
+
+    def _load_results(self):
+        if os.path.isfile(self.results_path):
+            return pd.read_csv(self.results_path)
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    def _save_results(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.results_path)), exist_ok=True)
+        tmp = self.results_path + ".tmp"
+        self.results.sort_values(["partner", "position", "mutant"]).to_csv(tmp, index=False)
+        os.replace(tmp, self.results_path)
+
+    def pending(self):
+        """[(model, partner, mutation chunk)] still missing from the results table."""
+        done = set(map(tuple, self.results[KEY_COLUMNS].astype(str).to_numpy()))
+        tasks = []
+        for pdb in self.models:
+            partner = partner_name(pdb)
+            keys = self.mutations[["chain", "position", "wild", "mutant"]].astype(str)
+            todo = [(partner, *k) not in done for k in map(tuple, keys.to_numpy())]
+            for chunk in _chunks(self.mutations[todo], self.chunk_size):
+                tasks.append((pdb, partner, chunk))
+        return tasks
+
+    def _run_chunk(self, pdb, partner, chunk):
+        workdir = tempfile.mkdtemp(prefix=f"saambe_{partner}_", dir=self.work_root)
+        mut_file = os.path.join(workdir, "mutations_list.txt")
+        chunk[["chain", "position", "wild", "mutant"]].to_csv(mut_file, sep=" ", header=False,
+                                                              index=False)
+        cmd = [self.python, self.script, "-i", pdb, "-f", mut_file, "-d", str(self.model_type)]
+        with open(os.path.join(workdir, "saambe.log"), "w") as log:
+            rc = subprocess.call(cmd, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+        out_path = os.path.join(workdir, "output.out")
+        if rc != 0 or not os.path.isfile(out_path):
+            return None, workdir            # keep the directory for inspection
+        out = read_output(out_path, partner, chain=chunk["chain"].iloc[0])
+        shutil.rmtree(workdir)
+        return out, None
+
+    def run(self):
+        """Run every pending (model, chunk); returns the consolidated results."""
+        tasks = self.pending()
+        print(f"{len(self.models)} models × {len(self.mutations)} mutations: "
+              f"{len(tasks)} chunk(s) to run on {self.workers} workers")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_chunk, *t): t for t in tasks}
+            for fut in as_completed(futures):
+                pdb, partner, chunk = futures[fut]
+                out, failed_dir = fut.result()
+                with self._lock:
+                    if out is None:
+                        self.failed.append((partner, failed_dir))
+                        print(f"⚠️ SAAMBE-3D failed for {partner} ({len(chunk)} mutations), "
+                              f"see {failed_dir}/saambe.log")
+                        continue
+                    self.results = pd.concat([self.results, out], ignore_index=True)
+                    self.results = self.results.drop_duplicates(KEY_COLUMNS, keep="last")
+                    self._save_results()
+        return self.results
+
+
+def wide_table(results):
+    """Results as one ``ddg_<partner>_str`` column per partner, keyed by wild/position/mutant."""
+    wide = results.pivot_table(index=["wild", "position", "mutant"], columns="partner",
+                               values="ddG", aggfunc="first")
+    wide.columns = [f"ddg_{p}_str" for p in wide.columns]
+    return wide.reset_index()
+
+
+def main(argv=None):
+    import argparse
+    import glob
+
+    ap = argparse.ArgumentParser(description="Run SAAMBE-3D on every cluster model in parallel")
+    ap.add_argument("--script", required=True, help="path to saambe-3d.py")
+    ap.add_argument("--models", default="06_cluster1_models/*.pdb")
+    ap.add_argument("--mutations", required=True, help="SAAMBE-3D mutation list")
+    ap.add_argument("--results", default="outputs/saambe_3d/saambe3d_results.csv")
+    ap.add_argument("--model-type", type=int, default=1, help="-d: 1 regression, 0 classification")
+    ap.add_argument("--chunk-size", type=int, default=25)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--python", default=sys.executable, help="interpreter for saambe-3d.py")
+    args = ap.parse_args(argv)
+
+    driver = SaambeDriver(args.script, sorted(glob.glob(args.models)), args.mutations,
+                          args.results, model_type=args.model_type, chunk_size=args.chunk_size,
+                          workers=args.workers, python=args.python)
+    driver.run()
+    print(f"✅ {len(driver.results)} SAAMBE-3D results in {args.results}")
+    return 1 if driver.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+"""Saturation-mutagenesis score store for the pathogenicity stage.
+
+Every predictor that can be run locally (ESM-1v, the AlphaMissense O76039 table,
+full PolyPhen-2 / MutPred2 result files, ...) is precomputed for all 19 × L
+missense changes and kept in one ``(predictor, position, amino acid)`` float32
+array.  Annotating a newly reported variant is then an array lookup instead of
+a rerun of ``05_pathogenicity.py``.
+
+On disk a store is a directory with ``scores.npy`` (opened memory-mapped) and
+``meta.json`` holding the sequence, the predictor names and, for categorical
+predictors such as ``am_class``, the label for each integer code.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .esm1v import AA_INDEX, AMINO_ACIDS, cached_marginals, substitution_matrix
+
+_MUTATION_RE = re.compile(r"^([A-Z])(\d+)([A-Z])$")
+
+
+def parse_mutations(mutations):
+    """Vectorised split of ``"I3F"`` strings into (wild, position, mutant) arrays.
+
+    Unparseable entries get position 0.
+    """
+    parts = pd.Series(mutations, dtype="string").str.strip().str.upper().str.extract(
+        _MUTATION_RE.pattern)
+    pos = pd.to_numeric(parts[1], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    return parts[0].fillna("").to_numpy(), pos, parts[2].fillna("").to_numpy()
+
+
+def table_matrix(seq, mutations, values, labels=None):
+    """Scatter per-mutation ``values`` into an (L, 20) array (NaN where missing).
+
+    With ``labels`` the values are categorical and are stored as their index in
+    ``labels``.  Rows whose wild-type residue disagrees with ``seq`` are dropped.
+    """
+    wt, pos, mt = parse_mutations(mutations)
+    values = pd.Series(values).to_numpy()
+    if labels is not None:
+        codes = {lab: i for i, lab in enumerate(labels)}
+        values = np.array([codes.get(v, np.nan) for v in values], dtype=np.float64)
+    seq_arr = np.array(list(seq))
+    ok = (pos >= 1) & (pos <= len(seq))
+    ok[ok] &= seq_arr[pos[ok] - 1] == wt[ok]
+    mt_idx = np.array([AA_INDEX.get(m, -1) for m in mt], dtype=np.int64)
+    ok &= mt_idx >= 0
+    out = np.full((len(seq), len(AMINO_ACIDS)), np.nan, dtype=np.float32)
+    out[pos[ok] - 1, mt_idx[ok]] = values[ok].astype(np.float32)
+    return out
+
+
+def esm1v_name(mode):
+    """Predictor name for an ESM-1v marginal Δ, e.g. ``esm1v_wt_marginal_delta``.
+
+    Marginal Δs are on a different scale from the full-sequence ``delta_score``
+    the -6.152 cutoff was fitted on, so the mode is part of the name.
+    """
+    return "esm1v_" + mode.replace("-", "_") + "_delta"
+
+
+def esm1v_matrix(model, seq, mode="wt-marginal", cache=None, batch_size=8):
+    """(L, 20) ESM-1v Δ log-probabilities for every substitution; store as ``esm1v_name(mode)``."""
+    lp = cached_marginals(model, seq, mode=mode, cache=cache, batch_size=batch_size)
+    return substitution_matrix(np.asarray(lp, dtype=np.float32), seq)
+
+
+def alphamissense_matrices(csv_path, seq):
+    """``am_pathogenicity`` and ``am_class`` matrices from ``AF-O76039-F1-hg38.csv``."""
+    am = pd.read_csv(csv_path, usecols=["protein_variant", "am_pathogenicity", "am_class"])
+    am = am.drop_duplicates("protein_variant", keep="first")
+    labels = sorted(am["am_class"].dropna().unique())
+    return {
+        "am_pathogenicity": (table_matrix(seq, am["protein_variant"], am["am_pathogenicity"]), None),
+        "am_class": (table_matrix(seq, am["protein_variant"], am["am_class"], labels), labels),
+    }
+
+
+class SaturationStore:
+    def __init__(self, seq, predictors=None, scores=None, labels=None):
+        self.seq = seq.strip().upper()
+        self.predictors = list(predictors or [])
+        shape = (len(self.predictors), len(self.seq), len(AMINO_ACIDS))
+        self.scores = np.full(shape, np.nan, dtype=np.float32) if scores is None else scores
+        self.labels = dict(labels or {})
+
+    # ─── Building ────────────────────────────────────────────────────────────
+    def add(self, name, matrix, labels=None):
+        """Add or replace the (L, 20) matrix for predictor ``name``."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.shape != (len(self.seq), len(AMINO_ACIDS)):
+            raise ValueError(f"{name}: expected shape {(len(self.seq), len(AMINO_ACIDS))}, "
+                             f"got {matrix.shape}")
+        # wild-type cells are not missense changes
+        matrix = matrix.copy()
+        matrix[np.arange(len(self.seq)), [AA_INDEX[a] for a in self.seq]] = np.nan
+        if name in self.predictors:
+            scores = np.array(self.scores)
+            scores[self.predictors.index(name)] = matrix
+        else:
+            self.predictors.append(name)
+            scores = np.concatenate([np.asarray(self.scores), matrix[None]], axis=0)
+        self.scores = scores
+        if labels is not None:
+            self.labels[name] = list(labels)
+        return self
+
+    def coverage(self):
+        """Fraction of the 19 × L missense changes filled in, per predictor."""
+        n = len(self.seq) * (len(AMINO_ACIDS) - 1)
+        filled = (~np.isnan(self.scores)).reshape(len(self.predictors), -1).sum(axis=1)
+        return pd.Series(filled / n, index=self.predictors, name="coverage")
+
+    # ─── Persistence ─────────────────────────────────────────────────────────
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "scores.npy"), np.asarray(self.scores, dtype=np.float32))
+        meta = {"sequence": self.seq, "amino_acids": AMINO_ACIDS,
+                "predictors": self.predictors, "labels": self.labels}
+        with open(os.path.join(path, "meta.json"), "w") as fh:
+            json.dump(meta, fh, indent=1)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "meta.json")) as fh:
+            meta = json.load(fh)
+        if meta["amino_acids"] != AMINO_ACIDS:
+            raise ValueError(f"{path} uses amino-acid order {meta['amino_acids']}")
+        scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+        return cls(meta["sequence"], meta["predictors"], scores, meta["labels"])
+
+    # ─── Lookups ─────────────────────────────────────────────────────────────
+    def _decode(self, name, values):
+        labels = self.labels.get(name)
+        if labels is None:
+            return values
+        return np.array([labels[int(v)] if not np.isnan(v) else None for v in values],
+                        dtype=object)
+
+    def lookup(self, mutation):
+        """All predictor values for one ``"I3F"``-style mutation."""
+        return {k: v[0] for k, v in self.annotate([mutation]).items() if k != "mutation"}
+
+    def annotate(self, mutations, predictors=None):
+        """Gather predictor columns for many mutations in one indexing step.
+
+        Mutations whose wild-type residue does not match the stored sequence get
+        NaN/``None``.
+        """
+        predictors = self.predictors if predictors is None else list(predictors)
+        wt, pos, mt = parse_mutations(mutations)
+        seq_arr = np.array(list(self.seq))
+        mt_idx = np.array([AA_INDEX.get(m, -1) for m in mt], dtype=np.int64)
+        ok = (pos >= 1) & (pos <= len(self.seq)) & (mt_idx >= 0)
+        ok[ok] &= seq_arr[pos[ok] - 1] == wt[ok]
+        out = {"mutation": pd.Series(mutations, dtype="string").str.strip().str.upper().to_numpy()}
+        for name in predictors:
+            vals = np.full(len(pos), np.nan, dtype=np.float64)
+            vals[ok] = self.scores[self.predictors.index(name), pos[ok] - 1, mt_idx[ok]]
+            out[name] = self._decode(name, vals)
+        return pd.DataFrame(out)
+
+    def to_frame(self):
+        """Long table of every stored missense change (one row per mutation)."""
+        pos, aa = np.meshgrid(np.arange(1, len(self.seq) + 1), np.arange(len(AMINO_ACIDS)),
+                              indexing="ij")
+        wt = np.repeat(np.array(list(self.seq)), len(AMINO_ACIDS))
+        mt = np.array(list(AMINO_ACIDS))[aa.ravel()]
+        keep = wt != mt
+        muts = pd.Series(wt[keep]) + pd.Series(pos.ravel()[keep]).astype(str) + pd.Series(mt[keep])
+        out = pd.DataFrame({"mutation": muts, "wild": wt[keep],
+                            "position": pos.ravel()[keep], "mutant": mt[keep]})
+        for i, name in enumerate(self.predictors):
+            out[name] = self._decode(name, np.asarray(self.scores[i]).ravel()[keep])
+        return out
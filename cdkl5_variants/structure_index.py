@@ -0,0 +1,263 @@
+"""Per-residue structural feature index for the CDKL5 kinase-domain model.
+
+``target.B99990001_with_cryst.pdb`` and the HADDOCK cluster-1 complexes are
+parsed once and reduced to per-residue arrays indexed by residue number, so
+"is residue i on the surface / at the SOX9 interface" is an array lookup:
+
+* ``sasa`` / ``rsa``: Shrake–Rupley SASA (Å²) and relative SASA (Tien et al.
+  2013 maximum values) of the free CDKL5 model;
+* ``contacts``: residues with a Cβ (Cα for Gly) within ``CONTACT_CUTOFF`` Å;
+* ``ss``: three-state secondary structure (``C``/``H``/``E``) from DSSP-style
+  backbone hydrogen bonds;
+* ``motif_dist``: (residue, partner) minimum heavy-atom distance from each
+  CDKL5 residue (chain A) to the partner motif (chain B) in its cluster-1
+  model, with the motif range taken from the model name
+  (``P48436_SOX9_197-202_cluster_1_model_1.pdb``).
+
+The index is saved as one ``.npz`` file.
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from Bio.Data.IUPACData import protein_letters_3to1
+from Bio.PDB import PDBParser
+from Bio.PDB.SASA import ShrakeRupley
+
+SS_CODES = "CHE"
+CONTACT_CUTOFF = 8.0
+SURFACE_RSA = 0.25
+INTERFACE_CUTOFF = 5.0
+
+# Theoretical maximum ASA (Tien et al. 2013)
+MAX_ASA = {
+    "A": 129.0, "R": 274.0, "N": 195.0, "D": 193.0, "C": 167.0, "E": 223.0, "Q": 225.0,
+    "G": 104.0, "H": 224.0, "I": 197.0, "L": 201.0, "K": 236.0, "M": 224.0, "F": 240.0,
+    "P": 159.0, "S": 155.0, "T": 172.0, "W": 285.0, "Y": 263.0, "V": 174.0,
+}
+
+_MODEL_RE = re.compile(r"^(?P<uniprot>[^_]+)_(?P<gene>.+)_(?P<start>\d+)-(?P<end>\d+)(?=_cluster|\.pdb$)")
+_parser = PDBParser(QUIET=True)
+
+
+def _chain(path, chain_id="A"):
+    return _parser.get_structure(os.path.basename(path), path)[0][chain_id]
+
+
+def _residues(chain):
+    return [r for r in chain if r.id[0] == " "]
+
+
+def _heavy_coords(residues):
+    """(atom xyz, residue index per atom) for the non-hydrogen atoms."""
+    xyz, owner = [], []
+    for i, res in enumerate(residues):
+        for atom in res:
+            if atom.element != "H":
+                xyz.append(atom.coord)
+                owner.append(i)
+    return np.asarray(xyz, dtype=np.float64), np.asarray(owner, dtype=np.int64)
+
+
+# ─── Features ────────────────────────────────────────────────────────────────
+def residue_contacts(residues, cutoff=CONTACT_CUTOFF):
+    """Number of other residues with a Cβ (Cα for Gly) within ``cutoff`` Å."""
+    cb = np.array([(r["CB"] if "CB" in r else r["CA"]).coord for r in residues], dtype=np.float64)
+    d2 = ((cb[:, None, :] - cb[None, :, :]) ** 2).sum(-1)
+    return ((d2 <= cutoff ** 2).sum(axis=1) - 1).astype(np.int16)
+
+
+def secondary_structure(residues):
+    """Three-state (C/H/E) codes from Kabsch–Sander backbone hydrogen bonds.
+
+    Helices are two consecutive i→i+4 turns; strands are residues in parallel
+    or antiparallel bridges.  Residues missing backbone atoms are coil; chain
+    breaks are not treated specially.
+    """
+    full = [all(a in r for a in ("N", "CA", "C", "O")) for r in residues]
+    if not all(full):
+        ss = np.zeros(len(residues), dtype=np.uint8)
+        ss[np.flatnonzero(full)] = secondary_structure([r for r, f in zip(residues, full) if f])
+        return ss
+    n = len(residues)
+    bb = {a: np.array([r[a].coord for r in residues], dtype=np.float64) for a in ("N", "CA", "C", "O")}
+    # amide H placed along the previous residue's O→C direction
+    h = bb["N"].copy()
+    co = bb["C"][:-1] - bb["O"][:-1]
+    h[1:] += co / np.linalg.norm(co, axis=1, keepdims=True)
+
+    def dist(a, b):
+        return np.linalg.norm(a[:, None, :] - b[None, :, :], axis=-1)
+
+    # energy[i, j]: C=O of i accepting from N-H of j
+    with np.errstate(divide="ignore"):
+        energy = 0.084 * 332 * (1 / dist(bb["O"], bb["N"]) + 1 / dist(bb["C"], h)
+                                - 1 / dist(bb["O"], h) - 1 / dist(bb["C"], bb["N"]))
+    hb = energy < -0.5
+    hb[:, 0] = False                                   # first residue has no amide H
+    idx = np.arange(n)
+    hb[np.abs(idx[:, None] - idx[None, :]) < 2] = False
+
+    ss = np.zeros(n, dtype=np.uint8)
+    turn4 = np.zeros(n, dtype=bool)
+    turn4[:n - 4] = hb[idx[:n - 4], idx[:n - 4] + 4]
+    start = np.flatnonzero(turn4[1:] & turn4[:-1]) + 1
+    for s in start:
+        ss[s:s + 4] = SS_CODES.index("H")
+
+    def shift(m, di, dj):
+        """out[i, j] = m[i + di, j + dj] (False outside the matrix)."""
+        out = np.zeros_like(m)
+        src = m[max(di, 0):n + min(di, 0), max(dj, 0):n + min(dj, 0)]
+        out[max(-di, 0):n + min(-di, 0), max(-dj, 0):n + min(-dj, 0)] = src
+        return out
+
+    # bridge(i, j), with hb(a, b) read through shift(m, di, dj)[i, j] = m[i+di, j+dj]
+    parallel = (shift(hb, -1, 0) & shift(hb.T, 1, 0)) | (shift(hb.T, 0, -1) & shift(hb, 0, 1))
+    antiparallel = (hb & hb.T) | (shift(hb, -1, 1) & shift(hb.T, 1, -1))
+    bridge = (parallel | antiparallel) & (np.abs(idx[:, None] - idx[None, :]) > 2)
+    strand = bridge.any(axis=1) & (ss == 0)
+    ss[strand] = SS_CODES.index("E")
+    return ss
+
+
+def motif_distance(model_path, motif, chain_a="A", chain_b="B"):
+    """{CDKL5 residue number: min heavy-atom distance to the chain-B motif} for one complex."""
+    structure = _parser.get_structure(os.path.basename(model_path), model_path)[0]
+    res_a = _residues(structure[chain_a])
+    motif_res = [r for r in _residues(structure[chain_b]) if motif[0] <= r.id[1] <= motif[1]]
+    xyz_a, owner = _heavy_coords(res_a)
+    xyz_b, _ = _heavy_coords(motif_res)
+    if not len(xyz_b):
+        raise ValueError(f"No chain {chain_b} residues {motif[0]}-{motif[1]} in {model_path}")
+    atom_min = np.sqrt(((xyz_a[:, None, :] - xyz_b[None, :, :]) ** 2).sum(-1)).min(axis=1)
+    per_res = np.full(len(res_a), np.inf)
+    np.minimum.at(per_res, owner, atom_min)
+    return {r.id[1]: d for r, d in zip(res_a, per_res)}
+
+
+# ─── Index ───────────────────────────────────────────────────────────────────
+class StructureIndex:
+    def __init__(self, resnum, aa, sasa, contacts, ss, partners=(), motif_dist=None, sources=()):
+        self.resnum = np.asarray(resnum, dtype=np.int16)
+        self.aa = np.asarray(aa, dtype="U1")
+        self.sasa = np.asarray(sasa, dtype=np.float32)
+        self.contacts = np.asarray(contacts, dtype=np.int16)
+        self.ss = np.asarray(ss, dtype=np.uint8)
+        self.partners = list(partners)
+        shape = (len(self.resnum), len(self.partners))
+        self.motif_dist = (np.full(shape, np.nan, dtype=np.float32) if motif_dist is None
+                           else np.asarray(motif_dist, dtype=np.float32))
+        self.sources = list(sources)
+        max_asa = np.array([MAX_ASA.get(a, np.nan) for a in self.aa], dtype=np.float32)
+        self.rsa = self.sasa / max_asa
+        # residue number → row (−1 where the model has no residue)
+        self._row = np.full(int(self.resnum.max()) + 2 if len(self.resnum) else 1, -1, dtype=np.int64)
+        self._row[self.resnum] = np.arange(len(self.resnum))
+
+    @classmethod
+    def build(cls, pdb_path, model_paths=(), chain_id="A"):
+        """Parse the monomer and the cluster-1 complexes into an index."""
+        chain = _chain(pdb_path, chain_id)
+        ShrakeRupley().compute(chain, level="R")
+        residues = _residues(chain)
+        resnum = [r.id[1] for r in residues]
+        aa = [protein_letters_3to1.get(r.get_resname().capitalize(), "X") for r in residues]
+        sasa = [r.sasa for r in residues]
+        partners, columns = [], []
+        for path in sorted(model_paths):
+            m = _MODEL_RE.match(os.path.basename(path))
+            if m is None:
+                continue
+            dist = motif_distance(path, (int(m["start"]), int(m["end"])), chain_a=chain_id)
+            partners.append(m.group(0))
+            columns.append([dist.get(r, np.nan) for r in resnum])
+        motif_dist = np.array(columns, dtype=np.float32).T if columns else None
+        return cls(resnum, aa, sasa, residue_contacts(residues), secondary_structure(residues),
+                   partners, motif_dist, sources=[pdb_path, *sorted(model_paths)])
+
+    # ─── Persistence ─────────────────────────────────────────────────────────
+    def save(self, path):
+        np.savez_compressed(path, resnum=self.resnum, aa=self.aa, sasa=self.sasa,
+                            contacts=self.contacts, ss=self.ss, motif_dist=self.motif_dist,
+                            partners=np.array(self.partners, dtype=str),
+                            sources=np.array(self.sources, dtype=str))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["resnum"], z["aa"], z["sasa"], z["contacts"], z["ss"],
+                       z["partners"].tolist(), z["motif_dist"], z["sources"].tolist())
+
+    # ─── Lookups ─────────────────────────────────────────────────────────────
+    def rows(self, positions):
+        """Row of each residue number (−1 where absent from the model)."""
+        pos = np.asarray(positions, dtype=np.int64)
+        ok = (pos >= 0) & (pos < len(self._row))
+        out = np.full(pos.shape, -1, dtype=np.int64)
+        out[ok] = self._row[pos[ok]]
+        return out
+
+    def _partner_cols(self, partner):
+        if partner is None:
+            return list(range(len(self.partners)))
+        return [i for i, p in enumerate(self.partners)
+                if p == partner or _MODEL_RE.match(p + ".pdb")["gene"] == partner]
+
+    def is_surface(self, positions, threshold=SURFACE_RSA):
+        rows = self.rows(positions)
+        return (rows >= 0) & (self.rsa[rows] >= threshold)
+
+    def is_interface(self, positions, partner=None, cutoff=INTERFACE_CUTOFF):
+        """Within ``cutoff`` Å of the motif of ``partner`` (gene or full name; None → any)."""
+        rows = self.rows(positions)
+        cols = self._partner_cols(partner)
+        if not cols:
+            return np.zeros(rows.shape, dtype=bool)
+        near = (self.motif_dist[:, cols] <= cutoff).any(axis=1)
+        return (rows >= 0) & near[rows]
+
+    def annotate(self, positions):
+        """Feature columns for each position (NaN/None where absent)."""
+        rows = self.rows(positions)
+        ok = rows >= 0
+        r = np.where(ok, rows, 0)
+
+        def col(values, fill=np.nan):
+            v = values[r].astype(np.float64)
+            v[~ok] = fill
+            return v
+
+        out = pd.DataFrame({
+            "sasa": col(self.sasa), "rsa": col(self.rsa), "contacts": col(self.contacts),
+            "ss": np.where(ok, np.array(list(SS_CODES))[self.ss[r]], None),
+        })
+        for i, partner in enumerate(self.partners):
+            out[f"motif_dist_{partner}"] = col(self.motif_dist[:, i])
+        return out
+
+    def to_frame(self):
+        return pd.concat([pd.DataFrame({"position": self.resnum, "aa": self.aa}),
+                          self.annotate(self.resnum)], axis=1)
+
+
+def main(argv=None):
+    import argparse
+
+    root = "/project/ealexov/compbio/shamrat/250519_energy"
+    ap = argparse.ArgumentParser(description="Build the per-residue structural feature index")
+    ap.add_argument("--pdb", default=os.path.join(root, "250403_modeller", "target.B99990001_with_cryst.pdb"))
+    ap.add_argument("--models", default=os.path.join(root, "03_haddock", "06_cluster1_models", "*.pdb"))
+    ap.add_argument("--out", default=os.path.join(root, "00_data", "structure_index.npz"))
+    args = ap.parse_args(argv)
+
+    index = StructureIndex.build(args.pdb, glob.glob(args.models))
+    index.save(args.out)
+    print(f"✅ {len(index.resnum)} residues, {len(index.partners)} partner model(s) → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Exact ROC / PR curves and optimal cutoffs for every predictor score in one pass.
+
+The pathogenicity notebook tried cutoffs one at a time (``for T in [0.5,
+0.9933]`` re-reading the AlphaMissense workbook and ``df.apply``-ing a
+per-row rule for each ``T``), and the PolyPhen-2 / MutPred2 / ESM-1v cells
+repeated the same per-threshold tallies.  Here each score column is sorted
+once; cumulative sums of the sorted labels give the confusion counts at
+*every* distinct threshold::
+
+    tp[k] = pathogenic variants with score >= thr[k]      fp[k] = benign ones
+
+from which TPR/FPR, precision, Youden's J, ROC AUC and average precision
+follow without another pass over the data.  A score where *low* values are
+pathogenic (the ESM-1v ``delta_score``) is swept with ``direction=-1``, and
+its cutoffs are reported back on the original scale (``score <= thr``).
+
+``call_counts`` answers the other notebook question — how many variants
+would be called Benign/Pathogenic at a list of candidate cutoffs — with one
+``searchsorted`` instead of a reclassification per cutoff.
+"""
+import numpy as np
+import pandas as pd
+
+from .ddg import CLASS_COL
+
+BENIGN, PATHOGENIC = "Benign", "Pathogenic"
+
+# score column → direction (+1: high = pathogenic, -1: low = pathogenic)
+SCORES = {
+    "delta_score":      -1,     # ESM-1v Δscore
+    "pph2_prob":        +1,     # PolyPhen-2
+    "MutPred2_score":   +1,
+    "am_pathogenicity": +1,     # AlphaMissense
+    "ddG_Fmax":         +1,
+    "ddG_Bmax":         +1,
+}
+
+
+def _labels(scores, classes, benign, pathogenic):
+    """(scores, is_pathogenic) for the labelled variants with a score."""
+    scores = np.asarray(scores, dtype=np.float64)
+    classes = np.asarray(classes, dtype=object)
+    is_ben = np.isin(classes, list(benign))
+    is_pat = np.isin(classes, list(pathogenic))
+    keep = (is_ben | is_pat) & ~np.isnan(scores)
+    return scores[keep], is_pat[keep]
+
+
+def sweep(scores, classes, direction=1, benign=(BENIGN,), pathogenic=(PATHOGENIC,)):
+    """Confusion counts and rates at every distinct threshold of one score.
+
+    Rows run from the strictest cutoff (fewest pathogenic calls) to the most
+    lenient; a variant is called pathogenic at ``score >= threshold``
+    (``<=`` when ``direction=-1``).  The frame's ``attrs`` hold the class
+    sizes, ``roc_auc`` and ``average_precision``.
+    """
+    s, y = _labels(scores, classes, benign, pathogenic)
+    n_pat, n_ben = int(y.sum()), int((~y).sum())
+    if not (n_pat and n_ben):
+        raise ValueError("need at least one benign and one pathogenic score")
+
+    key = s * np.sign(direction)
+    order = np.argsort(-key, kind="mergesort")
+    key, y = key[order], y[order]
+    # last index of each run of equal scores = one cutoff per distinct value
+    last = np.flatnonzero(np.r_[key[1:] != key[:-1], True])
+    tp = np.cumsum(y)[last]
+    fp = (last + 1) - tp
+
+    tpr, fpr = tp / n_pat, fp / n_ben
+    precision = tp / (tp + fp)
+    curve = pd.DataFrame({
+        "threshold": key[last] * np.sign(direction),
+        "tp": tp, "fp": fp, "fn": n_pat - tp, "tn": n_ben - fp,
+        "tpr": tpr, "fpr": fpr, "precision": precision,
+        "youden": tpr - fpr,
+    })
+    roc_x, roc_y = np.r_[0.0, fpr], np.r_[0.0, tpr]
+    curve.attrs = {
+        "direction": int(np.sign(direction)), "n_benign": n_ben, "n_pathogenic": n_pat,
+        "roc_auc": float(np.sum(np.diff(roc_x) * (roc_y[1:] + roc_y[:-1]) / 2)),
+        "average_precision": float(np.sum(np.diff(np.r_[0.0, tpr]) * precision)),
+    }
+    return curve
+
+
+def optimal(curve):
+    """Row of ``curve`` with the largest Youden's J (first, i.e. strictest, on ties)."""
+    return curve.iloc[int(np.argmax(curve["youden"].to_numpy()))]
+
+
+def call_counts(scores, thresholds, direction=1):
+    """Benign / Pathogenic call counts of ``scores`` at each of ``thresholds``."""
+    s = np.asarray(scores, dtype=np.float64)
+    s = np.sort(s[~np.isnan(s)])
+    thr = np.asarray(thresholds, dtype=np.float64)
+    if direction >= 0:
+        pat = len(s) - np.searchsorted(s, thr, side="left")        # score >= thr
+    else:
+        pat = np.searchsorted(s, thr, side="right")                # score <= thr
+    return pd.DataFrame({BENIGN: len(s) - pat, PATHOGENIC: pat},
+                        index=pd.Index(thr, name="threshold"))
+
+
+def sweep_all(df, scores=None, class_col=CLASS_COL, benign=(BENIGN,), pathogenic=(PATHOGENIC,)):
+    """``sweep`` every score column of ``df`` present in ``scores`` (default ``SCORES``).
+
+    Returns ``(summary, curves)``: one summary row per score with the
+    Youden-optimal cutoff, its confusion counts, ROC AUC and average
+    precision, and ``{column: curve}``.
+    """
+    scores = SCORES if scores is None else scores
+    if not isinstance(scores, dict):
+        scores = {c: SCORES.get(c, 1) for c in scores}
+    rows, curves = [], {}
+    for col, direction in scores.items():
+        if col not in df.columns:
+            continue
+        curve = sweep(pd.to_numeric(df[col], errors="coerce"), df[class_col],
+                      direction, benign, pathogenic)
+        best = optimal(curve)
+        curves[col] = curve
+        rows.append({"score": col, "direction": curve.attrs["direction"],
+                     "cutoff": best["threshold"], "youden": best["youden"],
+                     "tpr": best["tpr"], "fpr": best["fpr"], "precision": best["precision"],
+                     **{k: int(best[k]) for k in ("tp", "fp", "fn", "tn")},
+                     "roc_auc": curve.attrs["roc_auc"],
+                     "average_precision": curve.attrs["average_precision"],
+                     "n_benign": curve.attrs["n_benign"],
+                     "n_pathogenic": curve.attrs["n_pathogenic"],
+                     "n_thresholds": len(curve)})
+    return pd.DataFrame(rows).set_index("score"), curves
+
+
+def main(argv=None):
+    import argparse
+
+    from .ddg import KINASE_DOMAIN, _restrict
+
+    ap = argparse.ArgumentParser(description="ROC / PR sweep and Youden cutoffs for predictor scores")
+    ap.add_argument("table", help="variant table (.xlsx/.csv/.parquet) with score columns")
+    ap.add_argument("--scores", nargs="+", default=None, help=f"default: {' '.join(SCORES)}")
+    ap.add_argument("--all-positions", action="store_true", help="do not restrict to residues 1–302")
+    ap.add_argument("--out", default=None, help="CSV for the summary table")
+    args = ap.parse_args(argv)
+
+    if args.table.endswith(".parquet"):
+        df = pd.read_parquet(args.table)
+    elif args.table.endswith(".csv"):
+        df = pd.read_csv(args.table)
+    else:
+        df = pd.read_excel(args.table)
+    if not args.all_positions:
+        df = _restrict(df, KINASE_DOMAIN)
+    summary, _ = sweep_all(df, args.scores)
+    print(summary.T.to_string())
+    if args.out:
+        summary.to_csv(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Bootstrap and permutation uncertainty for the midpoint ΔΔG thresholds.
+
+The reclassification cutoff is ``(max Benign + min Pathogenic) / 2`` from a
+single sample.  Here replicates are drawn as NumPy index matrices and every
+replicate's threshold, sensitivity and specificity are computed in one batch:
+
+* bootstrap:   benign and pathogenic scores are resampled with replacement
+  (group sizes kept) as ``(replicates, n)`` index matrices; each replicate
+  threshold is scored against the full labelled sample with ``searchsorted``;
+* permutation: the benign/pathogenic labels are shuffled (``rng.permuted`` on
+  a tiled label matrix) to give the null distribution of the threshold and of
+  the benign/pathogenic gap ``min Pathogenic - max Benign``.
+
+Replicates are processed in chunks with one ``SeedSequence`` child per chunk,
+so results do not depend on ``workers``; with ``workers > 1`` the chunks run
+on a process pool.  ``variant_stability`` gives, for each variant, the share
+of bootstrap thresholds that would call it pathogenic.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .ddg import CLASS_COL
+
+BENIGN, PATHOGENIC = "Benign", "Pathogenic"
+QUANTILES = (0.025, 0.5, 0.975)
+
+
+def labelled_scores(scores, classes):
+    """(benign scores, pathogenic scores) with NaN scores dropped."""
+    scores = np.asarray(scores, dtype=np.float64)
+    classes = np.asarray(classes, dtype=object)
+    ok = ~np.isnan(scores)
+    return scores[ok & (classes == BENIGN)], scores[ok & (classes == PATHOGENIC)]
+
+
+def _rates(thresholds, ben_sorted, pat_sorted):
+    """Sensitivity (pathogenic ≥ thr) and specificity (benign < thr) for each threshold."""
+    sens = 1.0 - np.searchsorted(pat_sorted, thresholds, side="left") / len(pat_sorted)
+    spec = np.searchsorted(ben_sorted, thresholds, side="left") / len(ben_sorted)
+    return sens, spec
+
+
+# ─── Replicate chunks (module level so they pickle for the process pool) ─────
+def _bootstrap_chunk(ben, pat, size, seed):
+    rng = np.random.default_rng(seed)
+    ben_max = ben[rng.integers(0, len(ben), size=(size, len(ben)))].max(axis=1)
+    pat_min = pat[rng.integers(0, len(pat), size=(size, len(pat)))].min(axis=1)
+    thr = (ben_max + pat_min) / 2
+    sens, spec = _rates(thr, np.sort(ben), np.sort(pat))
+    return {"threshold": thr, "benign_max": ben_max, "pathogenic_min": pat_min,
+            "sensitivity": sens, "specificity": spec}
+
+
+def _permutation_chunk(ben, pat, size, seed):
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([ben, pat])
+    labels = np.tile(np.arange(len(pooled)) < len(ben), (size, 1))       # True = benign
+    labels = rng.permuted(labels, axis=1)
+    scores = np.broadcast_to(pooled, labels.shape)
+    ben_max = np.where(labels, scores, -np.inf).max(axis=1)
+    pat_min = np.where(labels, np.inf, scores).min(axis=1)
+    return {"threshold": (ben_max + pat_min) / 2, "gap": pat_min - ben_max}
+
+
+def _run(chunk_fn, ben, pat, n, seed, chunk_size, workers):
+    sizes = [min(chunk_size, n - i) for i in range(0, n, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(ben, pat, s, sd) for s, sd in zip(sizes, seeds)]
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(chunk_fn, *zip(*args)))
+    else:
+        parts = [chunk_fn(*a) for a in args]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]} if parts else {}
+
+
+def bootstrap_thresholds(scores, classes, n=10_000, seed=0, chunk_size=5_000, workers=None):
+    """``n`` bootstrap replicates of the midpoint threshold → dict of (n,) arrays."""
+    ben, pat = labelled_scores(scores, classes)
+    if not (len(ben) and len(pat)):
+        raise ValueError("need at least one Benign and one Pathogenic score")
+    return _run(_bootstrap_chunk, ben, pat, n, seed, chunk_size, workers)
+
+
+def permutation_thresholds(scores, classes, n=10_000, seed=0, chunk_size=5_000, workers=None):
+    """``n`` label permutations → null ``threshold`` and ``gap`` arrays."""
+    ben, pat = labelled_scores(scores, classes)
+    if not (len(ben) and len(pat)):
+        raise ValueError("need at least one Benign and one Pathogenic score")
+    return _run(_permutation_chunk, ben, pat, n, seed, chunk_size, workers)
+
+
+# ─── Reports ─────────────────────────────────────────────────────────────────
+def summarize(values, quantiles=QUANTILES):
+    values = np.asarray(values, dtype=np.float64)
+    out = {"mean": values.mean(), "std": values.std(ddof=1) if len(values) > 1 else np.nan}
+    out.update({f"q{q:g}": v for q, v in zip(quantiles, np.quantile(values, quantiles))})
+    return pd.Series(out)
+
+
+def threshold_uncertainty(scores, classes, n_boot=10_000, n_perm=10_000, seed=0,
+                          chunk_size=5_000, workers=None):
+    """Point threshold, bootstrap distributions and permutation p-value for one score.
+
+    Returns ``(summary, boot, perm)``: ``summary`` has one row per quantity
+    (threshold, sensitivity, specificity, benign_max, pathogenic_min) with the
+    bootstrap mean/std/quantiles; its ``attrs`` hold the observed threshold,
+    gap and the permutation p-value of the gap.
+    """
+    ben, pat = labelled_scores(scores, classes)
+    boot = bootstrap_thresholds(scores, classes, n_boot, seed, chunk_size, workers)
+    perm = permutation_thresholds(scores, classes, n_perm, seed + 1, chunk_size, workers)
+    summary = pd.DataFrame({k: summarize(v) for k, v in boot.items()}).T
+    observed_gap = pat.min() - ben.max()
+    summary.attrs = {
+        "threshold": (ben.max() + pat.min()) / 2,
+        "gap": observed_gap,
+        "gap_pvalue": (1 + np.sum(perm["gap"] >= observed_gap)) / (1 + len(perm["gap"])),
+        "n_benign": len(ben), "n_pathogenic": len(pat),
+    }
+    return summary, boot, perm
+
+
+def variant_stability(scores, thresholds):
+    """Share of replicate ``thresholds`` at or below each score (i.e. called Pathogenic)."""
+    thr = np.sort(np.asarray(thresholds, dtype=np.float64))
+    scores = np.asarray(scores, dtype=np.float64)
+    frac = np.searchsorted(thr, scores, side="right") / len(thr)
+    return np.where(np.isnan(scores), np.nan, frac)
+
+
+def report(df, score_cols=("ddG_Fmax", "ddG_Bmax"), class_col=CLASS_COL, **kwargs):
+    """One summary row per score column (bootstrap CI, permutation p-value)."""
+    rows = []
+    for col in score_cols:
+        if col not in df.columns:
+            continue
+        summary, _, _ = threshold_uncertainty(df[col], df[class_col], **kwargs)
+        a = summary.attrs
+        rows.append({"score": col, "threshold": a["threshold"],
+                     **{f"threshold_{k}": summary.loc["threshold", k] for k in summary.columns},
+                     "sensitivity_mean": summary.loc["sensitivity", "mean"],
+                     "specificity_mean": summary.loc["specificity", "mean"],
+                     "gap": a["gap"], "gap_pvalue": a["gap_pvalue"],
+                     "n_benign": a["n_benign"], "n_pathogenic": a["n_pathogenic"]})
+    return pd.DataFrame(rows).set_index("score")
+
+
+def main(argv=None):
+    import argparse
+
+    from .ddg import KINASE_DOMAIN, binding_ddg, folding_ddg
+    from .reclassify import BINDING_TARGETS
+
+    ap = argparse.ArgumentParser(description="Bootstrap / permutation CIs for the ΔΔG thresholds")
+    ap.add_argument("--folding", help="folding workbook")
+    ap.add_argument("--binding", help="binding workbook")
+    ap.add_argument("--n-boot", type=int, default=10_000)
+    ap.add_argument("--n-perm", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=None, help="CSV for the summary table")
+    args = ap.parse_args(argv)
+
+    kw = dict(n_boot=args.n_boot, n_perm=args.n_perm, seed=args.seed, workers=args.workers)
+    parts = []
+    if args.folding:
+        fold, _ = folding_ddg(args.folding, positions=KINASE_DOMAIN)
+        parts.append(report(fold, ["ddG_Fmax"], **kw))
+    if args.binding:
+        bind, _, _, _ = binding_ddg(args.binding, BINDING_TARGETS, positions=KINASE_DOMAIN)
+        parts.append(report(bind, ["ddG_Bmax"], **kw))
+    table = pd.concat(parts) if parts else pd.DataFrame()
+    print(table.T.to_string())
+    if args.out:
+        table.to_csv(args.out)
+
+
+if __name__ == "__main__":
+    main()
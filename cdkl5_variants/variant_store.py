@@ -0,0 +1,121 @@
+"""Columnar (Parquet) variant store keyed by ``mutation``.
+
+The curated variant table is written once as ``base.parquet``; each predictor
+(PolyPhen-2, MutPred2, ESM-1v, AlphaMissense, ...) writes only its own column
+group to ``<group>.parquet``.  Reads are memory-mapped Arrow scans joined on the
+``mutation`` key, and Excel is only produced on request by ``export_excel``
+instead of being re-parsed between stages.
+
+Layout::
+
+    <root>/base.parquet
+    <root>/groups/<group>.parquet
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+KEY = "mutation"
+
+
+def _arrow_safe(df):
+    """Cast object columns holding mixed Python types to string so Arrow accepts them."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            kinds = {type(v) for v in df[col].dropna()}
+            if len(kinds) > 1:
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+class VariantStore:
+    def __init__(self, root):
+        self.root = root
+        self.base_path = os.path.join(root, "base.parquet")
+        self.group_dir = os.path.join(root, "groups")
+
+    # ─── Writing ─────────────────────────────────────────────────────────────
+    def _write(self, df, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+        tmp = path + ".tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        return path
+
+    def write_base(self, df):
+        """Write the curated variant table; ``mutation`` must be present and unique."""
+        if KEY not in df.columns:
+            raise KeyError(f"Column '{KEY}' not found in base table")
+        dup = df[KEY][df[KEY].duplicated()].unique()
+        if len(dup):
+            raise ValueError(f"Duplicate '{KEY}' keys in base table: {list(dup[:5])}")
+        return self._write(df, self.base_path)
+
+    @classmethod
+    def from_excel(cls, root, xlsx_path):
+        """Create (or refresh) a store from the variants workbook."""
+        store = cls(root)
+        store.write_base(pd.read_excel(xlsx_path, engine="openpyxl"))
+        return store
+
+    def write_group(self, name, df):
+        """Write one predictor's columns, keyed by ``mutation``.
+
+        Columns already in the base table are dropped, so a group can never
+        shadow a curated column.  Duplicate keys keep the first row.
+        """
+        if KEY not in df.columns:
+            raise KeyError(f"Group '{name}' has no '{KEY}' column")
+        base_cols = set(self.columns())
+        cols = [KEY] + [c for c in df.columns if c != KEY and c not in base_cols]
+        group = df[cols].dropna(subset=[KEY]).drop_duplicates(KEY, keep="first")
+        return self._write(group, self._group_path(name))
+
+    def _group_path(self, name):
+        return os.path.join(self.group_dir, f"{name}.parquet")
+
+    # ─── Reading ─────────────────────────────────────────────────────────────
+    def groups(self):
+        if not os.path.isdir(self.group_dir):
+            return []
+        return sorted(f[:-8] for f in os.listdir(self.group_dir) if f.endswith(".parquet"))
+
+    def columns(self, group=None):
+        path = self.base_path if group is None else self._group_path(group)
+        return pq.read_schema(path).names
+
+    def scan(self, groups=None, columns=None):
+        """Arrow table of the base joined (left) with the requested groups.
+
+        ``columns`` restricts what is read from disk; the key is always kept.
+        """
+        groups = self.groups() if groups is None else list(groups)
+        want = None if columns is None else set(columns) | {KEY}
+
+        def read(path):
+            names = pq.read_schema(path).names
+            cols = None if want is None else [c for c in names if c in want]
+            return pq.read_table(path, columns=cols, memory_map=True)
+
+        table = read(self.base_path)
+        for g in groups:
+            gt = read(self._group_path(g))
+            if gt.num_columns > 1:
+                table = table.join(gt, keys=KEY, join_type="left outer")
+        return table
+
+    def read(self, groups=None, columns=None):
+        """``scan`` as a pandas DataFrame in the base table's row order."""
+        base_keys = pq.read_table(self.base_path, columns=[KEY], memory_map=True)[KEY]
+        df = self.scan(groups, columns).to_pandas()
+        order = pd.Index(df[KEY]).get_indexer(base_keys.to_pandas())
+        return df.iloc[order].reset_index(drop=True)
+
+    def export_excel(self, path, groups=None, columns=None):
+        df = self.read(groups, columns)
+        df.to_excel(path, index=False)
+        return path
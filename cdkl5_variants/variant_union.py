@@ -0,0 +1,223 @@
+"""Deduplicated union of the variant sources with per-source provenance bits.
+
+The combined table ``01_cdkl5_clinvar_gaf_1kgp_hctr_comb_unq_af.xlsx`` was
+assembled from pairwise set operations on ``Protein change`` between sheets
+(1KGP vs ClinVar, Hector2017 vs ClinVar, then a gnomAD merge for the allele
+frequency), redone for every pair.  Here each source registers a normaliser
+that returns ``wild``, ``position``, ``mutant`` and the columns it contributes;
+``union`` encodes every row to the integer key of ``predictors.variant_keys``
+and factorises all keys together once, so a new source is one more pass::
+
+    table, report = union({"clinvar": "00_data/clinvar_result.txt",
+                           "gnomad": "00_data/gnomAD.csv",
+                           "1kgp": "00_data/1kgp_cdkl5_grch38.xlsx",
+                           "hector2017": "00_data/hector2017.xlsx"})
+
+``provenance`` holds one bit per source (``SOURCE_BITS``), ``sources`` the
+same as ``clinvar|gnomad``.  A column provided by several sources takes the
+value of the first source (in ``sources`` order) that has it.  gnomAD only
+contributes annotation columns: ``Allele Frequency`` and one
+``Allele Frequency <population>`` per population, taken like the
+``ClinVar_Classified_Only`` sheet of ``gnomAD.xlsx`` from the rows gnomAD links
+to a ClinVar classification.  ``curated`` gives the
+ClinVar + 1KGP + Hector2017 set of the combined workbook.
+"""
+import numpy as np
+import pandas as pd
+
+from .esm1v import AMINO_ACIDS
+from .hgvs import check_reference, parse_protein_change
+from .ingest import ingest
+from .predictors import variant_keys
+
+NORMALISERS = {}
+SOURCE_BITS = {}
+
+
+def register_source(name):
+    """Register a normaliser; bits follow registration order (1, 2, 4, ...)."""
+    def wrap(func):
+        NORMALISERS[name] = func
+        SOURCE_BITS[name] = 1 << len(SOURCE_BITS)
+        return func
+    return wrap
+
+
+def _missense(df, column):
+    """Rows of ``df`` with a parsed missense ``column``, plus wild/position/mutant."""
+    parsed = parse_protein_change(df[column])
+    keep = (parsed["kind"] == "missense").to_numpy()
+    out = df[keep].reset_index(drop=True)
+    p = parsed[keep].reset_index(drop=True)
+    return out.assign(wild=p["wild"], position=p["position"], mutant=p["mutant"],
+                      **{"Protein change": p["protein_change"]})
+
+
+# ─── Sources ─────────────────────────────────────────────────────────────────
+@register_source("clinvar")
+def clinvar_source(source):
+    """``clinvar_result.txt`` (streamed through the ``ingest`` filters) or a curated frame."""
+    df = source if isinstance(source, pd.DataFrame) else ingest(source, "clinvar")[0]
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed:")])
+    return _missense(df, "Protein change").assign(Source="Clinvar")
+
+
+@register_source("gnomad")
+def gnomad_source(source):
+    """gnomAD browser export: missense rows → total and per-population allele frequency.
+
+    Only rows with a ``ClinVar Germline Classification`` are used, as in the
+    ``ClinVar_Classified_Only`` sheet the combined workbook took its AF from;
+    AC0 rows among them keep their AF of 0.0, as they do in that workbook.
+    Several alleles can give the same protein change; their frequencies add up
+    (population AF = summed allele count / largest allele number).
+    """
+    df = source if isinstance(source, pd.DataFrame) else ingest(source, "gnomad")[0]
+    df = df[df["ClinVar Germline Classification"].notna()]
+    df = _missense(df, "Protein Consequence")
+    pops = [c[len("Allele Count "):] for c in df.columns
+            if c.startswith("Allele Count ") and f"Allele Number {c[len('Allele Count '):]}" in df.columns]
+    keys = ["wild", "position", "mutant"]
+    agg = {"Allele Frequency": ("Allele Frequency", "sum"),
+           "ClinVar Germline Classification": ("ClinVar Germline Classification", "first")}
+    for p in pops:
+        agg[f"_ac {p}"] = (f"Allele Count {p}", "sum")
+        agg[f"_an {p}"] = (f"Allele Number {p}", "max")
+    out = df.groupby(keys, sort=False).agg(**agg).reset_index()
+    for p in pops:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"Allele Frequency {p}"] = out.pop(f"_ac {p}") / out.pop(f"_an {p}").replace(0, np.nan)
+    return out
+
+
+@register_source("1kgp")
+def kgp_source(source):
+    """1000 Genomes CDKL5 export (``Sheet1`` or the ``missense_cdkl5_*`` sheets)."""
+    df = source if isinstance(source, pd.DataFrame) else pd.read_excel(source, sheet_name="Sheet1")
+    df = df[(df["Consequence"] == "missense_variant") & (df["Gene"] == "CDKL5")]
+    df = _missense(df, "HGVSp")
+    # population variants; labelled Benign in the combined table
+    return pd.DataFrame({
+        "wild": df["wild"], "position": df["position"], "mutant": df["mutant"],
+        "Protein change": df["Protein change"], "1KGP AF": df["AF"],
+        "Variant type": "single nucleotide variant", "Molecular consequence": df["Consequence"],
+        "Germline classification": "Benign", "Source": "1000genome",
+    })
+
+
+@register_source("hector2017")
+def hector_source(source):
+    """Hector et al. 2017 table (``Mutation``, ``Consequence``, ``Source``)."""
+    df = source if isinstance(source, pd.DataFrame) else pd.read_excel(source, sheet_name="Sheet1")
+    df = _missense(df, "Mutation")
+    return df[["wild", "position", "mutant", "Protein change", "Source"]].assign(
+        **{"Germline classification": df["Consequence"].to_numpy()})
+
+
+# ─── Union ───────────────────────────────────────────────────────────────────
+def union(sources, normalisers=None):
+    """Union of ``{name: path or frame}`` keyed on (wild, position, mutant).
+
+    Returns ``(table, report)``; ``table`` is sorted by position and has
+    ``mutation``, ``wild``, ``position``, ``mutant``, ``provenance``,
+    ``sources`` and every contributed column, ``report`` one row per source.
+    """
+    normalisers = NORMALISERS if normalisers is None else normalisers
+    frames, report = {}, []
+    for name, source in sources.items():
+        res = normalisers[name](source).reset_index(drop=True)
+        keys = variant_keys(res["wild"], res["position"], res["mutant"])
+        valid = keys >= 0
+        dup = np.zeros(len(keys), dtype=bool)
+        dup[valid] = pd.Series(keys[valid]).duplicated(keep="first").to_numpy()
+        keep = valid & ~dup
+        frames[name] = (res[keep].reset_index(drop=True), keys[keep])
+        report.append({"source": name, "bit": SOURCE_BITS.get(name, 0), "rows": len(res),
+                       "invalid": int((~valid).sum()), "duplicates": int(dup.sum()),
+                       "variants": int(keep.sum())})
+
+    all_keys = np.concatenate([k for _, k in frames.values()]) if frames else np.empty(0, np.int64)
+    codes, uniques = pd.factorize(all_keys)
+    n = len(uniques)
+    provenance = np.zeros(n, dtype=np.int64)
+    columns = {}
+    start = 0
+    for (name, (res, keys)), row in zip(frames.items(), report):
+        c = codes[start:start + len(keys)]
+        start += len(keys)
+        row["new"] = int((provenance[c] == 0).sum())
+        provenance[c] |= SOURCE_BITS.get(name, 0)
+        for col in res.columns.drop(["wild", "position", "mutant"]):
+            vals = res[col].to_numpy()
+            if col not in columns:
+                columns[col] = (np.full(n, np.nan) if vals.dtype.kind in "iuf"
+                                else np.full(n, None, dtype=object))
+            target = columns[col]
+            empty = pd.isna(target[c])
+            target[c[empty]] = vals[empty]
+
+    # decode the variant_keys encoding: (position * 20 + wild) * 20 + mutant
+    aa = np.array(list(AMINO_ACIDS), dtype=object)
+    position, wild, mutant = uniques // 400, aa[(uniques // 20) % 20], aa[uniques % 20]
+    names = np.array(list(SOURCE_BITS), dtype=object)
+    bits = np.array([SOURCE_BITS[s] for s in names], dtype=np.int64)
+    member = (provenance[:, None] & bits[None, :]) != 0
+    table = pd.DataFrame({
+        "mutation": wild + pd.Series(position).astype(str).to_numpy() + mutant,
+        "wild": wild, "position": position, "mutant": mutant,
+        "provenance": provenance,
+        "sources": ["|".join(names[m]) for m in member],
+        **columns,
+    })
+    table = table.iloc[np.argsort(uniques, kind="stable")].reset_index(drop=True)
+    return table, pd.DataFrame(report).set_index("source")
+
+
+def has(table, *names):
+    """Mask of variants seen in any of the named sources."""
+    mask = sum(SOURCE_BITS[n] for n in names)
+    return (table["provenance"].to_numpy() & mask) != 0
+
+
+def curated(table, include=("clinvar", "1kgp", "hector2017"), sequence=None):
+    """The combined-workbook set: variants from the curated sources, with gnomAD AF attached.
+
+    With ``sequence`` (the UniProt O76039 sequence) variants whose wild-type
+    residue does not match it are dropped, as in the cleaning notebook's 8.7.
+    """
+    keep = has(table, *include)
+    if sequence is not None:
+        keep &= check_reference(table["wild"], table["position"], sequence)[0]
+    return table[keep].reset_index(drop=True)
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Union of ClinVar / gnomAD / 1KGP / Hector2017 variants")
+    ap.add_argument("--clinvar", default="00_data/clinvar_result.txt")
+    ap.add_argument("--gnomad", default="00_data/gnomAD.csv")
+    ap.add_argument("--kgp", default="00_data/1kgp_cdkl5_grch38.xlsx")
+    ap.add_argument("--hector", default="00_data/hector2017.xlsx")
+    ap.add_argument("--all", action="store_true", help="keep gnomAD-only variants")
+    ap.add_argument("--uniprot", default="O76039", help="drop reference mismatches against this entry ('' to skip)")
+    ap.add_argument("--out", required=True, help=".xlsx, .parquet or .csv")
+    args = ap.parse_args(argv)
+
+    table, report = union({"clinvar": args.clinvar, "gnomad": args.gnomad,
+                           "1kgp": args.kgp, "hector2017": args.hector})
+    print(report.to_string())
+    if not args.all:
+        from .fetch import uniprot_sequence
+        table = curated(table, sequence=uniprot_sequence(args.uniprot) if args.uniprot else None)
+    if args.out.endswith(".xlsx"):
+        table.to_excel(args.out, index=False)
+    elif args.out.endswith(".parquet"):
+        table.to_parquet(args.out, index=False)
+    else:
+        table.to_csv(args.out, index=False)
+    print(f"✅ {len(table)} variants → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
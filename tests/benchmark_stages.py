@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Benchmarks of every analysis stage on synthetic CDKL5-shaped inputs.
+
+Each benchmark generates its inputs at a given number of rows (variants,
+HADDOCK models or ClinVar records), written to a temporary directory in the
+formats the real files use:
+
+* wide folding (``<method>_str``) and binding
+  (``ddg_<acc>_<partner>_<motif>_str_<method>``) ΔΔG tables;
+* ``capri_ss.tsv`` HADDOCK tables;
+* PolyPhen-2 batch TSVs, headerless MutPred2 CSVs and AlphaMissense CSVs;
+* ClinVar search exports and gnomAD browser exports.
+
+Generation is not timed.  Each stage's core function is run once to warm up,
+timed ``--repeat`` times (the median is reported) and then run once more
+under ``tracemalloc`` for its peak allocation.  Results are compared with
+``benchmark_baseline.json``; a stage more than ``--tolerance`` slower (or
+``--mem-tolerance`` larger) than its baseline fails the run, as long as the
+difference is also above ``--min-seconds`` (or 1 MB), so that millisecond
+stages at 10² rows do not fail on timer noise::
+
+    python tests/benchmark_stages.py                          # 10² … 10⁵ rows
+    python tests/benchmark_stages.py --rows 1000000 --only fmax bmax threshold
+    python tests/benchmark_stages.py --update-baseline
+
+Timings depend on the machine; the baseline records where it was made, so
+regenerate it (``--update-baseline``) before comparing on another host.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cdkl5_variants import ddg
+from cdkl5_variants.ddg import CLASS_COL
+from cdkl5_variants.esm1v import AMINO_ACIDS
+from cdkl5_variants.haddock_energies import ENERGY_COLS, harvest_run
+from cdkl5_variants.hgvs import AA_3TO1, parse_protein_change
+from cdkl5_variants.ingest import ingest
+from cdkl5_variants.predictors import MUTPRED2_COLUMNS, merge_predictors
+from cdkl5_variants.reclassify import BINDING_TARGETS, BindingStage, FoldingStage, midpoint, reclass
+from cdkl5_variants.threshold_sweep import sweep_all
+from cdkl5_variants.variant_union import union
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_ROWS = (100, 1_000, 10_000, 100_000)
+LENGTH = 960                                    # CDKL5 (O76039) residues
+CLASSES = ["Benign", "Pathogenic", "Uncertain significance", "Likely benign",
+           "Conflicting classifications of pathogenicity"]
+CLASS_P = [0.15, 0.15, 0.5, 0.1, 0.1]
+FOLDING_METHODS = ["saafecseq", "inps", "ddgun", "mcsm", "ddmut", "foldx"]
+BINDING_METHODS = ["saambe3d", "mcsmppi", "ddmutppi", "isee", "foldx"]
+ACCESSIONS = {"SOX9": "P48436", "AMPH1": "P49418", "GATAD2A": "Q86YP4", "ZNF219": "Q9P2Y4"}
+_TO_THREE = {v: k for k, v in AA_3TO1.items() if k != "Ter"}
+
+BENCHMARKS = {}
+
+
+def register_benchmark(name, max_rows=None):
+    """Register ``setup(rows, workdir, rng) → callable``; the callable is what is timed."""
+    def wrap(func):
+        BENCHMARKS[name] = (func, max_rows)
+        return func
+    return wrap
+
+
+# ─── Synthetic inputs ────────────────────────────────────────────────────────
+def variants(n, rng):
+    """``n`` distinct missense variants; past 960 × 19 the protein is extended."""
+    length = max(LENGTH, -(-n // 19))
+    seq = rng.choice(list(AMINO_ACIDS), length)
+    pick = rng.choice(length * 19, n, replace=False)
+    pos, k = pick // 19 + 1, pick % 19
+    aa = np.array(list(AMINO_ACIDS), dtype=object)
+    wild = seq[pos - 1].astype(object)
+    wi = pd.Series(wild).map({a: i for i, a in enumerate(AMINO_ACIDS)}).to_numpy()
+    mutant = aa[(wi + 1 + k) % 20]
+    order = np.argsort(pos, kind="stable")
+    wild, pos, mutant = wild[order], pos[order], mutant[order]
+    return pd.DataFrame({
+        "mutation": wild + pos.astype(str).astype(object) + mutant,
+        "wild": wild, "position": pos, "mutant": mutant,
+        CLASS_COL: rng.choice(CLASSES, n, p=CLASS_P),
+    })
+
+
+def _ddg(rng, n, missing=0.05):
+    values = rng.gamma(1.5, 0.8, n) * rng.choice([-1, 1], n)
+    values[rng.random(n) < missing] = np.nan
+    return values
+
+
+def folding_table(n, rng):
+    df = variants(n, rng)
+    for m in FOLDING_METHODS:
+        df[f"{m}_str"] = _ddg(rng, n)
+    return df
+
+
+def binding_table(n, rng):
+    df = variants(n, rng)
+    cols = {f"ddg_{ACCESSIONS[g]}_{g}_{motif}_str_{m}": _ddg(rng, n)
+            for g, motif in BINDING_TARGETS.items() for m in BINDING_METHODS}
+    return pd.concat([df, pd.DataFrame(cols)], axis=1)
+
+
+def write_capri_ss(path, n, rng):
+    data = {"model": [f"../06_flexref/flexref_{i + 1}.pdb" for i in range(n)],
+            "md5": "-", "caprieval_rank": np.arange(1, n + 1)}
+    for col in ENERGY_COLS[1:]:
+        data[col] = rng.normal(-50, 20, n).round(3)
+    pd.DataFrame(data).to_csv(path, sep="\t", index=False)
+
+
+def write_polyphen2(path, df, rng):
+    n = len(df)
+    prob = rng.random(n).round(3)
+    out = pd.DataFrame({
+        "#o_acc    ": "O76039", "o_pos": df["position"], "o_aa1": df["wild"], "o_aa2": df["mutant"],
+        "rsid": "?", "acc": "O76039", "pos": df["position"].astype(str).str.pad(6),
+        "aa1": df["wild"], "aa2": df["mutant"],
+        "prediction": np.where(prob > 0.85, "probably damaging",
+                               np.where(prob > 0.45, "possibly damaging", "benign")),
+        "pph2_prob": prob, "pph2_FPR": (1 - prob).round(3), "pph2_TPR": prob.round(3),
+    })
+    out.to_csv(path, sep="\t", index=False)
+
+
+def write_mutpred2(path, df, rng):
+    n = len(df)
+    out = pd.DataFrame({
+        "ID": "CDKL5_HUMAN", "Substitution": df["mutation"], "MutPred2_score": rng.random(n).round(3),
+        "Molecular_mechanisms": "Altered Transmembrane protein (Pr = 0.21 | P = 0.03)",
+        "Affected_PROSITE_and_ELM_Motifs": "-", "Remarks": "-",
+    }, columns=MUTPRED2_COLUMNS)
+    out.to_csv(path, header=False, index=False)
+
+
+def write_alphamissense(path, df, rng):
+    score = rng.random(len(df)).round(4)
+    pd.DataFrame({
+        "uniprot_id": "O76039", "transcript_id": "ENST00000379996.7",
+        "protein_variant": df["mutation"], "am_pathogenicity": score,
+        "am_class": np.where(score > 0.564, "likely_pathogenic",
+                             np.where(score < 0.34, "likely_benign", "ambiguous")),
+    }).to_csv(path, index=False)
+
+
+def clinvar_export(n, rng):
+    """ClinVar search export rows: mostly missense SNVs, some other types and conditions."""
+    v = variants(n, rng)
+    three = v["wild"].map(_TO_THREE) + v["position"].astype(str) + v["mutant"].map(_TO_THREE)
+    cpos = (v["position"] * 3 - 1).astype(str)
+    kind = rng.choice(["missense variant", "synonymous variant", "intron variant|missense variant",
+                       "nonsense"], n, p=[0.7, 0.15, 0.1, 0.05])
+    return pd.DataFrame({
+        "Name": "NM_001323289.2(CDKL5):c." + cpos + "A>G (p." + three + ")",
+        "Gene(s)": "CDKL5",
+        "Protein change": v["mutation"],
+        "Condition(s)": rng.choice(["CDKL5 disorder", "not provided", "CDKL5 disorder|not provided"], n),
+        "Accession": [f"VCV{i:09d}" for i in range(n)],
+        "GRCh38Chromosome": "X", "GRCh38Location": 18_500_000 + v["position"] * 3,
+        "VariationID": np.arange(n), "AlleleID(s)": np.arange(n) + 10**6, "dbSNP ID": "",
+        "Variant type": rng.choice(["single nucleotide variant", "Deletion"], n, p=[0.9, 0.1]),
+        "Molecular consequence": kind,
+        "Germline classification": v[CLASS_COL],
+        "Germline review status": "criteria provided, single submitter",
+    })
+
+
+def gnomad_export(n, rng, pops=("African/African American", "European (non-Finnish)", "East Asian")):
+    v = variants(n, rng)
+    three = v["wild"].map(_TO_THREE) + v["position"].astype(str) + v["mutant"].map(_TO_THREE)
+    an = rng.integers(50_000, 200_000, n)
+    ac = rng.integers(1, 20, n)
+    df = pd.DataFrame({
+        "gnomAD ID": "X-" + (18_500_000 + v["position"] * 3).astype(str) + "-A-G",
+        "Protein Consequence": "p." + three, "VEP Annotation": "missense_variant",
+        "ClinVar Germline Classification": rng.choice(["", "Uncertain significance", "Benign"], n),
+        "Allele Count": ac, "Allele Number": an, "Allele Frequency": ac / an,
+    })
+    for p in pops:
+        df[f"Allele Count {p}"] = rng.integers(0, 5, n)
+        df[f"Allele Number {p}"] = an // len(pops)
+    return df
+
+
+# ─── Benchmarks ──────────────────────────────────────────────────────────────
+@register_benchmark("fmax")
+def bench_fmax(rows, workdir, rng):
+    frame, stage = folding_table(rows, rng), FoldingStage()
+    return lambda: stage.compute(frame)
+
+
+@register_benchmark("bmax")
+def bench_bmax(rows, workdir, rng):
+    frame, stage = binding_table(rows, rng), BindingStage()
+    return lambda: stage.compute(frame)
+
+
+@register_benchmark("folding_workbook", max_rows=100_000)
+def bench_folding_workbook(rows, workdir, rng):
+    path = os.path.join(workdir, "folding.xlsx")
+    folding_table(rows, rng).to_excel(path, index=False)
+
+    def run():
+        ddg._folding.cache_clear()
+        ddg._read_excel.cache_clear()
+        return ddg.folding_ddg(path, positions=None)
+    return run
+
+
+@register_benchmark("threshold")
+def bench_threshold(rows, workdir, rng):
+    df = variants(rows, rng)
+    for col in ("ddG_Fmax", "ddG_Bmax", "pph2_prob", "MutPred2_score", "am_pathogenicity", "delta_score"):
+        df[col] = rng.random(rows)
+
+    def run():
+        scores, classes = df["ddG_Fmax"].to_numpy(), df[CLASS_COL].to_numpy(dtype=object)
+        reclass(scores, classes, midpoint(scores, classes)[0])
+        return sweep_all(df)
+    return run
+
+
+@register_benchmark("merge")
+def bench_merge(rows, workdir, rng):
+    base = variants(rows, rng)
+    hits = base.sample(frac=0.9, random_state=0)            # predictors miss a few variants
+    paths = {name: os.path.join(workdir, f) for name, f in
+             [("polyphen2", "pph2.tsv"), ("mutpred2", "mutpred2_part1_result.csv"),
+              ("alphamissense", "AF-O76039-F1-hg38.csv")]}
+    write_polyphen2(paths["polyphen2"], hits, rng)
+    write_mutpred2(paths["mutpred2"], hits, rng)
+    write_alphamissense(paths["alphamissense"], hits, rng)
+    return lambda: merge_predictors(base, paths)
+
+
+@register_benchmark("parse_protein_change")
+def bench_parse(rows, workdir, rng):
+    names = clinvar_export(rows, rng)["Name"]
+    return lambda: parse_protein_change(names)
+
+
+@register_benchmark("ingest_clinvar")
+def bench_ingest(rows, workdir, rng):
+    path = os.path.join(workdir, "clinvar_result.txt")
+    clinvar_export(rows, rng).to_csv(path, sep="\t", index=False)
+    return lambda: ingest(path, "clinvar")
+
+
+@register_benchmark("union")
+def bench_union(rows, workdir, rng):
+    clinvar, gnomad = clinvar_export(rows, rng), gnomad_export(rows, rng)
+    clinvar = clinvar[clinvar["Molecular consequence"] == "missense variant"]
+    return lambda: union({"clinvar": clinvar, "gnomad": gnomad})
+
+
+@register_benchmark("capri_harvest")
+def bench_capri(rows, workdir, rng):
+    path = os.path.join(workdir, "capri_ss.tsv")
+    write_capri_ss(path, rows, rng)
+    return lambda: harvest_run(path, "CDKL5_SOX9")
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+def measure(func, repeat):
+    """(median wall seconds of ``repeat`` runs after a warm-up, peak traced MB of one more run)."""
+    func()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return float(np.median(times)), peak / 2 ** 20
+
+
+def run(names, rows, repeat, seed=0):
+    results = []
+    for name in names:
+        setup, max_rows = BENCHMARKS[name]
+        for n in rows:
+            if max_rows is not None and n > max_rows:
+                continue
+            with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+                func = setup(n, workdir, np.random.default_rng(seed))
+                seconds, peak_mb = measure(func, repeat)
+            results.append({"benchmark": name, "rows": n, "seconds": seconds, "peak_mb": peak_mb})
+            print(f"  {name:<22}{n:>9,}  {seconds:9.4f} s  {peak_mb:9.1f} MB", flush=True)
+    return pd.DataFrame(results)
+
+
+def compare(results, baseline, tolerance, mem_tolerance, min_seconds=0.025, min_mb=1.0):
+    """``results`` with baseline columns and a ``verdict`` (ok / REGRESSION / faster / new)."""
+    base = baseline.get("results", {})
+    rows = []
+    for r in results.to_dict("records"):
+        b = base.get(f"{r['benchmark']}/{r['rows']}")
+        verdict = "new"
+        if b is not None:
+            slow = r["seconds"] > b["seconds"] * (1 + tolerance) and r["seconds"] - b["seconds"] > min_seconds
+            big = r["peak_mb"] > b["peak_mb"] * (1 + mem_tolerance) and r["peak_mb"] - b["peak_mb"] > min_mb
+            fast = r["seconds"] < b["seconds"] / (1 + tolerance) and b["seconds"] - r["seconds"] > min_seconds
+            verdict = "REGRESSION" if slow or big else "faster" if fast else "ok"
+        rows.append({**r, "base_seconds": b and b["seconds"], "base_peak_mb": b and b["peak_mb"],
+                     "ratio": b and r["seconds"] / b["seconds"], "verdict": verdict})
+    return pd.DataFrame(rows)
+
+
+def environment():
+    return {"host": socket.gethostname(), "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the CDKL5 analysis stages on synthetic inputs")
+    ap.add_argument("--only", nargs="+", default=None, choices=sorted(BENCHMARKS))
+    ap.add_argument("--rows", nargs="+", type=int, default=list(DEFAULT_ROWS))
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per stage (median reported)")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.30, help="allowed slowdown (0.30 = 30%%)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.25, help="allowed peak memory growth")
+    ap.add_argument("--min-seconds", type=float, default=0.025,
+                    help="ignore slowdowns smaller than this, whatever the ratio")
+    ap.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    ap.add_argument("--json", default=None, help="also write the results here")
+    args = ap.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    print(f"Benchmarking {len(names)} stage(s) at {', '.join(f'{n:,}' for n in args.rows)} rows")
+    results = run(names, args.rows, args.repeat)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    if args.update_baseline:
+        stored = baseline.get("results", {})
+        stored.update({f"{r['benchmark']}/{r['rows']}": {"seconds": r["seconds"], "peak_mb": r["peak_mb"]}
+                       for r in results.to_dict("records")})
+        tmp = args.baseline + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"environment": environment(), "results": dict(sorted(stored.items()))},
+                      fh, indent=1)
+        os.replace(tmp, args.baseline)
+        print(f"✅ baseline updated: {len(results)} result(s) → {args.baseline}")
+        return
+
+    table = compare(results, baseline, args.tolerance, args.mem_tolerance, args.min_seconds)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"environment": environment(), "results": table.to_dict("records")}, fh,
+                      indent=1, default=str)
+    made_on = baseline.get("environment", {}).get("host")
+    if made_on and made_on != socket.gethostname():
+        print(f"⚠️  baseline was recorded on {made_on}; timings may not be comparable")
+    print(table.round(4).to_string(index=False))
+    failed = table[table["verdict"] == "REGRESSION"]
+    if len(failed):
+        print(f"\n❌ {len(failed)} REGRESSION(S) against {args.baseline}:")
+        for r in failed.to_dict("records"):
+            print(f"   {r['benchmark']} @ {r['rows']:,} rows: {r['seconds']:.4f} s "
+                  f"(baseline {r['base_seconds']:.4f} s), {r['peak_mb']:.1f} MB "
+                  f"(baseline {r['base_peak_mb']:.1f} MB)")
+        sys.exit(1)
+    print(f"\n✅ no regressions against {args.baseline}" if baseline else
+          "\nNo baseline yet; run with --update-baseline to store one.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from cdkl5_variants.esm1v import AA_INDEX, ToyMaskedLM, score_variants
+
+SEQ = "MKIPNIGNVMNKFEILGVVGEGAYGVVLKCRHKE"
+
+
+def _wt_variants(seq, n=5):
+    """``n`` substitutions from position 2 on, each to the next amino acid in ``AA_INDEX``."""
+    aas = list(AA_INDEX)
+    return [f"{seq[p - 1]}{p}{aas[(AA_INDEX[seq[p - 1]] + 1) % 20]}" for p in range(2, n + 2)]
+
+
+@pytest.fixture
+def model():
+    return ToyMaskedLM(seed=1)
+
+
+def test_wt_marginal_delta(model):
+    variants = _wt_variants(SEQ)
+    out = score_variants(SEQ, variants, model=model, mode="wt-marginal")
+    lp = model.log_probs([SEQ])[0]
+    for r in out.itertuples():
+        expected = lp[r.position - 1, AA_INDEX[r.mut_aa]] - lp[r.position - 1, AA_INDEX[r.wt_aa]]
+        assert r.delta_score == pytest.approx(expected, abs=1e-5)
+
+
+def test_masked_marginal_delta(model):
+    variants = _wt_variants(SEQ)
+    out = score_variants(SEQ, variants, model=model, mode="masked-marginal", batch_size=2)
+    for r in out.itertuples():
+        lp = model.log_probs([SEQ], mask=[r.position - 1])[0]
+        expected = lp[r.position - 1, AA_INDEX[r.mut_aa]] - lp[r.position - 1, AA_INDEX[r.wt_aa]]
+        assert r.delta_score == pytest.approx(expected, abs=1e-5)
+
+
+def test_full_sequence_delta(model):
+    def total(seq):
+        lp = model.log_probs([seq])[0]
+        return sum(lp[i, AA_INDEX[a]] for i, a in enumerate(seq))
+
+    variants = _wt_variants(SEQ, 3)
+    out = score_variants(SEQ, variants, model=model, mode="full-sequence", batch_size=2)
+    wt = total(SEQ)
+    for r in out.itertuples():
+        mutant = SEQ[:r.position - 1] + r.mut_aa + SEQ[r.position:]
+        assert r.delta_score == pytest.approx(total(mutant) - wt, abs=1e-3)
+
+
+def test_modes_differ_and_batches_agree(model):
+    variants = _wt_variants(SEQ)
+    scores = {mode: score_variants(SEQ, variants, model=model, mode=mode, batch_size=2)["delta_score"]
+              for mode in ("wt-marginal", "masked-marginal", "full-sequence")}
+    assert not np.allclose(scores["wt-marginal"], scores["masked-marginal"])
+    assert not np.allclose(scores["wt-marginal"], scores["full-sequence"])
+    wide = score_variants(SEQ, variants, model=model, mode="full-sequence", batch_size=64)
+    np.testing.assert_allclose(wide["delta_score"], scores["full-sequence"], atol=1e-4)
+
+
+def test_wrong_reference_residue_raises(model):
+    with pytest.raises(ValueError):
+        score_variants(SEQ, ["A1K"], model=model)
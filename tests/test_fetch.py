@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+import requests
+
+from cdkl5_variants.fetch import UNIPROT_REST, Fetcher, MirrorMiss, uniprot_fasta_url
+from cdkl5_variants.http_standin import StandInServer
+
+FASTA = b">sp|O76039|CDKL5_HUMAN\nMKIPNIGNVM\nNKFEILG\n"
+ROUTES = {
+    "/uniprotkb/O76039.fasta": (200, FASTA),
+    "/uniprotkb/P00000.fasta": (404, b"Not Found"),
+    "/uniprotkb/Q99999.fasta": (500, b"Internal Server Error"),
+}
+
+
+@pytest.fixture
+def server():
+    with StandInServer(ROUTES) as srv:
+        yield srv
+
+
+def _fetcher(mirror, srv=None, offline=False):
+    rewrite = {UNIPROT_REST: srv.url + "/uniprotkb"} if srv else None
+    return Fetcher(str(mirror), offline=offline, retries=0, timeout=5, rewrite=rewrite)
+
+
+def test_fetch_writes_mirror(tmp_path, server):
+    f = _fetcher(tmp_path, server)
+    assert f.uniprot_sequence("O76039") == "MKIPNIGNVMNKFEILG"
+    assert f.network_requests == 1
+    with open(tmp_path / "index.json") as fh:
+        entry = json.load(fh)[uniprot_fasta_url("O76039")]
+    assert entry["status"] == 200 and entry["size"] == len(FASTA)
+    assert os.path.isfile(tmp_path / "objects" / entry["sha256"][:2] / entry["sha256"])
+
+    again = f.get(uniprot_fasta_url("O76039"))
+    assert again.from_mirror and f.network_requests == 1
+    assert server.hits["/uniprotkb/O76039.fasta"] == 1
+
+
+def test_offline_serves_from_disk(tmp_path, server):
+    _fetcher(tmp_path, server).uniprot_sequence("O76039")
+    offline = _fetcher(tmp_path, offline=True)
+    assert offline.uniprot_sequence("O76039") == "MKIPNIGNVMNKFEILG"
+    assert offline.network_requests == 0
+
+
+def test_404_is_mirrored_500_is_not(tmp_path, server):
+    f = _fetcher(tmp_path, server)
+    assert f.get(uniprot_fasta_url("P00000")).status_code == 404
+    with pytest.raises(requests.RequestException):
+        f.get(uniprot_fasta_url("Q99999"))
+    assert f.network_requests == 2
+
+    index = json.load(open(tmp_path / "index.json"))
+    assert index[uniprot_fasta_url("P00000")]["status"] == 404
+    assert uniprot_fasta_url("Q99999") not in index
+
+    offline = _fetcher(tmp_path, offline=True)
+    assert offline.get(uniprot_fasta_url("P00000")).status_code == 404
+    with pytest.raises(MirrorMiss):
+        offline.get(uniprot_fasta_url("Q99999"))
+
+
+def test_offline_miss_raises(tmp_path):
+    with pytest.raises(MirrorMiss):
+        _fetcher(tmp_path, offline=True).uniprot_sequence("O76039")
+
+
+def test_processes_sharing_a_mirror_keep_each_others_entries(tmp_path, server):
+    a, b = _fetcher(tmp_path, server), _fetcher(tmp_path, server)
+    a.get(uniprot_fasta_url("O76039"))
+    b.get(uniprot_fasta_url("P00000"))
+    index = json.load(open(tmp_path / "index.json"))
+    assert {uniprot_fasta_url("O76039"), uniprot_fasta_url("P00000")} <= set(index)
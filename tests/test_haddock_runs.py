@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import pytest
+
+from cdkl5_variants.haddock_runs import HaddockScheduler, completed_steps, plan_cores, with_ncores
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["topoaa", "rigidbody", "seletop", "flexref", "seletopclusts"]
+CFG = 'run_dir = "run_a"\nncores = 40\n\n' + "\n".join(f"[{m}]\n" for m in MODULES)
+FAKE = f"{sys.executable} -m cdkl5_variants.fake_haddock3"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    monkeypatch.delenv("FAKE_HADDOCK_FAIL_AT", raising=False)
+    (tmp_path / "cfgs").mkdir()
+    (tmp_path / "cfgs" / "run_a.cfg").write_text(CFG)
+    return tmp_path
+
+
+def _run(workdir):
+    sched = HaddockScheduler([str(workdir / "cfgs" / "run_a.cfg")], 8, haddock3=FAKE,
+                             workdir=str(workdir))
+    results = sched.run()
+    with open(sched.status_path) as fh:
+        return results, json.load(fh)
+
+
+def test_failure_then_restart(workdir, monkeypatch):
+    monkeypatch.setenv("FAKE_HADDOCK_FAIL_AT", "3")
+    results, status = _run(workdir)
+    run = status["runs"]["run_a"]
+    assert results == {"run_a": 1}
+    assert run["state"] == "failed" and run["returncode"] == 1
+    assert run["restart_from"] is None and "--restart" not in run["cmd"]
+    assert run["completed_steps"] == 3 and run["total_steps"] == len(MODULES)
+    assert status["ncores_per_run"] == 8
+    assert "ncores = 8" in (workdir / "cfgs" / ".run_a.scheduled.cfg").read_text()
+
+    monkeypatch.delenv("FAKE_HADDOCK_FAIL_AT")
+    results, status = _run(workdir)
+    run = status["runs"]["run_a"]
+    assert results == {"run_a": 0}
+    assert run["state"] == "done" and run["restart_from"] == 3
+    assert run["cmd"][-2:] == ["--restart", "3"]
+    assert completed_steps(str(workdir / "run_a"), MODULES) == len(MODULES)
+    assert os.path.isfile(workdir / "logs" / "haddock_run_a.log")
+
+    results, status = _run(workdir)
+    assert results == {"run_a": 0}
+    assert status["runs"]["run_a"]["state"] == "skipped"
+
+
+def test_plan_cores_and_ncores():
+    assert plan_cores(0, 40) == (0, 0)
+    assert plan_cores(3, 40) == (3, 13)
+    assert plan_cores(20, 40, min_cores=8) == (5, 8)
+    assert plan_cores(2, 2) == (1, 2)
+    assert with_ncores('run_dir = "x"\n', 6) == 'run_dir = "x"\nncores = 6\n'
+    assert with_ncores('run_dir = "x"\nncores = 40\n', 6) == 'run_dir = "x"\nncores = 6\n'
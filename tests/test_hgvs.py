@@ -0,0 +1,30 @@
+import pandas as pd
+
+from cdkl5_variants.hgvs import match_status, parse_protein_change, validate
+
+
+def test_parse_protein_change_forms():
+    values = pd.Series(["V107D", "p.Val107Asp", "p.(Arg80His)",
+                        "NM_001323289.2(CDKL5):c.239G>A (p.Arg80His)", "p.Gln234Ter", "p.Gly83=",
+                        "p.Gln679ArgfsTer105", "G905S, D905N", "p.Ter882GlnextTer14", "junk", None],
+                       index=range(10, 21))
+    out = parse_protein_change(values)
+    assert list(out.index) == list(values.index)
+    assert out["protein_change"].tolist() == ["V107D", "V107D", "R80H", "R80H", "Q234*", "G83G",
+                                              "Q679fs", "G905S", None, None, None]
+    assert out["kind"].tolist() == ["missense"] * 4 + ["nonsense", "synonymous", "frameshift",
+                                                       "missense", "other", "invalid", "invalid"]
+    assert out["position"].tolist()[-2:] == [0, 0]
+
+
+def test_match_status():
+    status = match_status(["M", "K", "A", ""], [1, 2, 3, 1], "MKIP")
+    assert status.tolist() == ["Match", "Match", "Mismatch (Seq: I)", "Invalid"]
+
+
+def test_validate_adds_only_notebook_columns():
+    df = pd.DataFrame({"Protein change": ["M1K", "I3F", "p.Ter5GlnextTer2"]})
+    out = validate(df, "MKIP")
+    assert list(out.columns) == ["Protein change", "wt_aa", "pos", "mut_aa", "match_status"]
+    assert out["match_status"].tolist() == ["Match", "Match", "Invalid"]
+    assert list(df.columns) == ["Protein change"]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cdkl5_variants.reclassify import FoldingStage, Reclassifier, midpoint, reclass
+
+
+def _folding(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    classes = np.array(["Benign", "Pathogenic", "Uncertain significance", "Likely benign"], dtype=object)
+    return pd.DataFrame({
+        "mutation": [f"A{p}V" for p in range(1, n + 1)],
+        "position": np.arange(1, n + 1),
+        "Germline classification": classes[np.arange(n) % len(classes)],
+        "inps_str": rng.normal(0, 1.5, n).round(3),
+        "ddgun_str": rng.normal(0, 1.5, n).round(3),
+        "foldx_str": rng.normal(0, 5.0, n).round(3),     # excluded method
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return Reclassifier(str(tmp_path / "state"), stages=[FoldingStage()])
+
+
+def _same_as_full(engine, df, tmp_path):
+    full = Reclassifier(str(tmp_path / "full"), stages=[FoldingStage()])
+    full.update("folding", df, force=True)
+    got = engine.table("folding").set_index("mutation").sort_index()
+    want = full.table("folding").set_index("mutation").sort_index()
+    pd.testing.assert_frame_equal(got, want)
+
+
+def test_midpoint_and_reclass():
+    scores = np.array([0.5, 2.0, 1.0, 1.5, np.nan])
+    classes = np.array(["Benign", "Pathogenic", "Uncertain", "Uncertain", "Uncertain"], dtype=object)
+    threshold, ben_max, pat_min = midpoint(scores, classes)
+    assert (threshold, ben_max, pat_min) == (1.25, 0.5, 2.0)
+    assert reclass(scores, classes, threshold).tolist() == [
+        "Benign", "Pathogenic", "Benign", "Pathogenic", "Uncertain"]
+
+
+def test_first_run_computes_everything(engine):
+    report = engine.update("folding", _folding())
+    assert report["dirty"] == report["variants"] == 40
+    table = engine.table("folding")
+    df = _folding()
+    assert table["ddG_Fmax"].to_numpy() == pytest.approx(
+        np.abs(df[["inps_str", "ddgun_str"]]).max(axis=1).to_numpy())
+
+
+def test_unchanged_rerun_is_clean(engine):
+    engine.update("folding", _folding())
+    report = engine.update("folding", _folding())
+    assert report["dirty"] == 0
+    assert report["reevaluated"] == 0
+    assert not report["threshold_moved"]
+
+
+def test_changed_rows_only(engine, tmp_path):
+    engine.update("folding", _folding())
+    df = _folding()
+    df.loc[2, "inps_str"] = 0.01                # an uncertain variant, threshold unaffected
+    df.loc[5, "foldx_str"] = 99.0               # excluded column: not an input
+    report = engine.update("folding", df)
+    assert report["dirty"] == 1
+    _same_as_full(engine, df, tmp_path)
+
+
+def test_threshold_move_reevaluates_uncertain(engine, tmp_path):
+    engine.update("folding", _folding())
+    df = _folding()
+    benign = df.index[df["Germline classification"] == "Benign"]
+    df.loc[benign, ["inps_str", "ddgun_str"]] = 0.0
+    report = engine.update("folding", df)
+    assert report["threshold_moved"]
+    assert report["dirty"] == len(benign)
+    _same_as_full(engine, df, tmp_path)
+
+
+def test_removed_and_added_variants(engine, tmp_path):
+    engine.update("folding", _folding())
+    df = pd.concat([_folding().iloc[3:], _folding(45, seed=1).iloc[40:]], ignore_index=True)
+    report = engine.update("folding", df)
+    assert report["removed"] == 3
+    assert report["dirty"] == 5
+    _same_as_full(engine, df, tmp_path)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cdkl5_variants.variant_union import SOURCE_BITS, curated, union
+
+
+def _clinvar():
+    return pd.DataFrame({"Protein change": ["M1K", "K2R", "K2R", "I3*"],
+                         "Germline classification": ["Pathogenic", "Benign", "Benign", "Pathogenic"]})
+
+
+def _gnomad():
+    return pd.DataFrame({
+        "Protein Consequence": ["p.Met1Lys", "p.Met1Lys", "p.Ile3Phe", "p.Lys2Arg"],
+        "ClinVar Germline Classification": ["Pathogenic", "Pathogenic", "Uncertain significance", None],
+        "Allele Frequency": [1e-6, 2e-6, 0.0, 5e-3],
+        "Allele Count European": [1, 2, 0, 40],
+        "Allele Number European": [1000, 2000, 1000, 8000],
+    })
+
+
+def _hector():
+    return pd.DataFrame({"Mutation": ["I3F", "M1K"], "Consequence": ["Pathogenic", "Pathogenic"],
+                         "Source": ["Hector2017", "Hector2017"]})
+
+
+def test_union_provenance_and_first_source_wins():
+    table, report = union({"clinvar": _clinvar(), "gnomad": _gnomad(), "hector2017": _hector()})
+    assert table["mutation"].tolist() == ["M1K", "K2R", "I3F"]
+    bits = dict(zip(table["mutation"], table["provenance"]))
+    assert bits["M1K"] == SOURCE_BITS["clinvar"] | SOURCE_BITS["gnomad"] | SOURCE_BITS["hector2017"]
+    assert table.set_index("mutation").loc["I3F", "sources"] == "gnomad|hector2017"
+    assert table.set_index("mutation").loc["M1K", "Source"] == "Clinvar"
+    assert report.loc["clinvar", "duplicates"] == 1
+    assert report.loc["hector2017", "new"] == 0
+
+
+def test_gnomad_af_from_clinvar_classified_rows():
+    table, _ = union({"clinvar": _clinvar(), "gnomad": _gnomad()})
+    af = table.set_index("mutation")["Allele Frequency"]
+    assert af["M1K"] == pytest.approx(3e-6)     # two alleles, same protein change
+    assert np.isnan(af["K2R"])                  # gnomAD row without a ClinVar classification
+    pop = table.set_index("mutation")["Allele Frequency European"]
+    assert pop["M1K"] == pytest.approx(3 / 2000)
+
+
+def test_curated_drops_gnomad_only_and_reference_mismatches():
+    table, _ = union({"clinvar": _clinvar(), "gnomad": _gnomad(), "hector2017": _hector()})
+    assert curated(table, include=("clinvar",))["mutation"].tolist() == ["M1K", "K2R"]
+    assert curated(table, sequence="MRIP")["mutation"].tolist() == ["M1K", "I3F"]